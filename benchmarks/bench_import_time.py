@@ -0,0 +1,105 @@
+"""
+パッケージのインポートとCLIの起動にかかる時間を計測するベンチマーク
+
+ケースごとに新しいPythonプロセスを起動して経過時間を計測し、最小値と中央値を表示する。
+インタープリター自体の起動時間 (`python -c pass`) も計測し、それを差し引いた時間を併記する。
+`--importtime` を指定すると、`python -X importtime` の結果から時間のかかったモジュールを表示する。
+
+使い方:
+    uv run python benchmarks/bench_import_time.py
+    uv run python benchmarks/bench_import_time.py --repeat 20 --importtime cli-help
+    uv run python benchmarks/bench_import_time.py --max-ms 200
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).parent.parent / "src"
+
+# ケースの名前と、Pythonに渡す引数
+CASES = {
+    "python": ["-c", "pass"],
+    "package": ["-c", "import shpsg_parser"],
+    "parser-category": ["-c", "import shpsg_parser.parser_category"],
+    "parser-product": ["-c", "import shpsg_parser.parser_product"],
+    "cli": ["-c", "import shpsg_parser.cli"],
+    "cli-help": ["-m", "shpsg_parser.cli", "--help"],
+}
+
+# `--max-ms` で上限を確認するケース
+CHECKED_CASE = "cli-help"
+
+
+def _env() -> dict:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC_DIR), env.get("PYTHONPATH")]))
+    return env
+
+
+def measure(args, repeat: int) -> list:
+    """新しいプロセスで `repeat` 回実行し、経過時間 (ms) のリストを返す"""
+    env = _env()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, *args], env=env, check=True, stdout=subprocess.DEVNULL)
+        timings.append((time.perf_counter() - started) * 1e3)
+    return timings
+
+
+def slowest_imports(args, top: int) -> list:
+    """`-X importtime` の結果から、累積時間の長いモジュールを (ms, 名前) のリストで返す"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        env=_env(), check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True,
+    )
+    imports = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        imports.append((int(cumulative) / 1e3, name.rstrip()))
+    return sorted(imports, reverse=True)[:top]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES), help="計測するケース")
+    parser.add_argument("--repeat", type=int, default=10, help="ケースごとの実行回数")
+    parser.add_argument("--importtime", nargs="*", choices=list(CASES), default=[], help="時間のかかったモジュールを表示するケース")
+    parser.add_argument("--top", type=int, default=15, help="表示するモジュール数")
+    parser.add_argument("--max-ms", type=float, help=f"{CHECKED_CASE} の中央値の上限 (ms)。超えた場合は終了コード1で終了する")
+    args = parser.parse_args()
+
+    # インタープリターの起動時間を差し引くため、常に計測する
+    baseline = statistics.median(measure(CASES["python"], args.repeat))
+    medians = {}
+    for name in args.cases:
+        timings = measure(CASES[name], args.repeat)
+        medians[name] = statistics.median(timings)
+        print(
+            f"{name:16} min {min(timings):7.1f} ms  median {medians[name]:7.1f} ms"
+            f"  (startup excluded {medians[name] - baseline:7.1f} ms)"
+        )
+
+    for name in args.importtime:
+        print(f"\nSlowest imports for {name} (cumulative):")
+        for ms, module in slowest_imports(CASES[name], args.top):
+            print(f"  {ms:8.1f} ms  {module}")
+
+    if args.max_ms is not None:
+        elapsed = medians.get(CHECKED_CASE)
+        if elapsed is None:
+            elapsed = statistics.median(measure(CASES[CHECKED_CASE], args.repeat))
+        if elapsed > args.max_ms:
+            print(f"{CHECKED_CASE} took {elapsed:.1f} ms (limit {args.max_ms:.1f} ms)")
+            sys.exit(1)
+        print(f"{CHECKED_CASE} is within the limit ({elapsed:.1f} ms <= {args.max_ms:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
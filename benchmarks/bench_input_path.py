@@ -0,0 +1,59 @@
+"""
+HTMLファイルの読み込み方法による解析時間を比較するベンチマーク
+
+1. テキスト: `open(..., encoding="utf-8")` で文字列にデコードしてから `parse_from_string` に渡す (従来の方法)
+2. バイト列: デコードせずに `parse_from_bytes` に渡す (`parse_from_file` の現在の方法)
+
+使い方:
+    uv run python benchmarks/bench_input_path.py --repeat 20
+"""
+import argparse
+import time
+import tracemalloc
+from pathlib import Path
+
+from shpsg_parser.parser_category import parse_from_bytes, parse_from_string
+
+SAMPLES_DIR = Path(__file__).parent.parent / "data" / "samples"
+
+
+def _read_text(path: Path) -> str:
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _read_bytes(path: Path) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _measure(func, repeat: int):
+    """1回あたりの平均時間 (ミリ秒) と、最大メモリ使用量 (MB) を返す"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    elapsed = (time.perf_counter() - start) / repeat * 1e3
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=10, help="計測の繰り返し回数")
+    args = parser.parse_args()
+
+    path = SAMPLES_DIR / "category_sample.html"
+    for engine in ("bs4", "lxml"):
+        text = _measure(lambda: parse_from_string(_read_text(path), engine=engine), args.repeat)
+        raw = _measure(lambda: parse_from_bytes(_read_bytes(path), engine=engine), args.repeat)
+        print(f"[{engine}]")
+        print(f"  text  (decode + parse_from_string): {text[0]:8.1f} ms/page, peak {text[1]:6.1f} MB")
+        print(f"  bytes (parse_from_bytes)          : {raw[0]:8.1f} ms/page, peak {raw[1]:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+価格・販売数・評価の数値の抽出 (`numeric`) のマイクロベンチマーク
+
+変更前の `parser_base.extract_*` (このスクリプト内に再現) と、`numeric` の関数の
+1件あたりの時間 (ns) を、境界的な入力 ("1.2k sold/month", "$1,234.50 - $2,000" など) で比較する。
+まとめて変換する関数 (`parse_prices` など) の1件あたりの時間と、変更前と結果が異なる入力も表示する。
+
+使い方:
+    uv run python benchmarks/bench_numeric.py
+    uv run python benchmarks/bench_numeric.py --number 200000
+"""
+import argparse
+import re
+import timeit
+
+from shpsg_parser.numeric import (
+    parse_price,
+    parse_prices,
+    parse_rating,
+    parse_ratings,
+    parse_sold,
+    parse_sold_counts,
+)
+
+PRICE_INPUTS = ["$1,234.50 - $2,000", "$27.25", "S$12.90", "10.00 - 20.00", "$1,999", "Price: 500", ""]
+SOLD_INPUTS = ["1.2k sold/month", "10 sold", "5.6K sold/month", "2.01M sold", "10k+ sold", "1,234 sold", "0 sold", ""]
+RATING_INPUTS = ["4.9", "5.0", "4.75", "Rating: 4.8 / 5", "no rating", ""]
+
+
+def legacy_extract_price(price_str):
+    if not price_str:
+        return 0.0
+    price_str = price_str.split('-')[0].strip()
+    match = re.search(r'[\d,.]+', price_str)
+    if match:
+        return float(match.group(0).replace(',', ''))
+    return 0.0
+
+
+def legacy_extract_sold(sold_str):
+    if not sold_str:
+        return 0
+    value_str = sold_str.lower().replace('sold/month', '').replace('sold', '').strip()
+    multiplier = 1
+    if 'k' in value_str:
+        multiplier = 1000
+        value_str = value_str.replace('k', '').strip()
+    elif 'm' in value_str:
+        multiplier = 1000000
+        value_str = value_str.replace('m', '').strip()
+    try:
+        numeric_part = re.search(r'[\d.]+', value_str)
+        if numeric_part:
+            return int(float(numeric_part.group(0)) * multiplier)
+    except (ValueError, TypeError):
+        return 0
+    return 0
+
+
+def legacy_extract_rating(rating_str):
+    if not rating_str:
+        return None
+    match = re.search(r'[\d.]+', rating_str)
+    if match:
+        try:
+            return float(match.group(0))
+        except (ValueError, TypeError):
+            return None
+    return None
+
+
+CASES = [
+    ("price", PRICE_INPUTS, legacy_extract_price, parse_price, parse_prices),
+    ("sold", SOLD_INPUTS, legacy_extract_sold, parse_sold, parse_sold_counts),
+    ("rating", RATING_INPUTS, legacy_extract_rating, parse_rating, parse_ratings),
+]
+
+
+def per_item_ns(func, inputs, number: int) -> float:
+    """`inputs` を順に変換した場合の1件あたりの時間 (ns) を返す (5回の計測の最小値)"""
+    loops = max(1, number // len(inputs))
+    best = min(timeit.repeat(lambda: [func(text) for text in inputs], number=loops, repeat=5))
+    return best / (loops * len(inputs)) * 1e9
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=100000, help="1回の計測で変換する件数")
+    args = parser.parse_args()
+
+    for name, inputs, legacy, single, batch in CASES:
+        legacy_ns = per_item_ns(legacy, inputs, args.number)
+        single_ns = per_item_ns(single, inputs, args.number)
+        batch_inputs = inputs * max(1, args.number // len(inputs))
+        batch_ns = min(timeit.repeat(lambda: batch(batch_inputs), number=1, repeat=5)) / len(batch_inputs) * 1e9
+        print(f"{name:6} | before {legacy_ns:6.0f} ns | numeric {single_ns:6.0f} ns ({legacy_ns / single_ns:4.2f}x)"
+              f" | batch {batch_ns:6.0f} ns/item")
+        for text in inputs:
+            if legacy(text) != single(text):
+                print(f"         changed: {text!r}: {legacy(text)!r} -> {single(text)!r}")
+
+
+if __name__ == "__main__":
+    main()
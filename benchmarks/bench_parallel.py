@@ -0,0 +1,55 @@
+"""
+並列解析 (`parallel.parse_files`) のスループットを計測するベンチマーク
+
+`data/samples` のHTMLファイルを一時ディレクトリに複製し、
+ワーカー数ごとの処理速度 (files/sec) を計測する。
+
+使い方:
+    uv run python benchmarks/bench_parallel.py --copies 50 --max-workers 4
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from shpsg_parser.parallel import parse_files
+from shpsg_parser.parser_category import parse_from_file as parse_from_file_category
+
+SAMPLES_DIR = Path(__file__).parent.parent / "data" / "samples"
+
+
+def _make_corpus(target_dir: Path, copies: int) -> list:
+    """カテゴリページのサンプルを指定数だけ複製する"""
+    source = SAMPLES_DIR / "category_sample.html"
+    paths = []
+    for i in range(copies):
+        path = target_dir / f"category_{i:05d}.html"
+        shutil.copyfile(source, path)
+        paths.append(path)
+    return paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--copies", type=int, default=40, help="複製するファイル数")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1, help="計測する最大ワーカー数")
+    parser.add_argument("--chunksize", type=int, default=4, help="タスク送信の単位")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = _make_corpus(Path(tmp), args.copies)
+
+        baseline = None
+        for workers in range(1, args.max_workers + 1):
+            start = time.perf_counter()
+            count = sum(1 for _ in parse_files(paths, parse_from_file_category, workers=workers, chunksize=args.chunksize))
+            elapsed = time.perf_counter() - start
+            rate = count / elapsed
+            baseline = baseline or rate
+            print(f"workers={workers:2d}  {rate:8.2f} files/sec  speedup x{rate / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+DOMの構築前の事前フィルター (`parser_base.prefilter_html`) の効果を計測するベンチマーク
+
+`data/samples` の各ページについて、エンジン (bs4 / lxml) ごとに、事前フィルターの有無で
+以下を計測する。
+
+- HTMLのサイズ (事前フィルターの適用後)
+- DOMの構築時間 (ms/page、事前フィルターの時間を含む) と、そのうち事前フィルターの時間
+- DOMの構築で増えた最大常駐メモリ (ケースごとに新しいプロセスで構築し、`resource.getrusage` で取得)
+- 解析結果が事前フィルターなしの場合と一致するか
+
+使い方:
+    uv run python benchmarks/bench_prefilter.py
+    uv run python benchmarks/bench_prefilter.py --repeat 20 --engines lxml
+"""
+import argparse
+import multiprocessing
+import resource
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from shpsg_parser import lxml_engine, parser_category, parser_product, parser_search, parser_shop
+from shpsg_parser.parser_base import make_soup, prefilter_html
+
+SAMPLES_DIR = Path(__file__).parent.parent / "data" / "samples"
+
+# サンプルページと、それを解析するパーサーのモジュール
+PAGES = {
+    "category_sample.html": parser_category,
+    "keyword_search_result_sample.html": parser_search,
+    "shop_sample.html": parser_shop,
+    "product_detail_sample.html": parser_product,
+}
+
+BUILDERS = {
+    "bs4": make_soup,
+    "lxml": lxml_engine.build_tree,
+}
+
+
+def _max_rss_mb() -> float:
+    # Linuxではキロバイト、macOSではバイト単位
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def measure_memory(case: tuple) -> float:
+    """
+    DOMを1回構築し、増えた最大常駐メモリ (MB) を返す。
+    前のケースのメモリ使用量が混ざらないよう、新しいプロセスで実行される。
+    """
+    page, engine, prefilter = case
+    html = (SAMPLES_DIR / page).read_bytes()
+    before = _max_rss_mb()
+    document = BUILDERS[engine](html, prefilter)
+    after = _max_rss_mb()
+    del document
+    return after - before
+
+
+def measure_time(html: bytes, engine: str, prefilter: bool, repeat: int) -> tuple:
+    """DOMの構築時間と、そのうち事前フィルターの時間の中央値 (ms) を返す"""
+    build = BUILDERS[engine]
+    build(html, prefilter)
+    totals, filters = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        filtered = prefilter_html(html) if prefilter else html
+        filtered_at = time.perf_counter()
+        build(filtered)
+        finished = time.perf_counter()
+        totals.append((finished - started) * 1e3)
+        filters.append((filtered_at - started) * 1e3)
+    return statistics.median(totals), statistics.median(filters)
+
+
+def same_results(page: str, engine: str) -> bool:
+    """事前フィルターの有無で解析結果が一致するかを返す"""
+    parser = PAGES[page]
+    html = (SAMPLES_DIR / page).read_bytes()
+    options = {} if parser is parser_product else {"engine": engine}
+    return parser.parse_from_string(html, **options) == parser.parse_from_string(html, prefilter=True, **options)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", nargs="+", choices=list(PAGES), default=list(PAGES), help="計測するページ")
+    parser.add_argument("--engines", nargs="+", choices=list(BUILDERS), default=list(BUILDERS), help="計測するエンジン")
+    parser.add_argument("--repeat", type=int, default=10, help="DOMの構築時間を計測する回数")
+    args = parser.parse_args()
+
+    cases = [(page, engine) for page in args.pages for engine in args.engines
+             if not (engine == "lxml" and PAGES[page] is parser_product)]
+    memory_cases = [(page, engine, prefilter) for page, engine in cases for prefilter in (False, True)]
+    with multiprocessing.get_context("spawn").Pool(1, maxtasksperchild=1) as pool:
+        memory = dict(zip(memory_cases, pool.map(measure_memory, memory_cases, chunksize=1)))
+
+    for page, engine in cases:
+        html = (SAMPLES_DIR / page).read_bytes()
+        size = len(prefilter_html(html))
+        base_ms, _ = measure_time(html, engine, False, args.repeat)
+        filtered_ms, filter_ms = measure_time(html, engine, True, args.repeat)
+        base_mb, filtered_mb = memory[(page, engine, False)], memory[(page, engine, True)]
+        print(
+            f"{page:34} {engine:4}"
+            f" | size {len(html) / 1024:6.0f} -> {size / 1024:6.0f} KB"
+            f" | tree {base_ms:7.1f} -> {filtered_ms:7.1f} ms (prefilter {filter_ms:4.1f} ms)"
+            f" | rss +{base_mb:5.1f} -> +{filtered_mb:5.1f} MB"
+            f" | same results: {same_results(page, engine)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+商品コンテナ1件あたりの要素収集時間を比較するマイクロベンチマーク
+
+`collect_item_elements` (コンパイル済みの条件で部分木を1回だけ走査) と、
+フィールドごとに `select_one` / `find` を呼び出す従来の方法を比較する。
+
+使い方:
+    uv run python benchmarks/bench_selector_plan.py --repeat 20
+"""
+import argparse
+import re
+import time
+from pathlib import Path
+
+from shpsg_parser.parser_base import make_soup
+from shpsg_parser.selector_plan import (
+    CATEGORY_ITEM_CONTAINERS,
+    collect_item_elements,
+    select_item_containers,
+)
+
+SAMPLES_DIR = Path(__file__).parent.parent / "data" / "samples"
+
+
+def _per_field_queries(container):
+    """フィールドごとにCSSセレクタや検索を実行する従来の方法"""
+    container.select_one("div.line-clamp-2")
+    container.find("a", href=True)
+    container.find("img", alt=True)
+    container.select("div.flex.items-baseline span")
+    container.select_one('img[alt="rating-star-full"]')
+    container.select_one('img[alt="rating-star"]')
+    container.find("div", string=re.compile(r"sold/month|sold", re.IGNORECASE))
+    container.select_one('img[alt="location-icon"]')
+
+
+def _measure(func, containers, repeat: int) -> float:
+    """商品コンテナ1件あたりの平均時間 (マイクロ秒) を返す"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for container in containers:
+            func(container)
+    return (time.perf_counter() - start) / (repeat * len(containers)) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=10, help="計測の繰り返し回数")
+    args = parser.parse_args()
+
+    soup = make_soup((SAMPLES_DIR / "category_sample.html").read_bytes())
+    containers = select_item_containers(soup, CATEGORY_ITEM_CONTAINERS)
+
+    legacy = _measure(_per_field_queries, containers, args.repeat)
+    planned = _measure(collect_item_elements, containers, args.repeat)
+    print(f"items per page         : {len(containers)}")
+    print(f"per-field queries      : {legacy:8.1f} us/item")
+    print(f"single-pass collection : {planned:8.1f} us/item")
+    print(f"speedup                : x{legacy / planned:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+ページタイプ判定のベンチマーク
+
+`get_page_type` (JSON-LDの確認にDOMを構築する) と、DOMを構築しない
+`sniff_page_type` / `sniff_page_type_from_file` の処理時間をサンプルページごとに比較する。
+
+使い方:
+    uv run python benchmarks/bench_sniffer.py --repeat 20
+"""
+import argparse
+import time
+from pathlib import Path
+
+from shpsg_parser.page_type_identifier import (
+    PageTypeSniffer,
+    find_page_url,
+    get_page_type,
+    sniff_page_type,
+    sniff_page_type_from_file,
+)
+
+SAMPLES_DIR = Path(__file__).parent.parent / "data" / "samples"
+
+
+def _measure(func, repeat: int) -> float:
+    """関数を繰り返し実行し、1回あたりの平均時間 (ミリ秒) を返す"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def _bytes_needed(path: Path) -> int:
+    """ストリーミング判定で判定が確定するまでに読み込んだバイト数を返す"""
+    sniffer = PageTypeSniffer()
+    with open(path, "rb") as f:
+        while not sniffer.done:
+            chunk = f.read(64 * 1024)
+            if not chunk:
+                break
+            sniffer.feed(chunk)
+    return sniffer.bytes_read
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=10, help="各計測の繰り返し回数")
+    args = parser.parse_args()
+
+    print(f"{'file':40s} {'get_page_type':>14s} {'sniff(bytes)':>13s} {'sniff(file)':>12s} {'read':>14s}")
+    for path in sorted(SAMPLES_DIR.glob("*.html")):
+        html_bytes = path.read_bytes()
+        html_content = html_bytes.decode("utf-8")
+        url = find_page_url(html_bytes)
+        # URLを持たない保存ページを想定し、ドメインだけのURLでDOMを使う判定経路を計測する
+        unknown_url = "https://shopee.sg/"
+
+        assert sniff_page_type_from_file(str(path)) == sniff_page_type(html_bytes, url)
+
+        t_full = _measure(lambda: get_page_type(html_content, unknown_url), args.repeat)
+        t_bytes = _measure(lambda: sniff_page_type(html_bytes), args.repeat)
+        t_file = _measure(lambda: sniff_page_type_from_file(str(path)), args.repeat)
+        read = f"{_bytes_needed(path)}/{len(html_bytes)}"
+        print(f"{path.name:40s} {t_full:11.2f} ms {t_bytes:10.2f} ms {t_file:9.2f} ms {read:>14s}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+streamエンジン (`stream_engine`) とlxmlエンジンを、最初のアイテムまでの時間と最大メモリで比較するベンチマーク
+
+`bench_suite.py` と同じ方法で商品数の異なるページを合成してファイルに保存し、
+一覧ページのパーサー (category / search / shop) とエンジンの組み合わせごとに、以下を計測する。
+
+- 最初のアイテムが得られるまでの時間 (lxmlエンジンはページ全体を解析し終えるまで返さない)
+- ページ全体の解析時間
+- 最大常駐メモリの増加量 (ケースごとに新しいプロセスで実行し、`/proc/self/status` の `VmHWM` で取得)
+
+使い方:
+    uv run python benchmarks/bench_stream.py
+    uv run python benchmarks/bench_stream.py --parsers search --item-counts 60 960 3840
+"""
+import argparse
+import multiprocessing
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+from bench_suite import PARSERS as SUITE_PARSERS, SAMPLES_DIR, make_page
+
+from shpsg_parser import lxml_engine, stream_engine
+from shpsg_parser.discovery import open_html
+
+# パーサーごとの、lxmlエンジンとstreamエンジンの解析関数
+PARSERS = {
+    "category": (lxml_engine.parse_category_document, stream_engine.iter_category_items),
+    "search": (lxml_engine.parse_search_tree, stream_engine.iter_search_items),
+    "shop": (lxml_engine.parse_shop_tree, stream_engine.iter_shop_items),
+}
+
+
+def _reset_max_rss() -> None:
+    # 子プロセスは親プロセスの最大常駐メモリを引き継ぐため、Linuxではリセットする
+    try:
+        Path("/proc/self/clear_refs").write_text("5")
+    except OSError:
+        pass
+
+
+def _max_rss_mb() -> float:
+    try:
+        status = Path("/proc/self/status").read_text()
+    except OSError:
+        # macOSではバイト単位
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024)
+    peak_rss = next(line.split()[1] for line in status.splitlines() if line.startswith("VmHWM:"))
+    return int(peak_rss) / 1024
+
+
+def run_case(case: dict) -> dict:
+    """
+    1ケースを計測して結果を返す。
+    最大常駐メモリをケースごとに計測するため、新しいプロセスで実行される。
+    """
+    parse_tree, iter_items = PARSERS[case["parser"]]
+    _reset_max_rss()
+    before = _max_rss_mb()
+    started = time.perf_counter()
+    if case["engine"] == "lxml":
+        with open_html(case["path"]) as f:
+            items = parse_tree(lxml_engine.build_tree(f.read()))
+        first_item = time.perf_counter()
+        item_count = len(items)
+    else:
+        items = iter_items(stream_engine.iter_file_chunks(case["path"]))
+        next(items)
+        first_item = time.perf_counter()
+        item_count = 1 + sum(1 for _ in items)
+    finished = time.perf_counter()
+    return {
+        **case,
+        "items": item_count,
+        "first_item_ms": (first_item - started) * 1e3,
+        "total_ms": (finished - started) * 1e3,
+        "rss_increase_mb": _max_rss_mb() - before,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--parsers", nargs="+", choices=list(PARSERS), default=list(PARSERS), help="計測するパーサー")
+    parser.add_argument("--item-counts", nargs="+", type=int, default=[60, 240, 960], help="合成するページの商品数")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cases = []
+        for name in args.parsers:
+            spec = SUITE_PARSERS[name]
+            sample = (SAMPLES_DIR / spec["sample"]).read_bytes()
+            for item_count in args.item_counts:
+                path = Path(tmp_dir) / f"{name}_{item_count}.html"
+                path.write_bytes(make_page(sample, spec["containers"], item_count))
+                cases.extend({"parser": name, "engine": engine, "path": str(path)} for engine in ("lxml", "stream"))
+
+        # ケースごとに新しいプロセスを起動し、前のケースのメモリ使用量が混ざらないようにする
+        with multiprocessing.get_context("spawn").Pool(1, maxtasksperchild=1) as pool:
+            for result in pool.imap(run_case, cases):
+                size_mb = Path(result["path"]).stat().st_size / (1024 * 1024)
+                print(
+                    f"{result['parser']:8} {result['engine']:6} {result['items']:5d} items ({size_mb:5.1f} MB)"
+                    f" | first item {result['first_item_ms']:8.1f} ms | total {result['total_ms']:8.1f} ms"
+                    f" | rss +{result['rss_increase_mb']:6.1f} MB"
+                )
+
+
+if __name__ == "__main__":
+    main()
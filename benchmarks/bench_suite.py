@@ -0,0 +1,244 @@
+"""
+全パーサーを対象に、合成したコーパスで処理性能を計測するベンチマークスイート
+
+`data/samples` のページの商品コンテナを複製・削除して商品数の異なるページを生成し、
+パーサー (category / search / shop / product) とエンジン (bs4 / lxml) の組み合わせごとに
+以下を計測する。商品詳細ページは1ページ1商品のため、商品数は変えずに計測する。
+
+- pages/sec, items/sec
+- 最大常駐メモリ (ケースごとに新しいプロセスで実行し、`resource.getrusage` で取得)
+- 段階ごとの時間 (ms/page): read (ファイルの読み込み), tree (DOMの構築),
+  extract (`validate=False` での抽出), validate (`validate_items`), serialize (ライターでの書き出し)
+
+結果はJSONに保存でき、保存済みのベースラインと比較して性能の低下を検出できる。
+
+使い方:
+    uv run python benchmarks/bench_suite.py --pages 20
+    uv run python benchmarks/bench_suite.py --save-baseline benchmarks/baseline.json
+    uv run python benchmarks/bench_suite.py --compare benchmarks/baseline.json --tolerance 0.2
+"""
+import argparse
+import copy
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from lxml import html as lxml_html
+
+from shpsg_parser import lxml_engine, parser_category, parser_product, parser_search, parser_shop
+from shpsg_parser.discovery import open_html
+from shpsg_parser.models import ProductBasicItem
+from shpsg_parser.models_product import ProductDetailItem
+from shpsg_parser.parser_base import make_soup, validate_items
+from shpsg_parser.writers import open_writer
+
+SAMPLES_DIR = Path(__file__).parent.parent / "data" / "samples"
+
+STAGES = ("read", "tree", "extract", "validate", "serialize")
+
+# パーサーごとのサンプル・商品コンテナ・段階ごとの抽出関数
+PARSERS = {
+    "category": {
+        "sample": "category_sample.html",
+        "containers": lxml_engine._CATEGORY_CONTAINERS,
+        "bs4": lambda soup: parser_category.parse_from_soup(soup, validate=False),
+        "lxml": lambda tree: lxml_engine.parse_category_document(tree, validate=False),
+        "model": ProductBasicItem,
+    },
+    "search": {
+        "sample": "keyword_search_result_sample.html",
+        "containers": lxml_engine._SEARCH_CONTAINERS,
+        "bs4": lambda soup: parser_search.parse_from_soup(soup, validate=False),
+        "lxml": lambda tree: lxml_engine.parse_search_tree(tree, validate=False),
+        "model": ProductBasicItem,
+    },
+    "shop": {
+        "sample": "shop_sample.html",
+        "containers": lxml_engine._SHOP_CONTAINERS,
+        "bs4": lambda soup: parser_shop.parse_from_soup(soup, validate=False),
+        "lxml": lambda tree: lxml_engine.parse_shop_tree(tree, validate=False),
+        "model": ProductBasicItem,
+    },
+    "product": {
+        "sample": "product_detail_sample.html",
+        "containers": None,
+        # 商品詳細ページのパーサーは検証を省略できないため、extractに検証の時間が含まれる
+        "bs4": lambda soup: [item] if (item := parser_product.parse_from_soup(soup)) else [],
+        "model": ProductDetailItem,
+    },
+}
+
+
+def make_page(sample: bytes, containers, item_count: int) -> bytes:
+    """サンプルページの商品コンテナを複製・削除し、商品数が `item_count` のページを生成する"""
+    tree = lxml_engine.build_tree(sample)
+    originals = containers(tree)
+    parent = originals[0].getparent()
+    position = parent.index(originals[0])
+    for container in originals:
+        parent.remove(container)
+    for i in range(item_count):
+        parent.insert(position + i, copy.deepcopy(originals[i % len(originals)]))
+    return lxml_html.tostring(tree.getroottree(), encoding="utf-8")
+
+
+def run_case(case: dict) -> dict:
+    """
+    1ケースを計測して結果を返す。
+    最大常駐メモリをケースごとに計測するため、新しいプロセスで実行される。
+    """
+    spec = PARSERS[case["parser"]]
+    engine = case["engine"]
+    build = make_soup if engine == "bs4" else lxml_engine.build_tree
+    extract = spec[engine]
+    stages = dict.fromkeys(STAGES, 0.0)
+    items_total = 0
+
+    # 初回のみのコスト (セレクタのコンパイルや検証器の生成など) を計測から除く
+    validate_items(extract(build(case["html"])))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        page_path = Path(tmp_dir) / "page.html"
+        page_path.write_bytes(case["html"])
+        with open_writer(Path(tmp_dir) / f"out.{case['format']}", spec["model"], case["format"]) as writer:
+            for _ in range(case["pages"]):
+                t0 = time.perf_counter()
+                with open_html(page_path) as f:
+                    html_bytes = f.read()
+                t1 = time.perf_counter()
+                document = build(html_bytes)
+                t2 = time.perf_counter()
+                items = extract(document)
+                t3 = time.perf_counter()
+                if case["parser"] != "product":
+                    items = validate_items(items)
+                t4 = time.perf_counter()
+                writer.write_many(items)
+                writer.flush()
+                t5 = time.perf_counter()
+
+                for stage, elapsed in zip(STAGES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t5 - t4)):
+                    stages[stage] += elapsed
+                items_total += len(items)
+
+    total = sum(stages.values())
+    # Linuxではキロバイト、macOSではバイト単位
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "parser": case["parser"],
+        "engine": engine,
+        "items_per_page": items_total // case["pages"],
+        "pages": case["pages"],
+        "pages_per_sec": case["pages"] / total,
+        "items_per_sec": items_total / total,
+        "peak_rss_mb": peak_rss / (1024 * 1024 if sys.platform == "darwin" else 1024),
+        "stages_ms": {stage: elapsed / case["pages"] * 1e3 for stage, elapsed in stages.items()},
+    }
+
+
+def build_cases(parsers, engines, item_counts, pages: int, output_format: str):
+    """計測するケース (合成したページを含む) を生成する"""
+    for name in parsers:
+        spec = PARSERS[name]
+        sample = (SAMPLES_DIR / spec["sample"]).read_bytes()
+        counts = item_counts if spec["containers"] is not None else [None]
+        for item_count in counts:
+            html = sample if item_count is None else make_page(sample, spec["containers"], item_count)
+            for engine in engines:
+                if engine not in spec:
+                    continue
+                yield {"parser": name, "engine": engine, "html": html, "pages": pages, "format": output_format}
+
+
+def _key(result: dict) -> tuple:
+    return result["parser"], result["engine"], result["items_per_page"]
+
+
+def compare(results, baseline, tolerance: float) -> list:
+    """ベースラインと比較し、許容範囲を超えて悪化した項目の説明のリストを返す"""
+    baseline_by_key = {_key(r): r for r in baseline["results"]}
+    regressions = []
+    for result in results:
+        base = baseline_by_key.get(_key(result))
+        if base is None:
+            continue
+        label = "{}/{}/{} items".format(*_key(result))
+        for metric in ("pages_per_sec", "items_per_sec"):
+            if result[metric] < base[metric] * (1 - tolerance):
+                regressions.append(f"{label}: {metric} {base[metric]:,.1f} -> {result[metric]:,.1f}")
+        if result["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(f"{label}: peak_rss_mb {base['peak_rss_mb']:.1f} -> {result['peak_rss_mb']:.1f}")
+    return regressions
+
+
+def _print_result(result: dict, base=None) -> None:
+    stages = " ".join(f"{stage}={result['stages_ms'][stage]:7.1f}" for stage in STAGES)
+    line = (
+        f"{result['parser']:8} {result['engine']:4} {result['items_per_page']:4d} items"
+        f" | {result['pages_per_sec']:7.2f} pages/s {result['items_per_sec']:9,.0f} items/s"
+        f" | rss {result['peak_rss_mb']:6.1f} MB | ms/page {stages}"
+    )
+    if base is not None:
+        line += f" | vs baseline {result['pages_per_sec'] / base['pages_per_sec'] - 1:+.0%}"
+    print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--parsers", nargs="+", choices=list(PARSERS), default=list(PARSERS), help="計測するパーサー")
+    parser.add_argument("--engines", nargs="+", choices=["bs4", "lxml"], default=["bs4", "lxml"], help="計測するエンジン")
+    parser.add_argument("--item-counts", nargs="+", type=int, default=[15, 60, 240], help="合成するページの商品数")
+    parser.add_argument("--pages", type=int, default=10, help="1ケースあたりに解析するページ数")
+    parser.add_argument("--format", default="csv", choices=["csv", "ndjson", "sqlite", "parquet"], help="serializeで使用する出力形式")
+    parser.add_argument("--output", type=Path, help="結果を保存するJSONファイル")
+    parser.add_argument("--save-baseline", type=Path, help="結果をベースラインとして保存するJSONファイル")
+    parser.add_argument("--compare", type=Path, help="比較するベースラインのJSONファイル")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="性能の低下として扱う変化率 (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    baseline_by_key = {_key(r): r for r in baseline["results"]} if baseline else {}
+
+    results = []
+    cases = build_cases(args.parsers, args.engines, args.item_counts, args.pages, args.format)
+    # ケースごとに新しいプロセスを起動し、前のケースのメモリ使用量が混ざらないようにする
+    with multiprocessing.get_context("spawn").Pool(1, maxtasksperchild=1) as pool:
+        for result in pool.imap(run_case, cases):
+            _print_result(result, baseline_by_key.get(_key(result)))
+            results.append(result)
+
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": results,
+    }
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"Saved results to {path}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"Performance regressions (tolerance {args.tolerance:.0%}):")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print(f"No regressions against {args.compare} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
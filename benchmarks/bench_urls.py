@@ -0,0 +1,126 @@
+"""
+URLの正規化 (`to_absolute_url` / `to_absolute_image_url`) と検証 (`to_http_url`) のキャッシュの効果を計測するベンチマーク
+
+`data/samples` の一覧ページから以下を計測する。
+
+- URLの正規化: ページ内のリンクと画像のURLについて、urljoinのみ (変更前の処理)、
+  キャッシュなしの高速な経路、キャッシュありの1件あたりの時間 (us)。
+  リンクはサンプルでは絶対URLのため、"/{商品名}-i.{shop_id}.{item_id}" の相対パスに変換したものも計測する。
+- アイテムの検証: URLを文字列のまま渡す場合と、検証済みの `HttpUrl` を渡す場合 (`build_item`) の1件あたりの時間 (us)
+- ページ全体の解析時間 (ms/page): キャッシュを毎回空にする場合と、キャッシュが効いている場合
+
+使い方:
+    uv run python benchmarks/bench_urls.py
+    uv run python benchmarks/bench_urls.py --repeat 50
+"""
+import argparse
+import dataclasses
+import statistics
+import time
+from pathlib import Path
+from urllib.parse import urljoin
+
+from shpsg_parser import lxml_engine, parser_category, parser_search, parser_shop
+from shpsg_parser.models import ProductBasicItem
+from shpsg_parser.parser_base import BASE_URL, build_item, to_absolute_image_url, to_absolute_url, to_http_url
+
+SAMPLES_DIR = Path(__file__).parent.parent / "data" / "samples"
+
+# サンプルページと、それを解析するパーサーのモジュール
+PAGES = {
+    "category_sample.html": parser_category,
+    "keyword_search_result_sample.html": parser_search,
+    "shop_sample.html": parser_shop,
+}
+
+CACHED_FUNCTIONS = (to_absolute_url, to_absolute_image_url, to_http_url)
+
+
+def clear_caches() -> None:
+    for func in CACHED_FUNCTIONS:
+        func.cache_clear()
+
+
+def urljoin_only(url: str) -> str:
+    """変更前の `to_absolute_url` と同じ処理"""
+    if not url or url.startswith("http"):
+        return url
+    return urljoin(BASE_URL, url)
+
+
+def per_call_us(func, values: list, repeat: int) -> float:
+    """`values` を順に処理した場合の1件あたりの時間の中央値 (us) を返す"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for value in values:
+            func(value)
+        timings.append((time.perf_counter() - started) / len(values) * 1e6)
+    return statistics.median(timings)
+
+
+def collect_urls() -> tuple:
+    """サンプルページ内のリンクと画像のURLを返す"""
+    hrefs, srcs = [], []
+    for page in PAGES:
+        tree = lxml_engine.build_tree((SAMPLES_DIR / page).read_bytes())
+        hrefs.extend(tree.xpath("//a/@href"))
+        srcs.extend(tree.xpath("//img/@src"))
+    return [str(h) for h in hrefs], [str(s) for s in srcs]
+
+
+def collect_item_data() -> list:
+    """サンプルページのアイテムを、`build_item` に渡す辞書として返す"""
+    data = []
+    for page, parser in PAGES.items():
+        for record in parser.parse_from_bytes((SAMPLES_DIR / page).read_bytes(), engine="lxml", validate=False):
+            data.append(dataclasses.asdict(record))
+    return data
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20, help="計測を繰り返す回数")
+    args = parser.parse_args()
+
+    hrefs, srcs = collect_urls()
+    product_paths = [h[len(BASE_URL):] for h in hrefs if h.startswith(BASE_URL) and "-i." in h]
+    print(f"links {len(hrefs)} ({len(set(hrefs))} unique), images {len(srcs)} ({len(set(srcs))} unique), "
+          f"relative product paths {len(product_paths)}")
+
+    cases = [
+        ("to_absolute_url (links)", hrefs, urljoin_only, to_absolute_url),
+        ("to_absolute_url (relative)", product_paths, urljoin_only, to_absolute_url),
+        ("to_absolute_image_url", srcs, to_absolute_image_url.__wrapped__, to_absolute_image_url),
+    ]
+    for name, values, before, cached in cases:
+        before_us = per_call_us(before, values, args.repeat)
+        uncached_us = per_call_us(cached.__wrapped__, values, args.repeat)
+        clear_caches()
+        cached(values[0])
+        cached_us = per_call_us(cached, values, args.repeat)
+        print(f"{name:28} | before {before_us:6.2f} us | no cache {uncached_us:6.2f} us | cached {cached_us:6.2f} us")
+
+    data = collect_item_data()
+    plain_us = per_call_us(lambda d: ProductBasicItem(**d), data, args.repeat)
+    prevalidated_us = per_call_us(lambda d: build_item(ProductBasicItem, d), data, args.repeat)
+    print(f"{'validate item':28} | str urls {plain_us:6.2f} us | prevalidated (cached) {prevalidated_us:6.2f} us")
+
+    for page, page_parser in PAGES.items():
+        html = (SAMPLES_DIR / page).read_bytes()
+        for engine in ("bs4", "lxml"):
+            cold, warm = [], []
+            for _ in range(args.repeat):
+                clear_caches()
+                started = time.perf_counter()
+                page_parser.parse_from_bytes(html, engine=engine)
+                cold.append((time.perf_counter() - started) * 1e3)
+                started = time.perf_counter()
+                page_parser.parse_from_bytes(html, engine=engine)
+                warm.append((time.perf_counter() - started) * 1e3)
+            print(f"{page:34} {engine:4} | cold cache {statistics.median(cold):7.2f} ms"
+                  f" | warm cache {statistics.median(warm):7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Pydanticの検証の有無による処理速度 (items/sec) を比較するベンチマーク
+
+1. アイテムの生成のみ: 抽出済みの辞書から `ProductBasicItem` を生成する時間
+2. ページ全体: `parse_from_bytes` (lxmlエンジン) でページを解析する時間
+
+使い方:
+    uv run python benchmarks/bench_validation.py --repeat 20
+"""
+import argparse
+import time
+from pathlib import Path
+
+from shpsg_parser.models import ProductBasicItem
+from shpsg_parser.parser_base import build_item, validate_items
+from shpsg_parser.parser_category import parse_from_bytes
+
+SAMPLES_DIR = Path(__file__).parent.parent / "data" / "samples"
+
+
+def _rate(func, items_per_call: int, repeat: int) -> float:
+    """関数を繰り返し実行し、items/sec を返す"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return items_per_call * repeat / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=10, help="計測の繰り返し回数")
+    args = parser.parse_args()
+
+    html_bytes = (SAMPLES_DIR / "category_sample.html").read_bytes()
+    items = parse_from_bytes(html_bytes, engine="lxml")
+    records = [item.model_dump(mode="json", exclude_defaults=True) for item in items]
+    n = len(records)
+    repeat = args.repeat * 50
+
+    print(f"[item construction: {n} items x {repeat}]")
+    validated = _rate(lambda: [build_item(ProductBasicItem, r) for r in records], n, repeat)
+    trusted = _rate(lambda: [build_item(ProductBasicItem, r, validate=False) for r in records], n, repeat)
+    deferred = _rate(
+        lambda: validate_items([build_item(ProductBasicItem, r, validate=False) for r in records]), n, repeat
+    )
+    print(f"  validate=True                 : {validated:12,.0f} items/sec")
+    print(f"  validate=False                : {trusted:12,.0f} items/sec")
+    print(f"  validate=False + validate_items: {deferred:12,.0f} items/sec")
+
+    print(f"[whole page (lxml engine): {n} items x {args.repeat}]")
+    page_validated = _rate(lambda: parse_from_bytes(html_bytes, engine="lxml"), n, args.repeat)
+    page_trusted = _rate(lambda: parse_from_bytes(html_bytes, engine="lxml", validate=False), n, args.repeat)
+    print(f"  validate=True                 : {page_validated:12,.0f} items/sec")
+    print(f"  validate=False                : {page_trusted:12,.0f} items/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+出力形式ごとの書き出し速度 (items/sec) を比較するベンチマーク
+
+カテゴリページのサンプルから抽出したアイテムを `--items` 件になるまで複製し
+(SQLiteでは主キーが重複しないよう商品URLを書き換える)、各ライターで書き出す時間を計測する。
+
+使い方:
+    uv run python benchmarks/bench_writers.py --items 200000
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from shpsg_parser.models import ProductBasicItem
+from shpsg_parser.parser_category import parse_from_bytes
+from shpsg_parser.writers import WRITERS, open_writer
+
+SAMPLES_DIR = Path(__file__).parent.parent / "data" / "samples"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=100_000, help="書き出すアイテム数")
+    parser.add_argument("--batch-size", type=int, default=500, help="1回の書き込みでまとめて出力する件数")
+    args = parser.parse_args()
+
+    html_bytes = (SAMPLES_DIR / "category_sample.html").read_bytes()
+    page = parse_from_bytes(html_bytes, engine="lxml", validate=False)
+    items = []
+    for i in range(args.items):
+        item = page[i % len(page)]
+        items.append(type(item)(**{**{name: getattr(item, name) for name in item.__slots__},
+                                   "product_url": f"{item.product_url}?n={i}"}))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for output_format in WRITERS:
+            path = Path(tmp_dir) / f"out.{output_format}"
+            start = time.perf_counter()
+            with open_writer(path, ProductBasicItem, output_format, batch_size=args.batch_size) as writer:
+                writer.write_many(items)
+            elapsed = time.perf_counter() - start
+            print(f"{output_format:7s}: {len(items) / elapsed:12,.0f} items/sec ({path.stat().st_size / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
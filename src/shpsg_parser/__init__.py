@@ -1,9 +1,54 @@
 # shpsg_parser パッケージ
-from .parser_category import parse_from_file, parse_from_string
-from .models import ProductBasicItem
+# 公開する名前は初回のアクセス時にインポートする
+# (CLIやサブモジュールだけを使う場合に、BeautifulSoupやPydanticの読み込みを待たずに済む)
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+# 公開する名前と、それを定義するモジュールの対応表
+_EXPORTS = {
+    "parse_from_file": ".parser_category",
+    "parse_from_string": ".parser_category",
+    "parse_from_bytes": ".parser_category",
+    "parse_from_soup": ".parser_category",
+    "iter_from_file": ".parser_category",
+    "iter_from_string": ".parser_category",
+    "make_soup": ".parser_base",
+    "ProductBasicItem": ".models",
+}
 
 __all__ = [
     "parse_from_file",
     "parse_from_string",
+    "parse_from_bytes",
+    "parse_from_soup",
+    "iter_from_file",
+    "iter_from_string",
+    "make_soup",
     "ProductBasicItem",
 ]
+
+if TYPE_CHECKING:
+    from .models import ProductBasicItem
+    from .parser_base import make_soup
+    from .parser_category import (
+        iter_from_file,
+        iter_from_string,
+        parse_from_bytes,
+        parse_from_file,
+        parse_from_soup,
+        parse_from_string,
+    )
+
+
+def __getattr__(name: str) -> Any:
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    # 2回目以降は通常の属性として参照される
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,174 @@
+"""
+asyncioのアプリケーション (FastAPIなど) からHTMLを解析するための非同期API
+
+パーサーはCPUを使う同期処理のため、イベントループ上で直接呼び出すと他のリクエストの処理が
+止まってしまう。このモジュールの関数は解析をエグゼキューターへ渡し、完了を待つ間は
+イベントループを解放する。
+
+- エグゼキューターを省略した場合はイベントループの既定のスレッドプールを使用する。
+  CPUを使う解析を並列に実行するには、`ProcessPoolExecutor` を渡す
+  (アプリケーションの起動時に作成し、リクエスト間で共有する)。
+- 複数のドキュメントを解析する場合、同時にエグゼキューターへ渡すドキュメント数を
+  `concurrency` 件までに制限し、空きができた時点で次のドキュメントを入力から読み込む
+  (入力が非同期イテレーターであれば、解析が追いつかない間は読み込みが待たされる)。
+  同期的なイテレーター (`discovery.discover_files` など) は、リストとタプルを除き、
+  イベントループを止めないよう既定のスレッドプールで1件ずつ読み込む。
+- 呼び出し元のタスクがキャンセルされた場合や、ストリームを途中で閉じた場合は、
+  まだ開始していない解析をキャンセルする (実行中の解析は完了まで続くが、結果は破棄される)。
+
+使用例:
+    executor = ProcessPoolExecutor(max_workers=4)
+
+    @app.post("/parse")
+    async def parse(file: UploadFile):
+        return await aparse_from_bytes(await file.read(), executor=executor)
+"""
+import asyncio
+import collections
+import functools
+from concurrent.futures import Executor
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Deque, Iterable, List, Optional, Union
+
+from .archives import ArchiveDocument, parse_document
+from .parallel import FileResult, parse_task
+
+# 同時にエグゼキューターへ渡すドキュメント数の既定値
+DEFAULT_CONCURRENCY = 4
+
+# 解析するドキュメント (バイト列・文字列の場合は "<document N>" という名前が付けられる)
+DocumentInput = Union[ArchiveDocument, bytes, str]
+
+
+async def aparse_from_bytes(
+    html_content: Union[bytes, str],
+    parse_from_string: Optional[Callable[..., Any]] = None,
+    *,
+    url: Optional[str] = None,
+    executor: Optional[Executor] = None,
+    **options,
+) -> Any:
+    """
+    HTMLをエグゼキューターで解析し、パーサーの戻り値を返す。
+    解析中の例外は呼び出し元へそのまま送出される。
+
+    Args:
+        html_content: 解析するHTML。
+        parse_from_string: 使用するパーサーの `parse_from_string` 関数。
+            省略した場合はページタイプを自動判定する (`url` があれば判定に使用する)。
+            `ProcessPoolExecutor` を使う場合は、モジュールのトップレベル関数である必要がある。
+        url: ページのURL。
+        executor: 解析を実行するエグゼキューター。省略した場合はイベントループの既定のスレッドプール。
+        options: パーサーに渡すオプション (`engine`, `validate` など)。
+    """
+    document = ArchiveDocument(name="<document>", content=html_content, url=url)
+    parse_func = functools.partial(parse_document, document, parse_from_string, **options)
+    return await asyncio.get_running_loop().run_in_executor(executor, parse_func)
+
+
+# 同期的なイテレーターの終了を表す値
+_END = object()
+
+
+async def _aiter(documents: Union[Iterable[DocumentInput], AsyncIterable[DocumentInput]]) -> AsyncIterator[DocumentInput]:
+    """
+    入力を非同期イテレーターとして返す。
+    同期的なイテレーターは読み込みでブロックする可能性があるため、次の要素を既定のスレッドプールで取り出す
+    (ワーカーへ送れないイテレーターもあるため、解析に使うエグゼキューターは使用しない)。
+    """
+    if isinstance(documents, AsyncIterable):
+        async for document in documents:
+            yield document
+    elif isinstance(documents, (list, tuple)):
+        for document in documents:
+            yield document
+    else:
+        loop = asyncio.get_running_loop()
+        iterator = iter(documents)
+        while (document := await loop.run_in_executor(None, next, iterator, _END)) is not _END:
+            yield document
+
+
+def _as_document(document: DocumentInput, index: int) -> ArchiveDocument:
+    if isinstance(document, ArchiveDocument):
+        return document
+    return ArchiveDocument(name=f"<document {index}>", content=document)
+
+
+async def aparse_stream(
+    documents: Union[Iterable[DocumentInput], AsyncIterable[DocumentInput]],
+    parse_from_string: Optional[Callable[..., Any]] = None,
+    *,
+    executor: Optional[Executor] = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    ordered: bool = False,
+    **options,
+) -> AsyncIterator[FileResult]:
+    """
+    ドキュメントの列を解析し、ドキュメントごとの結果を解析が完了した順に返す非同期ジェネレーター。
+    解析中の例外はドキュメント単位で捕捉され、`FileResult.error` に設定される。
+
+    途中で反復をやめる場合は、未開始の解析がキャンセルされるよう `contextlib.aclosing` で閉じる。
+
+    Args:
+        documents: ドキュメント (`ArchiveDocument`、またはHTMLのバイト列・文字列) の列、
+            または非同期イテレーター。
+        parse_from_string, executor, options: `aparse_from_bytes` と同じ。
+        concurrency: 同時にエグゼキューターへ渡すドキュメント数の上限。
+        ordered: Trueの場合は入力順に結果を返す。
+    """
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be at least 1: {concurrency}")
+    loop = asyncio.get_running_loop()
+    parse_func = functools.partial(parse_document, parse_from_string=parse_from_string, **options)
+    source = _aiter(documents)
+    # 入力順に並べた実行中の解析
+    pending: Deque[asyncio.Future] = collections.deque()
+    index = 0
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(pending) < concurrency:
+                try:
+                    document = _as_document(await anext(source), index)
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                index += 1
+                task = (parse_func, document, document.name, False)
+                pending.append(loop.run_in_executor(executor, parse_task, task))
+            if not pending:
+                return
+
+            if ordered:
+                await asyncio.wait([pending[0]])
+                future = pending[0]
+            else:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                future = next(f for f in pending if f in done)
+            pending.remove(future)
+            yield future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+        await source.aclose()
+
+
+async def aparse_many(
+    documents: Union[Iterable[DocumentInput], AsyncIterable[DocumentInput]],
+    parse_from_string: Optional[Callable[..., Any]] = None,
+    *,
+    executor: Optional[Executor] = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+    **options,
+) -> List[FileResult]:
+    """
+    ドキュメントの列を解析し、ドキュメントごとの結果を入力順のリストで返す。
+    引数は `aparse_stream` と同じ。
+    """
+    stream = aparse_stream(
+        documents, parse_from_string, executor=executor, concurrency=concurrency, ordered=True, **options
+    )
+    try:
+        return [result async for result in stream]
+    finally:
+        await stream.aclose()
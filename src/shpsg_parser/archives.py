@@ -0,0 +1,255 @@
+"""
+tar / zip / WARC アーカイブに格納されたHTMLを、展開せずに読み込むモジュール
+
+アーカイブを先頭から1回だけ読み進めながら、HTMLのメンバー (WARCではレスポンスレコード) を
+`ArchiveDocument` として順次返す。ドキュメントは `parallel.parse_documents` でワーカーへ
+直接渡せるため、ディスクへの展開や、ワーカーごとにアーカイブを開き直す必要がない。
+"""
+import gzip
+import pathlib
+import tarfile
+import zipfile
+import zlib
+from dataclasses import dataclass
+from typing import IO, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .discovery import DEFAULT_INCLUDE, decompress_html, matches_patterns, open_html
+
+# WARCとして読み込むファイルの拡張子
+WARC_SUFFIXES = (".warc", ".warc.gz", ".warc.zst")
+
+# zipとして読み込むファイルの拡張子
+ZIP_SUFFIXES = (".zip",)
+
+# WARCのレコードのうち、HTMLを含む可能性のある種類
+_WARC_HTML_RECORD_TYPES = ("response", "resource")
+
+# 壊れたアーカイブを読み込んだ場合に発生する例外
+ARCHIVE_ERRORS = (OSError, EOFError, ValueError, zlib.error, zipfile.BadZipFile, tarfile.TarError)
+
+
+@dataclass
+class ArchiveDocument:
+    """
+    アーカイブから読み込んだ1件のHTMLドキュメント。
+    `name` は "<アーカイブのパス>::<メンバー名またはURL>" の形式で、エラーの報告などに使用する。
+    """
+    name: str
+    content: bytes
+    url: Optional[str] = None
+
+
+def _read_headers(stream: IO[bytes]) -> Dict[str, str]:
+    """空行までのヘッダーを読み込み、小文字の名前をキーとする辞書を返す"""
+    headers = {}
+    for line in iter(stream.readline, b""):
+        line = line.rstrip(b"\r\n")
+        if not line:
+            break
+        name, _, value = line.decode("utf-8", "replace").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    return headers
+
+
+def _dechunk(body: bytes) -> bytes:
+    """chunked転送エンコーディングの本文を結合する"""
+    chunks = []
+    pos = 0
+    while pos < len(body):
+        line_end = body.find(b"\r\n", pos)
+        if line_end < 0:
+            break
+        size = int(body[pos:line_end].split(b";")[0].strip() or b"0", 16)
+        if size == 0:
+            break
+        chunks.append(body[line_end + 2:line_end + 2 + size])
+        pos = line_end + 2 + size + 2
+    return b"".join(chunks)
+
+
+def _split_http_response(block: bytes) -> Tuple[Dict[str, str], bytes]:
+    """WARCのレスポンスレコードの内容を、HTTPヘッダーと (デコード済みの) 本文に分ける"""
+    head, _, body = block.partition(b"\r\n\r\n")
+    headers = {}
+    for line in head.split(b"\r\n")[1:]:
+        name, _, value = line.decode("utf-8", "replace").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        body = _dechunk(body)
+    encoding = headers.get("content-encoding", "").lower()
+    if encoding in ("gzip", "x-gzip"):
+        body = gzip.decompress(body)
+    elif encoding == "deflate":
+        body = zlib.decompress(body)
+    return headers, body
+
+
+def _next_warc_record(stream: IO[bytes], path: Union[str, pathlib.Path]) -> bytes:
+    """
+    次のレコードの先頭行 ("WARC/..." の行) を返す。ファイルの末尾に達した場合は空のバイト列を返す。
+
+    Raises:
+        ValueError: レコードの先頭行がWARCのヘッダーでない場合。
+    """
+    for line in iter(stream.readline, b""):
+        if not line.strip():
+            continue
+        if not line.startswith(b"WARC/"):
+            raise ValueError(f"Invalid WARC record header in {path}: {line[:50]!r}")
+        return line
+    return b""
+
+
+def _iter_warc_records(stream: IO[bytes], path: Union[str, pathlib.Path], line: bytes) -> Iterator[Tuple[Dict[str, str], bytes]]:
+    """先頭行を読み込み済みのレコードから順に、レコードのヘッダーと内容を返す"""
+    while line:
+        headers = _read_headers(stream)
+        yield headers, stream.read(int(headers.get("content-length", "0")))
+        line = _next_warc_record(stream, path)
+
+
+def _iter_warc_documents(stream: IO[bytes], path: Union[str, pathlib.Path], line: bytes) -> Iterator[ArchiveDocument]:
+    """開いたWARCファイルのHTMLのレスポンスを順次返し、終了時にファイルを閉じる"""
+    with stream:
+        for headers, block in _iter_warc_records(stream, path, line):
+            if headers.get("warc-type") not in _WARC_HTML_RECORD_TYPES:
+                continue
+
+            url = headers.get("warc-target-uri", "").strip("<>") or None
+            if headers.get("warc-type") == "response":
+                http_headers, content = _split_http_response(block)
+                content_type = http_headers.get("content-type", "text/html")
+            else:
+                content = block
+                content_type = headers.get("content-type", "text/html")
+            if "html" not in content_type.lower():
+                continue
+            yield ArchiveDocument(name=f"{path}::{url}", content=content, url=url)
+
+
+def iter_warc(path: Union[str, pathlib.Path]) -> Iterator[ArchiveDocument]:
+    """
+    WARCファイル (`.warc`, `.warc.gz`, `.warc.zst`) のHTMLのレスポンスを順次返す。
+    ドキュメントの `url` にはレコードの `WARC-Target-URI` が設定される。
+    ファイルを開いて最初のレコードの先頭行を確認するまでは、呼び出し時に実行する
+    (WARCでないファイルは、読み進める前にエラーになる)。
+    """
+    stream = open_html(path)
+    try:
+        line = _next_warc_record(stream, path)
+    except BaseException:
+        stream.close()
+        raise
+    return _iter_warc_documents(stream, path, line)
+
+
+def _iter_tar_documents(
+    tar: tarfile.TarFile,
+    path: Union[str, pathlib.Path],
+    include: Sequence[str],
+    exclude: Sequence[str],
+) -> Iterator[ArchiveDocument]:
+    """開いたtarファイルのHTMLのメンバーを順次返し、終了時にファイルを閉じる"""
+    with tar:
+        for member in tar:
+            if not member.isfile():
+                continue
+            name = pathlib.PurePosixPath(member.name).name
+            if matches_patterns(exclude, name, member.name) or not matches_patterns(include, name, member.name):
+                continue
+            f = tar.extractfile(member)
+            if f is None:
+                continue
+            yield ArchiveDocument(name=f"{path}::{member.name}", content=decompress_html(f.read(), member.name))
+
+
+def iter_tar(
+    path: Union[str, pathlib.Path],
+    include: Sequence[str] = DEFAULT_INCLUDE,
+    exclude: Sequence[str] = (),
+) -> Iterator[ArchiveDocument]:
+    """
+    tarファイル (gzip/bz2/xzで圧縮されたものを含む) のHTMLのメンバーを、先頭から順次返す。
+    ストリームとして読み込むため、アーカイブ全体の目次を事前に読むことはない。
+    ファイルを開いて最初のメンバーのヘッダーを読むまでは、呼び出し時に実行する。
+    """
+    return _iter_tar_documents(tarfile.open(path, "r|*"), path, include, exclude)
+
+
+def _iter_zip_documents(
+    archive: zipfile.ZipFile,
+    path: Union[str, pathlib.Path],
+    include: Sequence[str],
+    exclude: Sequence[str],
+) -> Iterator[ArchiveDocument]:
+    """開いたzipファイルのHTMLのメンバーを順次返し、終了時にファイルを閉じる"""
+    with archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            name = pathlib.PurePosixPath(info.filename).name
+            if matches_patterns(exclude, name, info.filename) or not matches_patterns(include, name, info.filename):
+                continue
+            content = decompress_html(archive.read(info), info.filename)
+            yield ArchiveDocument(name=f"{path}::{info.filename}", content=content)
+
+
+def iter_zip(
+    path: Union[str, pathlib.Path],
+    include: Sequence[str] = DEFAULT_INCLUDE,
+    exclude: Sequence[str] = (),
+) -> Iterator[ArchiveDocument]:
+    """
+    zipファイルのHTMLのメンバーを、格納順に順次返す。
+    ファイルを開いて目次を読むまでは、呼び出し時に実行する。
+    """
+    return _iter_zip_documents(zipfile.ZipFile(path), path, include, exclude)
+
+
+def iter_archive(
+    path: Union[str, pathlib.Path],
+    include: Optional[Sequence[str]] = None,
+    exclude: Sequence[str] = (),
+) -> Iterator[ArchiveDocument]:
+    """
+    アーカイブの形式を拡張子から判定し、HTMLのドキュメントを順次返す。
+    `include` / `exclude` はtarとzipのメンバー名に適用される (WARCではHTMLのレスポンスをすべて返す)。
+
+    アーカイブは呼び出し時に開くため、壊れたアーカイブはドキュメントを読み進める前にエラーになる。
+    読み進めている途中で見つかった破損は、イテレーション中に `ARCHIVE_ERRORS` のいずれかの例外になる。
+
+    Raises:
+        ValueError: 対応していない形式のファイルが指定された場合。
+        ARCHIVE_ERRORS: アーカイブを開けない場合 (例: `zipfile.BadZipFile`, `tarfile.TarError`)。
+    """
+    include = DEFAULT_INCLUDE if include is None else include
+    name = pathlib.Path(path).name.lower()
+    if name.endswith(WARC_SUFFIXES):
+        return iter_warc(path)
+    if name.endswith(ZIP_SUFFIXES):
+        return iter_zip(path, include, exclude)
+    if tarfile.is_tarfile(path):
+        return iter_tar(path, include, exclude)
+    raise ValueError(f"Unsupported archive format: {path}")
+
+
+def parse_document(
+    document: ArchiveDocument,
+    parse_from_string: Optional[Callable[..., List]] = None,
+    **options,
+) -> List:
+    """
+    ドキュメントを解析し、商品情報のリストを返す。
+
+    Args:
+        document: 解析するドキュメント。
+        parse_from_string: 使用するパーサーの `parse_from_string` 関数。
+            省略した場合はページタイプを自動判定し、WARCのURLがあれば判定に使用する。
+        options: パーサーに渡すオプション (`engine`, `validate` など)。
+    """
+    if parse_from_string is None:
+        # アーカイブの読み込みだけを使う場合にパーサーを読み込まないよう、使用時にインポートする
+        from .parser_auto import parse_any
+        return parse_any(document.content, url=document.url, **options)
+    return parse_from_string(document.content, **options)
@@ -0,0 +1,274 @@
+"""
+HTMLファイルの内容のハッシュをキーに、解析結果をディスクに保存するキャッシュモジュール
+
+クローラーが同じページを何度も保存し直す場合でも、内容が変わっていないファイルは
+再解析せずにキャッシュから結果を返す。キャッシュはSQLiteの1ファイルに保存され、
+合計サイズが上限を超えると最後に使われた日時が古いものから削除される (LRU)。
+ファイルのサイズと更新日時が前回と同じ場合は、内容を読み直さずに前回のハッシュを使用する。
+"""
+import collections
+import functools
+import hashlib
+import pathlib
+import pickle
+import queue
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Union
+
+from .parallel import DEFAULT_CHUNKSIZE, FileResult, parse_files
+
+# キャッシュファイルの名前
+CACHE_FILENAME = "results.sqlite"
+
+# キャッシュの合計サイズの上限の既定値 (バイト)
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+# 保存形式を変更した場合に更新する (既存のキャッシュは使われなくなる)
+CACHE_FORMAT_VERSION = 1
+
+
+@functools.lru_cache(maxsize=None)
+def _parser_version() -> str:
+    """
+    パーサーのバージョン (パッケージのバージョン) を返す。
+    `importlib.metadata` の読み込みには時間がかかるため、キャッシュを開くときに初めて取得する。
+    """
+    from importlib import metadata
+
+    try:
+        return metadata.version("shpsg-parser")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def file_digest(path: Union[str, pathlib.Path]) -> str:
+    """ファイルの内容のSHA-256ハッシュ (16進数) を返す"""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+@dataclass
+class CacheStats:
+    """キャッシュのヒット・ミス・削除の件数"""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class ResultCache:
+    """
+    解析結果をSQLiteに保存するキャッシュ。
+
+    キーはファイル内容のハッシュと、パーサーのバージョン・解析オプションを表す
+    名前空間の組み合わせ。パーサーを更新した場合や、オプションを変えた場合は
+    別のキーになるため、古い結果が返されることはない。
+    """
+
+    def __init__(
+        self,
+        cache_dir: Union[str, pathlib.Path],
+        namespace: str = "",
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ):
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.namespace = f"{_parser_version()}:{CACHE_FORMAT_VERSION}:{namespace}"
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+
+        self._conn = sqlite3.connect(self.cache_dir / CACHE_FILENAME)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                payload BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                digest TEXT NOT NULL
+            )
+            """
+        )
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+    def _key(self, digest: str) -> str:
+        return f"{self.namespace}:{digest}"
+
+    def digest_for(self, path: Union[str, pathlib.Path]) -> str:
+        """
+        ファイルの内容のハッシュを返す。
+        サイズと更新日時が前回と同じ場合は、ファイルを読まずに記録済みのハッシュを返す。
+        """
+        path = str(path)
+        stat = pathlib.Path(path).stat()
+        row = self._conn.execute("SELECT size, mtime_ns, digest FROM files WHERE path = ?", (path,)).fetchone()
+        if row is not None and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return row[2]
+        digest = file_digest(path)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO files (path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)",
+            (path, stat.st_size, stat.st_mtime_ns, digest),
+        )
+        return digest
+
+    def contains(self, digest: str) -> bool:
+        """ハッシュに対応する解析結果がキャッシュにあるかを返す (統計には数えない)"""
+        row = self._conn.execute("SELECT 1 FROM results WHERE key = ?", (self._key(digest),)).fetchone()
+        return row is not None
+
+    def get(self, digest: str) -> Optional[List[Any]]:
+        """ハッシュに対応する解析結果を返す。キャッシュにない場合はNoneを返す"""
+        key = self._key(digest)
+        row = self._conn.execute("SELECT payload FROM results WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.stats.misses += 1
+            return None
+        self.stats.hits += 1
+        self._conn.execute("UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key))
+        return pickle.loads(row[0])
+
+    def put(self, digest: str, items: List[Any]) -> None:
+        """
+        解析結果を保存し、合計サイズが上限を超えた場合は古いものから削除する。
+        保存ごとに変更を確定するため、実行が途中で異常終了しても保存済みの結果は失われない。
+        """
+        payload = pickle.dumps(items, protocol=pickle.HIGHEST_PROTOCOL)
+        key = self._key(digest)
+        old = self._conn.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO results (key, payload, size, last_used) VALUES (?, ?, ?, ?)",
+            (key, payload, len(payload), time.time()),
+        )
+        self._total_bytes += len(payload) - (old[0] if old else 0)
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+        self._conn.commit()
+
+    def _evict(self) -> None:
+        """合計サイズが上限以下になるまで、最後に使われた日時が古いものから削除する"""
+        rows = self._conn.execute("SELECT key, size FROM results ORDER BY last_used").fetchall()
+        evicted = []
+        for key, size in rows:
+            if self._total_bytes <= self.max_bytes:
+                break
+            evicted.append((key,))
+            self._total_bytes -= size
+        self._conn.executemany("DELETE FROM results WHERE key = ?", evicted)
+        self.stats.evictions += len(evicted)
+
+    def close(self) -> None:
+        """変更を確定してデータベースを閉じる"""
+        self._conn.commit()
+        self._conn.close()
+
+    def __enter__(self) -> "ResultCache":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+
+def parse_files_cached(
+    paths: Iterable[Any],
+    parse_func: Callable[[str], Any],
+    cache: ResultCache,
+    workers: int = 1,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    ordered: bool = True,
+    profile: bool = False,
+) -> Iterator[FileResult]:
+    """
+    キャッシュを使用して `parallel.parse_files` と同じ結果を返すジェネレーター。
+    ファイルは受け取った順にキャッシュを確認し、キャッシュにないファイルはすぐに解析に渡す
+    (全ファイルのハッシュの計算を待たずに解析を始める)。成功した結果はキャッシュに保存する。
+    `ordered=False` の場合は、キャッシュにあったファイルの結果を見つけた時点で返す。
+    """
+    # 解析中のファイル数の上限。プールのチャンクが埋まるよう、ワーカー数×チャンクサイズの2倍まで先読みする
+    lookahead = max(1, workers) * max(1, chunksize) * 2 if workers > 1 else 1
+    tasks = queue.SimpleQueue()
+    parsed = parse_files(iter(tasks.get, None), parse_func, workers=workers, chunksize=chunksize,
+                         ordered=ordered, profile=profile)
+    digests = {}
+    # 入力順に返すまで待っているファイル (パス, ハッシュ, キャッシュにあるか)
+    pending = collections.deque()
+    in_flight = 0
+    finished = False
+
+    def store(result: FileResult) -> FileResult:
+        digest = digests.pop(result.path, None)
+        if result.error is None and digest is not None:
+            cache.put(digest, result.items)
+        return result
+
+    def load(path: str, digest: str) -> FileResult:
+        # 結果はメモリに溜めず、返す直前にキャッシュから読み込む
+        items = cache.get(digest)
+        if items is None:
+            # 実行中の解析結果の保存によって削除された場合は解析し直す (ミスは `get` で数えられる)
+            digests[path] = digest
+            return store(next(parse_files([path], parse_func, profile=profile)))
+        return FileResult(path=path, items=items)
+
+    def next_parsed() -> Iterator[FileResult]:
+        nonlocal in_flight
+        in_flight -= 1
+        if ordered:
+            pending.popleft()
+        yield store(next(parsed))
+        # 解析結果の後ろで待っていたキャッシュの結果を返す
+        while pending and pending[0][2]:
+            path, digest, _ = pending.popleft()
+            yield load(path, digest)
+
+    try:
+        for path in paths:
+            path = str(path)
+            try:
+                digest = cache.digest_for(path)
+            except OSError:
+                # 読み込めないファイルは解析関数にエラーを報告させる
+                digest = None
+            if digest is not None and cache.contains(digest):
+                if ordered and pending:
+                    pending.append((path, digest, True))
+                else:
+                    yield load(path, digest)
+                continue
+
+            cache.stats.misses += 1
+            if digest is not None:
+                digests[path] = digest
+            if ordered:
+                pending.append((path, digest, False))
+            tasks.put(path)
+            in_flight += 1
+            while in_flight >= lookahead:
+                yield from next_parsed()
+
+        tasks.put(None)
+        finished = True
+        while in_flight:
+            yield from next_parsed()
+    finally:
+        if not finished:
+            # 途中で終了した場合も、プールのタスクの読み込みが終わるようにする
+            tasks.put(None)
+        parsed.close()
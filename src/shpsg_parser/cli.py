@@ -1,16 +1,20 @@
 import typer
 import pathlib
-import pandas as pd
+import functools
+import importlib
+import itertools
+import time
 from typing_extensions import Annotated
 from enum import Enum
-from typing import List
+from typing import Callable, Iterator, List, Optional, Tuple, TypeVar
 
-from shpsg_parser.parser_category import parse_from_file as parse_from_file_category
-from shpsg_parser.parser_search import parse_from_file as parse_from_file_search
-from shpsg_parser.parser_shop import parse_from_file as parse_from_file_shop
-from shpsg_parser.parser_product import parse_from_file as parse_from_file_product
-from shpsg_parser.models import ProductBasicItem
-from shpsg_parser.models_product import ProductDetailItem
+from shpsg_parser.parallel import DEFAULT_CHUNKSIZE, parse_documents, parse_files
+from shpsg_parser.cache import DEFAULT_MAX_BYTES, ResultCache, parse_files_cached
+from shpsg_parser.manifest import Manifest
+from shpsg_parser.discovery import DEFAULT_INCLUDE, discover_files
+from shpsg_parser.archives import ARCHIVE_ERRORS, ArchiveDocument, iter_archive, parse_document
+from shpsg_parser.writers import DEFAULT_BATCH_SIZE, open_writer
+from shpsg_parser.instrumentation import ParseStats
 
 
 class ParserType(str, Enum):
@@ -18,87 +22,317 @@ class ParserType(str, Enum):
     search = "search"
     shop = "shop"
     product = "product"
+    auto = "auto"
+
+class Engine(str, Enum):
+    bs4 = "bs4"
+    lxml = "lxml"
+    stream = "stream"
+
+class OutputFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+    sqlite = "sqlite"
+    parquet = "parquet"
+
+class Compression(str, Enum):
+    zstd = "zstd"
+    snappy = "snappy"
+    gzip = "gzip"
+    none = "none"
+
+# パーサーの種類と、解析する関数を定義するモジュールの対応表
+# (`--help` などの起動時間を短縮するため、パーサーは使用するものだけを実行時にインポートする)
+PARSER_MODULES = {
+    ParserType.category: "shpsg_parser.parser_category",
+    ParserType.search: "shpsg_parser.parser_search",
+    ParserType.shop: "shpsg_parser.parser_shop",
+    ParserType.product: "shpsg_parser.parser_product",
+    ParserType.auto: "shpsg_parser.parser_auto",
+}
+
+
+def parse_functions(parser_type: ParserType) -> Tuple[Callable[..., List], Optional[Callable[..., List]]]:
+    """
+    ファイルを解析する関数と、アーカイブ内のHTMLを解析する関数を返す
+    (後者がNoneの場合はページタイプを自動判定する)
+    """
+    module = importlib.import_module(PARSER_MODULES[parser_type])
+    if parser_type == ParserType.auto:
+        return module.parse_from_file, None
+    return module.parse_from_file, module.parse_from_string
+
+
+def item_model(parser_type: ParserType):
+    """出力するアイテムのモデルを返す"""
+    from shpsg_parser.models import ProductBasicItem
+    from shpsg_parser.models_product import ProductDetailItem
+
+    if parser_type == ParserType.product:
+        return ProductDetailItem
+    if parser_type == ParserType.auto:
+        # 自動判定では一覧ページと商品詳細ページのアイテムが混在する
+        return (ProductBasicItem, ProductDetailItem)
+    return ProductBasicItem
+
+
+app = typer.Typer(rich_markup_mode=None)
+
+T = TypeVar("T")
+
+
+def _non_empty(iterator: Iterator[T]) -> Optional[Iterator[T]]:
+    """
+    イテレーターが空の場合はNoneを、そうでない場合は先頭の要素を含めたイテレーターを返す。
+    ファイルの探索は遅延評価のため、全件を列挙せずに空かどうかだけを確認する。
+    """
+    first = next(iterator, None)
+    if first is None:
+        return None
+    return itertools.chain([first], iterator)
+
+
+def _read_archives(
+    readers: List[Tuple[pathlib.Path, Iterator[ArchiveDocument]]], errors: List[str]
+) -> Iterator[ArchiveDocument]:
+    """
+    アーカイブのドキュメントを順に返す。
+    読み込み中にアーカイブの破損が見つかった場合は、エラーを `errors` に記録して次のアーカイブへ進む。
+    """
+    for archive, reader in readers:
+        try:
+            yield from reader
+        except ARCHIVE_ERRORS as e:
+            errors.append(f"{archive}, エラー: {e}")
 
-app = typer.Typer()
 
 @app.command()
 def parse(
-    output_csv: Annotated[pathlib.Path, typer.Argument(help="出力するCSVファイルのパス")],
-    parser_type: Annotated[ParserType, typer.Option(help="使用するパーサーを選択します ('category', 'search', 'shop', 'product')")] = ParserType.category,
+    output_csv: Annotated[pathlib.Path, typer.Argument(help="出力するファイルのパス (CSV、NDJSON、SQLite または Parquet)")],
+    parser_type: Annotated[ParserType, typer.Option(help="使用するパーサーを選択します ('category', 'search', 'shop', 'product', 'auto')")] = ParserType.category,
     html_dir: Annotated[pathlib.Path, typer.Option(help="解析対象のHTMLファイルが含まれるディレクトリ")] = None,
+    archives: Annotated[List[pathlib.Path], typer.Option("--archive", help="ディレクトリの代わりに解析するアーカイブ (tar, zip, WARC。複数指定可)")] = None,
+    recursive: Annotated[bool, typer.Option(help="サブディレクトリも再帰的に探索する")] = False,
+    include: Annotated[List[str], typer.Option(help=f"対象とするファイルのパターン (複数指定可、既定値: {', '.join(DEFAULT_INCLUDE)})")] = None,
+    exclude: Annotated[List[str], typer.Option(help="除外するファイルまたはディレクトリのパターン (複数指定可)")] = None,
+    workers: Annotated[int, typer.Option(min=1, help="並列に解析するワーカープロセス数 (1の場合は逐次処理)")] = 1,
+    chunksize: Annotated[int, typer.Option(min=1, help="1回のタスク送信でワーカーに渡すファイル数")] = DEFAULT_CHUNKSIZE,
+    ordered: Annotated[bool, typer.Option("--ordered/--unordered", help="結果をファイル順に集めるか、完了順に集めるか")] = True,
+    engine: Annotated[Engine, typer.Option(help="一覧ページの解析エンジンを選択します ('bs4', 'lxml', 'stream')")] = Engine.bs4,
+    validate: Annotated[bool, typer.Option("--validate/--no-validate", help="一覧ページのアイテムを1件ずつPydanticで検証するか (--no-validate では検証を省略して解析し、ファイルごとにまとめて検証してから出力する)")] = True,
+    prefilter: Annotated[bool, typer.Option(help="DOMの構築前に、パーサーが参照しない script / style / svg 要素の中身を取り除く (JSON-LDは残す)")] = False,
+    output_format: Annotated[OutputFormat, typer.Option("--format", help="出力形式を選択します ('csv', 'ndjson', 'sqlite', 'parquet')")] = OutputFormat.csv,
+    compression: Annotated[Compression, typer.Option(help="Parquet出力の圧縮方式を選択します ('zstd', 'snappy', 'gzip', 'none')")] = Compression.zstd,
+    batch_size: Annotated[int, typer.Option(min=1, help="1回の書き込みでまとめて出力する件数")] = DEFAULT_BATCH_SIZE,
+    cache_dir: Annotated[pathlib.Path, typer.Option(help="解析結果のキャッシュを保存するディレクトリ (内容が変わっていないファイルは再解析しない)")] = None,
+    cache_max_mb: Annotated[int, typer.Option(min=1, help="キャッシュの合計サイズの上限 (MB)。超えた場合は古いものから削除する")] = DEFAULT_MAX_BYTES // (1024 * 1024),
+    incremental: Annotated[bool, typer.Option(help="前回から追加・変更されたファイルのみを解析し、出力ファイルに追記する。CSV/NDJSONでは変更されたファイルの以前の行は削除されずに残る (重複させない場合は --format sqlite を使用する)")] = False,
+    manifest_path: Annotated[pathlib.Path, typer.Option("--manifest", help="増分モードで処理済みのファイルを記録するマニフェストのパス (省略時は '<出力ファイル>.manifest.json')")] = None,
+    profile: Annotated[bool, typer.Option(help="段階ごとの所要時間と、アイテム数・フォールバックの使用回数・エラー数を集計して表示する")] = False,
 ):
     """
-    指定されたディレクトリ内のHTMLファイルを解析し、結果をCSVファイルに出力します。
+    指定されたディレクトリ (またはアーカイブ) 内のHTMLファイルを解析し、結果をCSV、NDJSON、SQLiteまたはParquetファイルに逐次出力します。
     """
-    if html_dir is None:
-        # If no directory is specified, use the default samples directory
-        html_dir = pathlib.Path("./data/samples/")
+    if archives:
+        if incremental or cache_dir is not None:
+            typer.echo("エラー: --archive は --incremental および --cache-dir と同時に指定できません。", err=True)
+            raise typer.Exit(code=1)
+        for archive in archives:
+            if not archive.is_file():
+                typer.echo(f"エラー: 指定されたアーカイブが見つかりません: {archive}", err=True)
+                raise typer.Exit(code=1)
+    else:
+        if html_dir is None:
+            # If no directory is specified, use the default samples directory
+            html_dir = pathlib.Path("./data/samples/")
 
-    if not html_dir.is_dir():
-        typer.echo(f"エラー: 指定されたディレクトリが見つかりません: {html_dir}", err=True)
+        if not html_dir.is_dir():
+            typer.echo(f"エラー: 指定されたディレクトリが見つかりません: {html_dir}", err=True)
+            raise typer.Exit(code=1)
+
+    if engine != Engine.bs4 and parser_type == ParserType.product:
+        typer.echo(f"エラー: 商品詳細パーサーは '{engine.value}' エンジンに対応していません。", err=True)
+        raise typer.Exit(code=1)
+    if not validate and parser_type == ParserType.product:
+        typer.echo("エラー: 商品詳細パーサーは --no-validate に対応していません。", err=True)
         raise typer.Exit(code=1)
 
-    html_files = list(html_dir.glob("*.html"))
-    if not html_files:
-        typer.echo(f"エラー: 指定されたディレクトリにHTMLファイルが見つかりませんでした: {html_dir}", err=True)
+    # 読み込みの途中で破損が見つかったアーカイブ
+    archive_errors: List[str] = []
+    if archives:
+        # アーカイブは先頭から1回だけ読み進め、メンバーの内容をそのまま解析へ渡す
+        try:
+            readers = [(archive, iter_archive(archive, include or None, exclude or ())) for archive in archives]
+        except ARCHIVE_ERRORS as e:
+            typer.echo(f"エラー: アーカイブを読み込めませんでした: {e}", err=True)
+            raise typer.Exit(code=1)
+        documents = _read_archives(readers, archive_errors)
+        source = ", ".join(map(str, archives))
+    else:
+        # ファイルは見つかった順に解析へ渡し、全件の列挙を待たない
+        html_files = _non_empty(discover_files(html_dir, include or None, exclude or (), recursive=recursive))
+        if html_files is None:
+            typer.echo(f"エラー: 指定されたディレクトリにHTMLファイルが見つかりませんでした: {html_dir}", err=True)
+            raise typer.Exit(code=1)
+        source = str(html_dir)
+
+    if incremental and output_format == OutputFormat.parquet:
+        typer.echo("エラー: Parquet出力は追記できないため、--incremental に対応していません。", err=True)
         raise typer.Exit(code=1)
 
-    typer.echo(f"{len(html_files)}個のHTMLファイルを解析します...")
-
-    all_items = []
-    with typer.progressbar(html_files, label="ファイルを解析中") as progress:
-        for file_path in progress:
-            try:
-                if parser_type == ParserType.category:
-                    items = parse_from_file_category(str(file_path))
-                    if items:
-                        all_items.extend(items)
-                elif parser_type == ParserType.search:
-                    items = parse_from_file_search(str(file_path))
-                    if items:
-                        all_items.extend(items)
-                elif parser_type == ParserType.shop:
-                    items = parse_from_file_shop(str(file_path))
-                    if items:
-                        all_items.extend(items)
-                elif parser_type == ParserType.product:
-                    # 商品詳細パーサーは単一のアイテムまたはNoneを返す
-                    item = parse_from_file_product(str(file_path))
-                    if item:
-                        all_items.append(item)
-
-            except Exception as e:
-                typer.echo(f"\nファイル解析中にエラーが発生しました: {file_path}, エラー: {e}", err=True)
-
-    if not all_items:
-        typer.echo("商品情報が見つかりませんでした。", err=True)
-        raise typer.Exit()
+    manifest = None
+    if incremental:
+        if manifest_path is None:
+            manifest_path = output_csv.with_name(output_csv.name + ".manifest.json")
+        try:
+            manifest = Manifest.load(manifest_path)
+        except (OSError, ValueError) as e:
+            typer.echo(f"エラー: マニフェストを読み込めませんでした: {manifest_path}, エラー: {e}", err=True)
+            raise typer.Exit(code=1)
+        if not output_csv.exists():
+            # 出力ファイルが削除された場合は、記録済みのファイルも含めて最初から出力し直す
+            manifest = Manifest(manifest_path)
+        html_files = _non_empty(manifest.changed_files(html_files))
+        if html_files is None:
+            # 更新日時のみが変わったファイルの記録を反映する
+            manifest.save()
+            typer.echo("前回から追加・変更されたHTMLファイルはありません。")
+            raise typer.Exit()
 
-    df = pd.DataFrame([p.model_dump() for p in all_items])
+    typer.echo(f"{source} 内のHTMLファイルを解析します...")
+    started = time.perf_counter()
 
-    # Ensure URL fields are strings for CSV output
-    if 'product_url' in df.columns:
-        df['product_url'] = df['product_url'].astype(str)
-    if 'image_url' in df.columns:
-        df['image_url'] = df['image_url'].astype(str)
-    if 'image_urls' in df.columns:
-        # リストをカンマ区切りの文字列に変換
-        df['image_urls'] = df['image_urls'].apply(lambda urls: ','.join(map(str, urls)) if isinstance(urls, list) else urls)
-    if 'shop_url' in df.columns:
-        df['shop_url'] = df['shop_url'].astype(str)
-    if 'specifications' in df.columns:
-        df['specifications'] = df['specifications'].astype(str)
-    if 'variations' in df.columns:
-        df['variations'] = df['variations'].astype(str)
+    parse_func, parse_from_string = parse_functions(parser_type)
+    from shpsg_parser.parser_base import validate_items
+    parse_options = {}
+    if engine != Engine.bs4:
+        parse_options["engine"] = engine.value
+    if not validate:
+        parse_options["validate"] = False
+    if prefilter:
+        parse_options["prefilter"] = True
+    if parse_options:
+        parse_func = functools.partial(parse_func, **parse_options)
+    cache = None
+    if archives:
+        parse_func = functools.partial(
+            parse_document, parse_from_string=parse_from_string, **parse_options
+        )
+        results = parse_documents(
+            documents,
+            parse_func,
+            workers=workers,
+            chunksize=chunksize,
+            ordered=ordered,
+            profile=profile,
+        )
+    elif cache_dir is not None:
+        namespace = f"{parser_type.value}:{engine.value}:validate={validate}:prefilter={prefilter}"
+        cache = ResultCache(cache_dir, namespace, max_bytes=cache_max_mb * 1024 * 1024)
+        results = parse_files_cached(
+            html_files,
+            parse_func,
+            cache,
+            workers=workers,
+            chunksize=chunksize,
+            ordered=ordered,
+            profile=profile,
+        )
+    else:
+        results = parse_files(
+            html_files,
+            parse_func,
+            workers=workers,
+            chunksize=chunksize,
+            ordered=ordered,
+            profile=profile,
+        )
+    # 増分モードでは、マニフェストに記録済みの前回までの出力に追記する
+    append = manifest is not None and bool(manifest.entries)
+    writer_options = {}
+    if output_format == OutputFormat.parquet:
+        writer_options["compression"] = compression.value
+    # 結果を書き出したファイル。バッファに残っているアイテムが出力されるまでは処理済みとして記録しない
+    written_paths = []
 
+    def record_written() -> None:
+        for path in written_paths:
+            manifest.record(path)
+        written_paths.clear()
+        manifest.save()
 
+    if manifest is not None:
+        # バッチを書き出すたびにマニフェストを保存し、異常終了しても出力済みのファイルを解析し直さない
+        writer_options["on_flush"] = record_written
+    try:
+        writer = open_writer(
+            output_csv, item_model(parser_type), output_format.value,
+            batch_size=batch_size, append=append, **writer_options,
+        )
+    except ImportError as e:
+        typer.echo(f"エラー: {e}", err=True)
+        raise typer.Exit(code=1)
+    # ワーカーで計測した結果と、出力ファイルへの書き込み時間を集計する
+    profile_stats = ParseStats() if profile else None
     try:
-        df.to_csv(output_csv, index=False, encoding='utf-8-sig')
-        typer.echo(f"成功: 解析結果を {output_csv} に保存しました。")
-        typer.echo(f"合計 {len(all_items)} 件の商品情報を抽出しました。")
-    except Exception as e:
-        typer.echo(f"エラー: CSVファイルへの書き込み中にエラーが発生しました: {e}", err=True)
+        # ファイル数は事前に数えないため、進捗は処理済みのファイル数で表示する
+        with writer, typer.progressbar(results, label="ファイルを解析中", show_pos=True) as progress:
+            for result in progress:
+                if profile_stats is not None:
+                    profile_stats.merge(result.stats)
+                if result.error is not None:
+                    typer.echo(f"\nファイル解析中にエラーが発生しました: {result.path}, エラー: {result.error}", err=True)
+                else:
+                    items = result.items
+                    if not validate:
+                        # 検証を省略して解析したレコードは、ファイルごとにまとめて検証してから書き出す
+                        # (出力は検証した場合と同じになり、不正なアイテムは除外される)
+                        validate_started = time.perf_counter()
+                        items = validate_items(items)
+                        if profile_stats is not None:
+                            profile_stats.add_time("validate", time.perf_counter() - validate_started)
+                    write_started = time.perf_counter()
+                    writer.write_many(items)
+                    if profile_stats is not None:
+                        profile_stats.add_time("write", time.perf_counter() - write_started)
+                    if manifest is not None:
+                        written_paths.append(result.path)
+                        if items and not writer.buffered:
+                            # ファイルの最後のアイテムでバッチが書き出された場合は、すぐに記録する
+                            record_written()
+        # 出力ファイルへの書き込みが完了してから、残りのファイルを記録する
+        if manifest is not None:
+            record_written()
+    except OSError as e:
+        typer.echo(f"エラー: ファイルへの書き込み中にエラーが発生しました: {e}", err=True)
+        raise typer.Exit(code=1)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    if archive_errors:
+        # 読み込めたドキュメントの結果は出力済み
+        for error in archive_errors:
+            typer.echo(f"エラー: アーカイブを読み込めませんでした: {error}", err=True)
         raise typer.Exit(code=1)
 
+    if cache is not None:
+        stats = cache.stats
+        typer.echo(
+            f"キャッシュ: ヒット {stats.hits} 件 / ミス {stats.misses} 件 "
+            f"(ヒット率 {stats.hit_rate:.1%}, 削除 {stats.evictions} 件)"
+        )
+
+    if profile_stats is not None:
+        typer.echo(f"プロファイル (経過時間 {time.perf_counter() - started:.2f} 秒、段階ごとの時間はワーカーの合計):")
+        typer.echo(profile_stats.summary())
+
+    if writer.count == 0:
+        typer.echo("商品情報が見つかりませんでした。", err=True)
+        raise typer.Exit()
+
+    typer.echo(f"成功: 解析結果を {output_csv} に保存しました。")
+    typer.echo(f"合計 {writer.count} 件の商品情報を抽出しました。")
+
 if __name__ == "__main__":
     app()
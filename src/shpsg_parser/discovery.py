@@ -0,0 +1,115 @@
+"""
+解析対象のHTMLファイルを探索し、圧縮されたファイルを透過的に読み込むモジュール
+
+ディレクトリを再帰的に走査しながら、見つかったファイルを順次返すジェネレーターを提供する。
+すべてのファイルを列挙し終える前に解析を開始できるため、数十万件のファイルがある
+アーカイブでも待ち時間なく処理を始められる。
+gzip (`.gz`) と zstd (`.zst`) で圧縮されたHTMLは、展開したファイルを作らずに読み込む。
+"""
+import fnmatch
+import gzip
+import io
+import os
+import pathlib
+from typing import IO, Iterator, Optional, Sequence, Union
+
+# 既定で解析対象とするファイル名のパターン
+DEFAULT_INCLUDE = ("*.html", "*.html.gz", "*.html.zst")
+
+
+def _import_zstandard():
+    """zstandardをインポートする (zstdで圧縮されたファイルを読む場合のみ必要)"""
+    try:
+        import zstandard
+    except ImportError as e:
+        raise ImportError(
+            "Reading .zst files requires zstandard. Install it with: pip install 'shpsg-parser[zstd]'"
+        ) from e
+    return zstandard
+
+
+def open_html(filepath: Union[str, pathlib.Path], mode: str = "rb") -> IO:
+    """
+    HTMLファイルを開く。拡張子が `.gz` または `.zst` の場合は展開しながら読み込む。
+
+    Args:
+        filepath: 開くファイルのパス。
+        mode: "rb" (バイト列) または "r" (UTF-8の文字列)。
+    """
+    if mode not in ("r", "rb"):
+        raise ValueError(f"Unsupported mode: {mode}")
+
+    suffix = pathlib.Path(filepath).suffix.lower()
+    if suffix == ".gz":
+        stream = gzip.open(filepath, "rb")
+    elif suffix == ".zst":
+        stream = _import_zstandard().open(filepath, "rb")
+    else:
+        stream = open(filepath, "rb")
+
+    if mode == "r":
+        return io.TextIOWrapper(stream, encoding="utf-8")
+    return stream
+
+
+def decompress_html(data: bytes, name: str) -> bytes:
+    """名前の拡張子が `.gz` または `.zst` の場合、バイト列を展開して返す"""
+    suffix = pathlib.PurePosixPath(name).suffix.lower()
+    if suffix == ".gz":
+        return gzip.decompress(data)
+    if suffix == ".zst":
+        return _import_zstandard().ZstdDecompressor().decompressobj().decompress(data)
+    return data
+
+
+def matches_patterns(patterns: Sequence[str], name: str, relative_path: str) -> bool:
+    """ファイル名またはルートからの相対パスが、いずれかのパターンに一致するかを返す"""
+    return any(
+        fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(relative_path, pattern)
+        for pattern in patterns
+    )
+
+
+def discover_files(
+    root: Union[str, pathlib.Path],
+    include: Optional[Sequence[str]] = None,
+    exclude: Sequence[str] = (),
+    recursive: bool = False,
+) -> Iterator[pathlib.Path]:
+    """
+    ディレクトリ内の解析対象のファイルを、見つかった順に返すジェネレーター。
+
+    同じディレクトリ内のファイルは名前順に返し、サブディレクトリはその後に名前順に走査する。
+    パターンはファイル名とルートからの相対パス (区切り文字は "/") の両方と照合され、
+    `exclude` に一致したディレクトリはその配下を走査しない。
+
+    Args:
+        root: 探索を開始するディレクトリ。
+        include: 対象とするファイルのパターン。省略した場合は `DEFAULT_INCLUDE`。
+        exclude: 除外するファイルまたはディレクトリのパターン。
+        recursive: Trueの場合はサブディレクトリも再帰的に探索する。
+    """
+    include = DEFAULT_INCLUDE if include is None else include
+    root = pathlib.Path(root)
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda entry: entry.name)
+        except OSError:
+            # 読み込めないディレクトリは読み飛ばす
+            continue
+
+        subdirectories = []
+        for entry in entries:
+            relative_path = pathlib.Path(entry.path).relative_to(root).as_posix()
+            if matches_patterns(exclude, entry.name, relative_path):
+                continue
+            if entry.is_dir():
+                if recursive:
+                    subdirectories.append(pathlib.Path(entry.path))
+            elif matches_patterns(include, entry.name, relative_path):
+                yield pathlib.Path(entry.path)
+        # スタックから名前順に取り出されるよう、逆順に積む
+        stack.extend(reversed(subdirectories))
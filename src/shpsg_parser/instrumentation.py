@@ -0,0 +1,217 @@
+"""
+解析の段階ごとの所要時間と、各種の件数を記録する計測モジュール
+
+計測はオプトインで、`collect()` のブロック内 (または `enable()` を呼び出した後) に限り、
+パーサーが以下を記録する。
+
+- 段階ごとの時間 (`stage`): read, tree, select, extract, json_ld, validate など。
+  段階が入れ子になる場合、外側の段階の時間には内側の段階の時間を含めない。
+- カウンター (`count`): ページ数・アイテム数、フォールバックの使用回数
+  (例: "rating.pattern2", "price.fallback_3_FVSo")、エラー数 ("errors.*") など。
+
+計測が無効な場合、`stage` は何もしないコンテキストマネージャーを返し、`count` は
+すぐに戻るため、パーサーの処理速度にはほぼ影響しない。
+計測の状態はプロセス全体で共有される (ワーカープロセスの結果は `ParseStats.merge` で集計する)。
+実行中の段階はスレッドごとに管理するため、スレッドプールで並行に解析しても段階が混ざらない。
+"""
+import contextlib
+import functools
+import inspect
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@dataclass
+class ParseStats:
+    """段階ごとの時間 (秒) と呼び出し回数、およびカウンターを格納するデータクラス"""
+    timings: Dict[str, float] = field(default_factory=dict)
+    calls: Dict[str, int] = field(default_factory=dict)
+    counters: Dict[str, int] = field(default_factory=dict)
+
+    def add_time(self, name: str, seconds: float, calls: int = 1) -> None:
+        """段階の時間を加算する"""
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + calls
+
+    def increment(self, name: str, n: int = 1) -> None:
+        """カウンターを加算する"""
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def merge(self, other: Optional["ParseStats"]) -> "ParseStats":
+        """他の計測結果 (例: ワーカープロセスの結果) を加算する"""
+        if other is not None:
+            for name, seconds in other.timings.items():
+                self.add_time(name, seconds, other.calls.get(name, 0))
+            for name, n in other.counters.items():
+                self.increment(name, n)
+        return self
+
+    def summary(self) -> str:
+        """段階ごとの時間とカウンターを表形式の文字列で返す"""
+        lines: List[str] = []
+        total = sum(self.timings.values())
+        if self.timings:
+            lines.append(f"{'stage':<24}{'seconds':>10}{'share':>8}{'calls':>10}{'ms/call':>10}")
+            for name, seconds in sorted(self.timings.items(), key=lambda kv: kv[1], reverse=True):
+                calls = self.calls.get(name, 0)
+                share = seconds / total if total else 0.0
+                per_call = seconds / calls * 1e3 if calls else 0.0
+                lines.append(f"{name:<24}{seconds:>10.3f}{share:>8.1%}{calls:>10}{per_call:>10.3f}")
+            lines.append(f"{'total':<24}{total:>10.3f}")
+        if self.counters:
+            lines.append(f"{'counter':<24}{'count':>10}")
+            for name, n in sorted(self.counters.items()):
+                lines.append(f"{name:<24}{n:>10}")
+        return "\n".join(lines)
+
+
+# 計測中の結果 (Noneの場合は計測しない)
+_active: Optional[ParseStats] = None
+
+class _StageStack(threading.local):
+    """スレッドごとの、実行中の段階の [開始時刻, 内側の段階の合計時間] のスタック"""
+
+    def __init__(self):
+        self.frames: List[List[float]] = []
+
+
+_stack = _StageStack()
+
+
+class _Stage:
+    """段階の時間を計測するコンテキストマネージャー"""
+    __slots__ = ("name", "stats", "calls")
+
+    def __init__(self, name: str, stats: ParseStats, calls: int = 1):
+        self.name = name
+        self.stats = stats
+        self.calls = calls
+
+    def __enter__(self) -> None:
+        _stack.frames.append([time.perf_counter(), 0.0])
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        frames = _stack.frames
+        start, children = frames.pop()
+        elapsed = time.perf_counter() - start
+        self.stats.add_time(self.name, elapsed - children, self.calls)
+        if frames:
+            frames[-1][1] += elapsed
+
+
+_NULL_STAGE = contextlib.nullcontext()
+
+
+def stage(name: str) -> contextlib.AbstractContextManager:
+    """段階の時間を計測するコンテキストマネージャーを返す (計測が無効な場合は何もしない)"""
+    if _active is None:
+        return _NULL_STAGE
+    return _Stage(name, _active)
+
+
+def count(name: str, n: int = 1) -> None:
+    """カウンターを加算する (計測が無効な場合は何もしない)"""
+    if _active is not None:
+        _active.increment(name, n)
+
+
+def count_page(page_type: str, item_count: int) -> None:
+    """解析したページ数とアイテム数を、ページタイプごとに加算する (アイテムがないページも数える)"""
+    if _active is not None:
+        _active.increment(f"pages.{page_type}")
+        _active.increment(f"items.{page_type}", item_count)
+        if item_count == 0:
+            _active.increment(f"empty_pages.{page_type}")
+
+
+# ジェネレーターの終了を表す値
+_END = object()
+
+
+def _measure_items(page_type: str, items: Iterator[Any], stats: ParseStats) -> Iterator[Any]:
+    """
+    アイテムを返すジェネレーターを "extract" 段階として計測する。
+    次のアイテムを取り出すまでの時間のみを合計し (呼び出し元の処理時間は含めない)、
+    終了時 (途中で閉じられた場合を含む) に返したアイテム数を数える。
+    """
+    item_count = 0
+    try:
+        while True:
+            with _Stage("extract", stats, calls=0):
+                item = next(items, _END)
+            if item is _END:
+                return
+            item_count += 1
+            yield item
+    finally:
+        stats.add_time("extract", 0.0)
+        count_page(page_type, item_count)
+
+
+def extractor(page_type: str) -> Callable[[F], F]:
+    """
+    ページから商品情報を抽出する関数を "extract" 段階として計測するデコレーター。
+    戻り値 (リスト、または単一のアイテムかNone) からページ数とアイテム数を数える。
+    ジェネレーター関数の場合は、返したアイテムの数を数える (`_measure_items` を参照)。
+    """
+    def decorator(func: F) -> F:
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                if _active is None:
+                    return func(*args, **kwargs)
+                return _measure_items(page_type, func(*args, **kwargs), _active)
+            return generator_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return func(*args, **kwargs)
+            with _Stage("extract", _active):
+                result = func(*args, **kwargs)
+            count_page(page_type, len(result) if isinstance(result, list) else int(result is not None))
+            return result
+        return wrapper
+    return decorator
+
+
+def is_enabled() -> bool:
+    """計測が有効かを返す"""
+    return _active is not None
+
+
+def enable(stats: Optional[ParseStats] = None) -> ParseStats:
+    """計測を開始し、記録先の `ParseStats` を返す"""
+    global _active
+    _active = stats if stats is not None else ParseStats()
+    return _active
+
+
+def disable() -> Optional[ParseStats]:
+    """計測を終了し、それまでの結果を返す"""
+    global _active
+    stats, _active = _active, None
+    return stats
+
+
+@contextlib.contextmanager
+def collect() -> Iterator[ParseStats]:
+    """
+    ブロック内の解析を計測するコンテキストマネージャー。
+
+    使用例:
+        with collect() as stats:
+            parser_category.parse_from_file("category.html")
+        print(stats.summary())
+    """
+    global _active
+    previous = _active
+    stats = enable()
+    try:
+        yield stats
+    finally:
+        _active = previous
@@ -0,0 +1,433 @@
+"""
+lxmlとXPathで商品一覧ページ (カテゴリ・検索結果・ショップ) を解析するエンジン
+
+BeautifulSoupのオブジェクトを構築せず、`lxml.html` の要素ツリーに対して
+インポート時にコンパイルしたXPathを実行する。抽出ロジックは各パーサーの
+BeautifulSoup版と同じで、同じ `ProductBasicItem` のリストを返す。
+`iter_*` の関数は、商品コンテナを1つずつ解析してアイテムを返すイテレーターを返す。
+"""
+import re
+from typing import Iterator, List, Optional
+
+from lxml import etree, html as lxml_html
+from pydantic import ValidationError
+
+from .instrumentation import count, extractor, stage
+from .models import ProductBasicItem
+from .parser_base import (
+    HtmlInput,
+    build_item,
+    detect_encoding,
+    parse_json_ld_texts,
+    prefilter_html,
+    to_absolute_url,
+    to_absolute_image_url,
+    extract_price,
+    extract_sold,
+    extract_rating,
+)
+
+
+def _has_class(name: str) -> str:
+    """class属性に指定したクラス名を含むかどうかのXPath条件を返す"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# --- ページ全体に対するXPath ---
+_CATEGORY_CONTAINERS = etree.XPath(
+    f"//*[(self::div and {_has_class('col-xs-2-4')}) or (self::li and {_has_class('shopee-search-item-result__item')})]"
+)
+_SEARCH_CONTAINERS = etree.XPath(f"//li[{_has_class('shopee-search-item-result__item')}]")
+_SHOP_CONTAINERS = etree.XPath(f"//div[{_has_class('shop-search-result-view__item')}]")
+_SHOP_RESULT_VIEW = etree.XPath(f"//div[{_has_class('shop-search-result-view')}]")
+_SHOP_DESCRIPTION_SPAN = etree.XPath(f"//div[{_has_class('shop-page-shop-description')}]/span")
+_PAGE_PRODUCT = etree.XPath(f"//div[{_has_class('page-product')}]")
+_ITEM_PAGE_SOLD = etree.XPath(f"//div[{_has_class('aleSBU')}]")
+_JSON_LD_SCRIPTS = etree.XPath('//script[@type="application/ld+json"]')
+
+# --- 商品コンテナに対するXPath ---
+_NAME_DIV = etree.XPath(f"descendant::div[{_has_class('line-clamp-2')}][1]")
+_LINK = etree.XPath("descendant::a[@href][1]")
+_IMG_WITH_ALT = etree.XPath("descendant::img[@alt][1]")
+_IMG_WITH_SRC = etree.XPath("descendant::img[@src][1]")
+_PRICE_SPANS = etree.XPath(f"descendant::div[{_has_class('flex')} and {_has_class('items-baseline')}]//span")
+_SPANS = etree.XPath("descendant::span")
+_FALLBACK_PRICE_DIV = etree.XPath("descendant::div[contains(normalize-space(@class), '_3_FVSo')][1]")
+_RATING_STAR_FULL_IMG = etree.XPath("descendant::img[@alt='rating-star-full'][1]")
+_RATING_STAR_IMG = etree.XPath("descendant::img[@alt='rating-star'][1]")
+_LOCATION_IMG = etree.XPath("descendant::img[@alt='location-icon'][1]")
+_DIVS = etree.XPath("descendant::div")
+_SHOP_IMG = etree.XPath(f"descendant::img[{_has_class('inset-y-0')}][1]")
+_SHOP_PRICE_DIV = etree.XPath(
+    f"descendant::div[{_has_class('truncate')} and {_has_class('flex')} and {_has_class('items-baseline')}][1]"
+)
+
+# BeautifulSoupの `get_text` と同様に、script/styleの中身とコメントを除いたテキストノード
+_TEXT_NODES = etree.XPath("descendant::text()[not(parent::script or parent::style)]")
+
+_SOLD_TEXT_PATTERN = re.compile(r"sold/month|sold", re.IGNORECASE)
+_SHOP_SOLD_TEXT_PATTERN = re.compile(r" sold$")
+
+
+def build_tree(html_content: HtmlInput, prefilter: bool = False) -> Optional[etree._Element]:
+    """
+    HTMLから `lxml.html` の要素ツリーを構築する。
+    空のドキュメントなど、ツリーを構築できない場合はNoneを返す。
+    バイト列はデコードせずにそのままlxmlへ渡し、文字コードは `detect_encoding` で判定した
+    ものを指定する (宣言がない場合にlibxml2がLatin-1とみなすのを防ぐ)。
+    `prefilter=True` の場合は、構築前に `prefilter_html` で不要な要素の中身を取り除く。
+    """
+    if not html_content:
+        return None
+    if prefilter:
+        html_content = prefilter_html(html_content)
+    try:
+        with stage("tree"):
+            if isinstance(html_content, str):
+                return lxml_html.document_fromstring(html_content)
+            # パーサーはスレッド間で共有できないため、呼び出しごとに生成する (生成コストは数マイクロ秒)
+            parser = lxml_html.HTMLParser(encoding=detect_encoding(html_content))
+            return lxml_html.document_fromstring(html_content, parser=parser)
+    except (etree.ParserError, ValueError):
+        count("errors.tree")
+        return None
+
+
+def _first(xpath: etree.XPath, element: etree._Element) -> Optional[etree._Element]:
+    """XPathの結果の最初の要素を返す"""
+    result = xpath(element)
+    return result[0] if result else None
+
+
+def get_text(element: etree._Element, separator: str = "", strip: bool = False) -> str:
+    """BeautifulSoupの `Tag.get_text` と同じ規則で要素のテキストを返す"""
+    texts = _TEXT_NODES(element)
+    if strip:
+        texts = [t.strip() for t in texts]
+        texts = [t for t in texts if t]
+    return separator.join(texts)
+
+
+def get_string(element: etree._Element) -> Optional[str]:
+    """
+    BeautifulSoupの `Tag.string` と同じ規則で、子ノードが1つだけの場合にその文字列を返す。
+    """
+    children = list(element)
+    if not children:
+        return element.text
+    if len(children) == 1 and not element.text and not children[0].tail:
+        child = children[0]
+        if not isinstance(child.tag, str):
+            # コメントなどの文字列ノード
+            return child.text
+        return get_string(child)
+    return None
+
+
+def _next_sibling(element: etree._Element, tag: str) -> Optional[etree._Element]:
+    """指定したタグ名を持つ次の兄弟要素を返す"""
+    return next(element.itersiblings(tag), None)
+
+
+def _find_div_by_string(container: etree._Element, pattern: re.Pattern) -> Optional[etree._Element]:
+    """`string` が正規表現に一致する最初のdivを返す"""
+    for div in _DIVS(container):
+        text = get_string(div)
+        if text is not None and pattern.search(text):
+            return div
+    return None
+
+
+def _extract_rating(container: etree._Element) -> Optional[float]:
+    """
+    レートを抽出する。
+    パターン1: <img alt="rating-star-full"> の隣の <div>
+    パターン2: <img alt="rating-star"> の隣の <span>
+    """
+    rating = None
+    rating_star_img = _first(_RATING_STAR_FULL_IMG, container)
+    if rating_star_img is not None:
+        rating_div = _next_sibling(rating_star_img, "div")
+        if rating_div is not None:
+            rating = extract_rating(get_text(rating_div))
+            if rating is not None:
+                count("rating.pattern1")
+
+    if rating is None:
+        rating_star_img_alt = _first(_RATING_STAR_IMG, container)
+        if rating_star_img_alt is not None:
+            rating_span = _next_sibling(rating_star_img_alt, "span")
+            if rating_span is not None:
+                rating = extract_rating(get_text(rating_span))
+                if rating is not None:
+                    count("rating.pattern2")
+    return rating
+
+
+def _extract_location(container: etree._Element) -> Optional[str]:
+    """'location-icon' のimgの親要素、または隣のspanから配送国を抽出する"""
+    location_img = _first(_LOCATION_IMG, container)
+    if location_img is None:
+        return None
+    parent = location_img.getparent()
+    if parent is not None and get_text(parent, strip=True):
+        return get_text(parent, strip=True)
+    location_span = _next_sibling(location_img, "span")
+    if location_span is not None:
+        count("location.sibling_span")
+        return get_text(location_span, strip=True)
+    return None
+
+
+def _build_item(product_data: dict, rating: Optional[float], validate: bool) -> ProductBasicItem:
+    """レートが取得できた場合のみ辞書に追加し、ProductBasicItemを生成する"""
+    if rating is not None:
+        product_data["rating"] = rating
+    return build_item(ProductBasicItem, product_data, validate)
+
+
+def category_item(container: etree._Element, validate: bool = True) -> Optional[ProductBasicItem]:
+    """カテゴリページの商品コンテナ1つを解析する (商品名がない場合や、解析に失敗した場合はNone)"""
+    name = ""
+    try:
+        name_div = _first(_NAME_DIV, container)
+        name = get_text(name_div, separator=" ", strip=True) if name_div is not None else ""
+        if not name:
+            return None
+
+        a_tag = _first(_LINK, container)
+        product_url = to_absolute_url(a_tag.get("href")) if a_tag is not None else ""
+
+        img_tag = _first(_IMG_WITH_ALT, container)
+        image_url = to_absolute_image_url(img_tag.get("src")) if img_tag is not None and "src" in img_tag.attrib else ""
+
+        price_spans = _PRICE_SPANS(container)
+        price = extract_price(get_text(price_spans[1])) if len(price_spans) > 1 else 0.0
+
+        sold_div = _find_div_by_string(container, _SOLD_TEXT_PATTERN)
+        sold = extract_sold(get_text(sold_div)) if sold_div is not None else 0
+
+        product_data = {
+            "product_name": name,
+            "product_url": product_url,
+            "price": price,
+            "currency": "SGD",
+            "image_url": image_url,
+            "sold": sold,
+            "page_type": "category",
+            "location": _extract_location(container),
+        }
+        return _build_item(product_data, _extract_rating(container), validate)
+    except (ValidationError, Exception) as e:
+        count("errors.item")
+        print(f"Error processing item '{name}': {e}")
+        return None
+
+
+def iter_category_tree(tree: etree._Element, validate: bool = True) -> Iterator[ProductBasicItem]:
+    """カテゴリページの要素ツリーを解析する (`parser_category._iter_category_page` と同等)"""
+    with stage("select"):
+        containers = _CATEGORY_CONTAINERS(tree)
+    for container in containers:
+        item = category_item(container, validate)
+        if item is not None:
+            yield item
+
+
+def parse_category_tree(tree: etree._Element, validate: bool = True) -> List[ProductBasicItem]:
+    """カテゴリページの要素ツリーを解析し、アイテムのリストを返す"""
+    return list(iter_category_tree(tree, validate))
+
+
+def parse_item_tree(tree: etree._Element, validate: bool = True) -> List[ProductBasicItem]:
+    """商品詳細ページの要素ツリーを解析する (`parser_category._parse_item_page` と同等)"""
+    with stage("json_ld"):
+        json_ld_objects = parse_json_ld_texts(script.text_content() for script in _JSON_LD_SCRIPTS(tree))
+    product_json_ld = next((item for item in json_ld_objects if item.get("@type") == "Product"), None)
+    if not product_json_ld:
+        return []
+
+    try:
+        name = product_json_ld.get("name")
+        if not name:
+            return []
+
+        offers_data = product_json_ld.get("offers", {})
+        if isinstance(offers_data, list):
+            offers = offers_data[0] if offers_data else {}
+        else:
+            offers = offers_data
+
+        rating_value = product_json_ld.get("aggregateRating", {}).get("ratingValue")
+        sold_div = _first(_ITEM_PAGE_SOLD, tree)
+
+        product_data = {
+            "product_name": name,
+            "product_url": to_absolute_url(product_json_ld.get("url", "")),
+            "price": float(offers.get("price", 0)),
+            "currency": offers.get("priceCurrency", "SGD"),
+            "image_url": to_absolute_image_url(product_json_ld.get("image", "")),
+            "sold": extract_sold(get_text(sold_div)) if sold_div is not None else 0,
+            "page_type": "item",
+            "rating": float(rating_value) if rating_value is not None else None,
+        }
+        return [build_item(ProductBasicItem, product_data, validate)]
+    except (KeyError, IndexError, ValidationError) as e:
+        count("errors.item")
+        print(f"Error processing item page: {e}")
+        return []
+
+
+@extractor("category")
+def iter_category_document(tree: etree._Element, validate: bool = True) -> Iterator[ProductBasicItem]:
+    """`parser_category.iter_from_soup` と同じ判定で、カテゴリページまたは商品詳細ページを解析する"""
+    if _SEARCH_CONTAINERS(tree):
+        yield from iter_category_tree(tree, validate)
+    elif _PAGE_PRODUCT(tree):
+        yield from parse_item_tree(tree, validate)
+
+
+def parse_category_document(tree: etree._Element, validate: bool = True) -> List[ProductBasicItem]:
+    """カテゴリページまたは商品詳細ページの要素ツリーを解析し、アイテムのリストを返す"""
+    return list(iter_category_document(tree, validate))
+
+
+def search_item(container: etree._Element, validate: bool = True) -> Optional[ProductBasicItem]:
+    """キーワード検索結果ページの商品コンテナ1つを解析する (商品名がない場合や、解析に失敗した場合はNone)"""
+    name = ""
+    try:
+        name_div = _first(_NAME_DIV, container)
+        name = get_text(name_div, strip=True) if name_div is not None else ""
+        if not name:
+            return None
+
+        a_tag = _first(_LINK, container)
+        product_url = to_absolute_url(a_tag.get("href")) if a_tag is not None else ""
+
+        img_tag = _first(_IMG_WITH_SRC, container)
+        image_url = to_absolute_image_url(img_tag.get("src")) if img_tag is not None else ""
+
+        price = 0.0
+        price_dollar_span = next((span for span in _SPANS(container) if get_string(span) == "$"), None)
+        if price_dollar_span is not None:
+            price_value_span = _next_sibling(price_dollar_span, "span")
+            if price_value_span is not None:
+                price = extract_price(get_text(price_value_span))
+
+        if price == 0.0:
+            price_div = _first(_FALLBACK_PRICE_DIV, container)
+            if price_div is not None:
+                price = extract_price(get_text(price_div))
+                count("price.fallback_3_FVSo")
+
+        sold_div = _find_div_by_string(container, _SOLD_TEXT_PATTERN)
+        sold = extract_sold(get_text(sold_div)) if sold_div is not None else 0
+
+        product_data = {
+            "product_name": name,
+            "product_url": product_url,
+            "price": price,
+            "currency": "SGD",
+            "image_url": image_url,
+            "sold": sold,
+            "page_type": "search",
+            "location": _extract_location(container),
+        }
+        return _build_item(product_data, _extract_rating(container), validate)
+    except (ValidationError, Exception) as e:
+        count("errors.item")
+        print(f"Error processing item '{name}': {e}")
+        return None
+
+
+@extractor("search")
+def iter_search_tree(tree: etree._Element, validate: bool = True) -> Iterator[ProductBasicItem]:
+    """キーワード検索結果ページの要素ツリーを解析する (`parser_search._iter_search_page_by_scraping` と同等)"""
+    with stage("select"):
+        containers = _SEARCH_CONTAINERS(tree)
+    for container in containers:
+        item = search_item(container, validate)
+        if item is not None:
+            yield item
+
+
+def parse_search_tree(tree: etree._Element, validate: bool = True) -> List[ProductBasicItem]:
+    """キーワード検索結果ページの要素ツリーを解析し、アイテムのリストを返す"""
+    return list(iter_search_tree(tree, validate))
+
+
+def shop_location(description_span: Optional[etree._Element]) -> Optional[str]:
+    """ショップの説明から配送国を返す (日本以外は判定しない)"""
+    if description_span is not None and "Japan" in get_text(description_span):
+        return "Japan"
+    return None
+
+
+def shop_item(container: etree._Element, location: Optional[str], validate: bool = True) -> Optional[ProductBasicItem]:
+    """ショップページの商品コンテナ1つを解析する (商品名がない場合や、解析に失敗した場合はNone)"""
+    name = ""
+    try:
+        a_tag = _first(_LINK, container)
+        if a_tag is None:
+            return None
+        product_url = to_absolute_url(a_tag.get("href"))
+
+        name_div = _first(_NAME_DIV, a_tag)
+        name = get_text(name_div, strip=True) if name_div is not None else ""
+        if not name:
+            return None
+
+        img_tag = _first(_SHOP_IMG, a_tag)
+        image_url = to_absolute_image_url(img_tag.get("src")) if img_tag is not None and "src" in img_tag.attrib else ""
+
+        price_container = _first(_SHOP_PRICE_DIV, a_tag)
+        price = extract_price(get_text(price_container)) if price_container is not None else 0.0
+
+        # 【レート抽出】ショップページのHTML構造に合わせる
+        rating = None
+        rating_star_img = _first(_RATING_STAR_IMG, container)
+        if rating_star_img is not None:
+            rating_span = _next_sibling(rating_star_img, "span")
+            if rating_span is not None:
+                rating = extract_rating(get_text(rating_span))
+
+        sold_div = _find_div_by_string(container, _SHOP_SOLD_TEXT_PATTERN)
+        sold = extract_sold(get_text(sold_div)) if sold_div is not None else 0
+
+        product_data = {
+            "product_name": name,
+            "product_url": product_url,
+            "price": price,
+            "currency": "SGD",
+            "image_url": image_url,
+            "sold": sold,
+            "location": location,
+            "page_type": "shop",
+        }
+        return _build_item(product_data, rating, validate)
+    except (ValidationError, Exception) as e:
+        count("errors.item")
+        print(f"Error processing a shop item '{name}': {e}")
+        return None
+
+
+@extractor("shop")
+def iter_shop_tree(tree: etree._Element, validate: bool = True) -> Iterator[ProductBasicItem]:
+    """ショップページの要素ツリーを解析する (`parser_shop.iter_from_soup` と同等)"""
+    if not _SHOP_RESULT_VIEW(tree):
+        return
+
+    # ショップの配送国はページ全体で共通の可能性が高いため、最初に一度だけ取得する
+    location = shop_location(_first(_SHOP_DESCRIPTION_SPAN, tree))
+
+    with stage("select"):
+        containers = _SHOP_CONTAINERS(tree)
+    for container in containers:
+        item = shop_item(container, location, validate)
+        if item is not None:
+            yield item
+
+
+def parse_shop_tree(tree: etree._Element, validate: bool = True) -> List[ProductBasicItem]:
+    """ショップページの要素ツリーを解析し、アイテムのリストを返す"""
+    return list(iter_shop_tree(tree, validate))
@@ -0,0 +1,109 @@
+"""
+処理済みのHTMLファイルを記録するマニフェストを扱うモジュール
+
+増分モード (`--incremental`) では、前回までに出力したファイルのパス・サイズ・更新日時・
+内容のハッシュをマニフェストに記録し、新しいファイルと内容が変更されたファイルのみを解析する。
+サイズと更新日時が前回と同じファイルは内容を読まずに処理済みと判定し、
+更新日時のみが変わったファイルはハッシュを比較して判定する。
+"""
+import json
+import os
+import pathlib
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, Optional, Union
+
+from .cache import file_digest
+
+# マニフェストの保存形式のバージョン
+MANIFEST_VERSION = 1
+
+
+@dataclass
+class FileEntry:
+    """マニフェストに記録する1ファイル分の情報"""
+    size: int
+    mtime_ns: int
+    digest: str
+
+
+class Manifest:
+    """
+    処理済みのファイルを記録するマニフェスト。
+    JSONファイルとして保存され、`save` を呼び出すまで変更はファイルに反映されない。
+    """
+
+    def __init__(self, path: Union[str, pathlib.Path]):
+        self.path = pathlib.Path(path)
+        self.entries: Dict[str, FileEntry] = {}
+        # 判定時に計算した、まだ記録していないファイルの情報
+        self._pending: Dict[str, FileEntry] = {}
+
+    @classmethod
+    def load(cls, path: Union[str, pathlib.Path]) -> "Manifest":
+        """マニフェストを読み込む。ファイルが存在しない場合は空のマニフェストを返す"""
+        manifest = cls(path)
+        if manifest.path.exists():
+            with open(manifest.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != MANIFEST_VERSION:
+                raise ValueError(f"Unsupported manifest version: {data.get('version')}")
+            manifest.entries = {
+                file_path: FileEntry(*entry) for file_path, entry in data["files"].items()
+            }
+        return manifest
+
+    def save(self) -> None:
+        """マニフェストを保存する (一時ファイルに書き出してから置き換える)"""
+        data = {
+            "version": MANIFEST_VERSION,
+            "files": {
+                file_path: [entry.size, entry.mtime_ns, entry.digest]
+                for file_path, entry in sorted(self.entries.items())
+            },
+        }
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def _current_entry(self, path: str) -> Optional[FileEntry]:
+        """
+        ファイルが処理済みの場合はNoneを、新規または変更されている場合は現在の情報を返す。
+        """
+        stat = os.stat(path)
+        entry = self.entries.get(path)
+        if entry is not None and entry.size == stat.st_size and entry.mtime_ns == stat.st_mtime_ns:
+            return None
+
+        digest = file_digest(path)
+        current = FileEntry(stat.st_size, stat.st_mtime_ns, digest)
+        if entry is not None and entry.digest == digest:
+            # 内容は同じで更新日時のみ変わった場合は、記録を更新して処理済みとする
+            self.entries[path] = current
+            return None
+        return current
+
+    def changed_files(self, paths: Iterable[Union[str, pathlib.Path]]) -> Iterator[str]:
+        """
+        新しいファイルと、前回の記録から内容が変更されたファイルのパスのみを順次返すジェネレーター。
+        返したファイルは、解析結果を出力した後に `record` で記録する。
+        """
+        for path in map(str, paths):
+            try:
+                current = self._current_entry(path)
+            except OSError:
+                # 読み込めないファイルは解析時にエラーとして報告させる
+                yield path
+                continue
+            if current is not None:
+                self._pending[path] = current
+                yield path
+
+    def record(self, path: Union[str, pathlib.Path]) -> None:
+        """ファイルを処理済みとして記録する"""
+        path = str(path)
+        entry = self._pending.pop(path, None)
+        if entry is None:
+            stat = os.stat(path)
+            entry = FileEntry(stat.st_size, stat.st_mtime_ns, file_digest(path))
+        self.entries[path] = entry
@@ -1,6 +1,7 @@
 """
 Pydanticモデルを定義するモジュール
 """
+from dataclasses import dataclass
 from typing import Optional
 from pydantic import BaseModel, HttpUrl, Field
 
@@ -19,3 +20,27 @@ class ProductBasicItem(BaseModel):
     shop_type: Optional[str] = Field(None, description="ショップのタイプ (Mall, Preferred, etc.)")
     currency: str = Field(..., description="通貨 (例: SGD)")
     page_type: str = Field(..., description="解析したHTMLのページタイプ")
+
+
+@dataclass(slots=True)
+class ProductBasicRecord:
+    """
+    検証を省略した一括処理用の軽量なレコード (`validate=False` で解析した場合に返される)。
+    フィールドは ProductBasicItem と同じだが、URLは抽出した文字列のまま格納される。
+    `to_model` または `parser_base.validate_items` で検証済みのモデルに変換できる。
+    """
+    product_name: str
+    price: float
+    sold: int
+    product_url: str
+    image_url: str
+    currency: str
+    page_type: str
+    rating: Optional[float] = 0.0
+    location: Optional[str] = None
+    discount: Optional[float] = None
+    shop_type: Optional[str] = None
+
+    def to_model(self) -> ProductBasicItem:
+        """検証済みの ProductBasicItem に変換する"""
+        return ProductBasicItem.model_validate(self, from_attributes=True)
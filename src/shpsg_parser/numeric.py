@@ -0,0 +1,103 @@
+"""
+価格・販売数・評価の文字列から数値を抽出するモジュール
+
+パターンはインポート時にコンパイルし、1回の照合で数値と単位 (k/m) を取り出すため、
+`split` や `replace`、`lower` による中間の文字列を生成しない。
+`parser_base` の `extract_price` / `extract_sold` / `extract_rating` はこのモジュールの関数である。
+
+複数の文字列をまとめて変換する `parse_prices` / `parse_sold_counts` / `parse_ratings` は、
+結果を `array.array` で返す (`numpy.frombuffer` などでコピーせずに配列として扱える)。
+"""
+import math
+import re
+from array import array
+from typing import Iterable, Optional
+
+# 範囲価格 ("$1,234.50 - $2,000") の場合は、"-" より前にある最初の数値 (低い方の価格) を取り出す
+_PRICE = re.compile(r"[^-\d,.]*([\d,.]+)")
+
+# 数値と、その直後の単位 ("1.2k sold/month" の "k")
+_SOLD = re.compile(r"([\d.][\d,.]*)\s*([kKmM]?)")
+
+_RATING = re.compile(r"[\d.]+")
+
+# 販売数の単位と倍率
+_MULTIPLIERS = {"": 1, "k": 1000, "K": 1000, "m": 1000000, "M": 1000000}
+
+_match_price = _PRICE.match
+_search_sold = _SOLD.search
+_search_rating = _RATING.search
+
+
+def parse_price(price_str: Optional[str]) -> float:
+    """
+    価格文字列から数値のみを抽出する (範囲価格の場合は低い方の価格)。
+    数値がない場合は0.0を返す。
+
+    Raises:
+        ValueError: 数値として解釈できない場合 (例: "1.2.3")。
+    """
+    if not price_str:
+        return 0.0
+    match = _match_price(price_str)
+    if match is None:
+        return 0.0
+    value = match.group(1)
+    if "," in value:
+        value = value.replace(",", "")
+    return float(value)
+
+
+def parse_sold(sold_str: Optional[str]) -> int:
+    """
+    販売数文字列 (例: "10 sold", "1.2k sold/month", "2M sold") から数値を抽出する。
+    数値の直後の k/m (大文字を含む) を単位として扱う。抽出できない場合は0を返す。
+    """
+    if not sold_str:
+        return 0
+    match = _search_sold(sold_str)
+    if match is None:
+        return 0
+    number, unit = match.groups()
+    if "," in number:
+        number = number.replace(",", "")
+    try:
+        value = float(number)
+    except ValueError:
+        return 0
+    if unit:
+        # 小数の誤差で切り捨てられないよう丸める (例: "2.01M" -> 2010000)
+        return round(value * _MULTIPLIERS[unit])
+    return int(value)
+
+
+def parse_rating(rating_str: Optional[str]) -> Optional[float]:
+    """
+    評価文字列から評価値を抽出し、浮動小数点数として返す。
+    抽出できない場合はNoneを返す。
+    """
+    if not rating_str:
+        return None
+    match = _search_rating(rating_str)
+    if match is None:
+        return None
+    try:
+        return float(match.group(0))
+    except ValueError:
+        return None
+
+
+def parse_prices(price_strs: Iterable[Optional[str]]) -> array:
+    """複数の価格文字列を変換し、`array("d")` で返す"""
+    return array("d", map(parse_price, price_strs))
+
+
+def parse_sold_counts(sold_strs: Iterable[Optional[str]]) -> array:
+    """複数の販売数文字列を変換し、`array("q")` で返す"""
+    return array("q", map(parse_sold, sold_strs))
+
+
+def parse_ratings(rating_strs: Iterable[Optional[str]]) -> array:
+    """複数の評価文字列を変換し、`array("d")` で返す (抽出できない場合はNaN)"""
+    nan = math.nan
+    return array("d", [nan if rating is None else rating for rating in map(parse_rating, rating_strs)])
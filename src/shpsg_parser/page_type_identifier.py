@@ -1,10 +1,13 @@
 import enum
-import json
-from typing import Optional
+import re
+from typing import BinaryIO, Optional, Union
 from urllib.parse import urlparse
 
 from bs4 import BeautifulSoup
 
+from .discovery import open_html
+from .parser_base import HtmlInput, extract_json_ld, scan_json_ld
+
 
 class PageType(enum.Enum):
     PRODUCT_DETAIL = "product_detail"
@@ -14,7 +17,203 @@ class PageType(enum.Enum):
     UNKNOWN = "unknown"
 
 
-def get_page_type(html_content: str, url: str) -> PageType:
+# 保存されたHTMLに含まれる元ページのURL (ブラウザの「名前を付けて保存」で付与されるコメント、canonicalリンク)
+_SAVED_FROM_URL = re.compile(rb"<!-- saved from url=\(\d+\)(\S+?) -->")
+_CANONICAL_URL = re.compile(rb"<link[^>]*?rel=\"canonical\"[^>]*?href=\"([^\"]+)\"")
+# canonicalリンクの属性 (正規表現を実行する前に、この文字列の位置を探す)
+_CANONICAL_REL = b'rel="canonical"'
+
+# 商品コンテナなど、ページタイプを決定できるHTML内の目印
+# (JSON-LDの "@type" はどのページにも Product/Organization が含まれるため目印にならない)
+# 一覧の商品コンテナはカテゴリページと検索結果ページで共通のため、canonicalリンクと組み合わせて判定する
+_PAGE_MARKERS = (
+    (b"shop-search-result-view", PageType.SHOP),
+    (b"shopee-search-item-result__item", PageType.CATEGORY),
+    (b"page-product", PageType.PRODUCT_DETAIL),
+)
+
+# ファイルから逐次読み込む際の1回あたりの読み込みサイズ
+SNIFF_CHUNK_SIZE = 64 * 1024
+
+# チャンクの境界をまたぐ目印やlinkタグを見逃さないよう、次のチャンクに持ち越すバイト数
+_CARRY_OVER_SIZE = 2048
+
+
+def get_page_type_from_url(url: Optional[str]) -> PageType:
+    """
+    Identifies the page type from URL patterns only.
+    Shop pages have no distinctive URL pattern and are never returned here.
+
+    Args:
+        url: The URL of the page.
+
+    Returns:
+        The identified page type, or `PageType.UNKNOWN` if the URL is not decisive.
+    """
+    if not url:
+        return PageType.UNKNOWN
+
+    try:
+        path = urlparse(url).path
+    except Exception:
+        return PageType.UNKNOWN
+
+    # Product: /...-i.{shop_id}.{item_id} (most specific)
+    if "-i." in path and path.split('-i.')[-1].count('.') == 1:
+        return PageType.PRODUCT_DETAIL
+
+    # Category: /...-cat.{cat_id}
+    if "-cat." in path:
+        return PageType.CATEGORY
+
+    # Search: /search?keyword=...
+    if "/search" in path:
+        return PageType.KEYWORD_SEARCH_RESULT
+
+    return PageType.UNKNOWN
+
+
+def find_page_url(html: Union[str, bytes]) -> Optional[str]:
+    """
+    保存されたHTMLから元ページのURLを探す。
+    `<!-- saved from url=... -->` コメントを優先し、無ければcanonicalリンクを使用する。
+    """
+    data = html.encode("utf-8") if isinstance(html, str) else html
+    for pattern in (_SAVED_FROM_URL, _CANONICAL_URL):
+        match = pattern.search(data)
+        if match:
+            return match.group(1).decode("utf-8", errors="replace")
+    return None
+
+
+class PageTypeSniffer:
+    """
+    HTMLを先頭から少しずつ受け取りながら、DOMを構築せずにページタイプを判定するクラス。
+    URLパターンまたは商品コンテナの目印が見つかった時点で判定が確定し、
+    以降のデータを読む必要はなくなる (`done` がTrueになる)。
+    """
+
+    def __init__(self, url: Optional[str] = None):
+        self.url = url
+        self.page_type = get_page_type_from_url(url)
+        self.bytes_read = 0
+        # HTML内のcanonicalリンクのURL (カテゴリページと検索結果ページの区別に使用する)
+        self.canonical_url: Optional[str] = None
+        self._carry = b""
+
+    @property
+    def done(self) -> bool:
+        """ページタイプが確定したかどうか"""
+        return self.page_type != PageType.UNKNOWN
+
+    def feed(self, chunk: bytes) -> PageType:
+        """
+        HTMLの続きを受け取り、その時点で判定できたページタイプを返す。
+        まだ判定できない場合は `PageType.UNKNOWN` を返す。
+        """
+        if self.done or not chunk:
+            return self.page_type
+
+        self.bytes_read += len(chunk)
+        data = self._carry + chunk if self._carry else chunk
+
+        if self.url is None:
+            # `find_page_url` と同じく、保存元URLのコメントをcanonicalリンクより優先する
+            match = _SAVED_FROM_URL.search(data)
+            if match:
+                self.url = match.group(1).decode("utf-8", errors="replace")
+                self.page_type = get_page_type_from_url(self.url)
+                if self.done:
+                    return self.page_type
+        rel = data.find(_CANONICAL_REL) if self.canonical_url is None else -1
+        if rel >= 0:
+            # 正規表現は、見つかった属性を含むlinkタグの位置から実行する
+            match = _CANONICAL_URL.search(data, max(0, data.rfind(b"<link", 0, rel)))
+            if match:
+                self.canonical_url = match.group(1).decode("utf-8", errors="replace")
+                if self.url is None:
+                    self.url = self.canonical_url
+                    self.page_type = get_page_type_from_url(self.url)
+                    if self.done:
+                        return self.page_type
+
+        for marker, marker_page_type in _PAGE_MARKERS:
+            if marker in data:
+                if (marker_page_type == PageType.CATEGORY and self.canonical_url is not None
+                        and get_page_type_from_url(self.canonical_url) != PageType.CATEGORY):
+                    # カテゴリページのcanonicalリンクはカテゴリのURL、検索結果ページはトップページになる
+                    marker_page_type = PageType.KEYWORD_SEARCH_RESULT
+                self.page_type = marker_page_type
+                return self.page_type
+
+        self._carry = data[-_CARRY_OVER_SIZE:]
+        return self.page_type
+
+
+def sniff_page_type(html: Union[str, bytes], url: Optional[str] = None) -> PageType:
+    """
+    DOMを構築せずに、URLとHTML内の目印の文字列だけでページタイプを判定する。
+    URLが渡されない場合は、HTML内の保存元URLやcanonicalリンクを使用する。
+
+    Args:
+        html: The HTML content of the page (str or undecoded bytes).
+        url: The URL of the page, if known.
+
+    Returns:
+        The identified page type, or `PageType.UNKNOWN` if no decisive marker was found.
+    """
+    if not html:
+        return PageType.UNKNOWN
+
+    data = html.encode("utf-8") if isinstance(html, str) else html
+    return PageTypeSniffer(url).feed(data)
+
+
+def sniff_page_type_from_stream(
+    stream: BinaryIO,
+    url: Optional[str] = None,
+    chunk_size: int = SNIFF_CHUNK_SIZE,
+    max_bytes: Optional[int] = None,
+) -> PageType:
+    """
+    バイナリストリームを先頭からチャンク単位で読み込み、ページタイプが確定した時点で読み込みを止める。
+
+    Args:
+        stream: 読み込み元のバイナリストリーム。
+        url: The URL of the page, if known.
+        chunk_size: 1回あたりの読み込みサイズ。
+        max_bytes: 読み込む最大バイト数。Noneの場合は末尾まで読み込む。
+    """
+    sniffer = PageTypeSniffer(url)
+    while not sniffer.done:
+        size = chunk_size
+        if max_bytes is not None:
+            size = min(size, max_bytes - sniffer.bytes_read)
+            if size <= 0:
+                break
+        chunk = stream.read(size)
+        if not chunk:
+            break
+        sniffer.feed(chunk)
+    return sniffer.page_type
+
+
+def sniff_page_type_from_file(
+    filepath: str,
+    url: Optional[str] = None,
+    chunk_size: int = SNIFF_CHUNK_SIZE,
+    max_bytes: Optional[int] = None,
+) -> PageType:
+    """
+    HTMLファイルを先頭から読み込み、判定に必要な分だけ読んだ時点でページタイプを返す。
+    保存元URLから判定できるページでは、最初のチャンクだけで判定が確定する。
+    圧縮されたファイル (`.gz`, `.zst`) も、必要な分だけ展開して判定する。
+    """
+    with open_html(filepath) as f:
+        return sniff_page_type_from_stream(f, url=url, chunk_size=chunk_size, max_bytes=max_bytes)
+
+
+def get_page_type(html_content: Optional[HtmlInput], url: str, soup: Optional[BeautifulSoup] = None) -> PageType:
     """
     Identifies the page type from the given HTML content and URL.
     The logic prioritizes distinct URL patterns first to disambiguate pages
@@ -23,44 +222,26 @@ def get_page_type(html_content: str, url: str) -> PageType:
     Args:
         html_content: The HTML content of the page.
         url: The URL of the page.
+        soup: An already parsed document of the same page. When given, it is
+            reused for the JSON-LD lookup. Otherwise the JSON-LD scripts are
+            scanned directly from `html_content` without building a DOM.
 
     Returns:
         The identified page type.
     """
-    if not html_content or not url:
+    if (not html_content and soup is None) or not url:
         return PageType.UNKNOWN
 
     # 1. URL based identification (Primary for distinct patterns)
-    try:
-        parsed_url = urlparse(url)
-        path = parsed_url.path
-
-        # Product: /...-i.{shop_id}.{item_id} (most specific)
-        if "-i." in path and path.split('-i.')[-1].count('.') == 1:
-            return PageType.PRODUCT_DETAIL
-
-        # Category: /...-cat.{cat_id}
-        if "-cat." in path:
-            return PageType.CATEGORY
-
-        # Search: /search?keyword=...
-        if "/search" in path:
-            return PageType.KEYWORD_SEARCH_RESULT
-
-    except Exception:
-        # Fall through to JSON-LD if URL parsing fails
-        pass
+    page_type = get_page_type_from_url(url)
+    if page_type != PageType.UNKNOWN:
+        return page_type
 
     # 2. JSON-LD based identification (Primary for Shop, fallback for others)
-    soup = BeautifulSoup(html_content, "html.parser")
-    json_ld_scripts = soup.find_all("script", type="application/ld+json")
-    for script in json_ld_scripts:
-        try:
-            data = json.loads(script.string)
-            if isinstance(data, dict) and data.get("@type") == "Organization":
-                return PageType.SHOP
-        except (json.JSONDecodeError, TypeError):
-            continue
+    json_ld = extract_json_ld(soup) if soup is not None else scan_json_ld(html_content)
+    for data in json_ld:
+        if data.get("@type") == "Organization":
+            return PageType.SHOP
 
     # 3. Fallback URL check for shop pages with simple paths
     try:
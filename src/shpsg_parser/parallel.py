@@ -0,0 +1,120 @@
+"""
+複数のHTMLファイルをプロセスプールで並列に解析するモジュール
+
+ファイルパスの代わりに、アーカイブから読み込んだドキュメント (メモリ上のバイト列) を
+ワーカーへ渡して解析することもできる。
+"""
+from dataclasses import dataclass, field
+from multiprocessing import Pool
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+from .instrumentation import ParseStats, collect
+
+# 1回のタスク送信でワーカーに渡すファイル数の既定値
+DEFAULT_CHUNKSIZE = 4
+
+
+@dataclass
+class FileResult:
+    """
+    1ファイル分の解析結果を格納するデータクラス。
+    解析に失敗した場合は `error` にエラーメッセージが設定される。
+    `profile=True` で解析した場合は、`stats` にワーカー内で計測した結果が設定される。
+    """
+    path: str
+    items: List[Any] = field(default_factory=list)
+    error: Optional[str] = None
+    stats: Optional[ParseStats] = None
+
+
+def parse_task(task: Tuple[Callable[[Any], Any], Any, str, bool]) -> FileResult:
+    """
+    1ファイル (またはドキュメント) の解析タスクを実行する。
+    タスクは (解析関数, 解析関数に渡す値, 結果に付けるパス, 計測するか) の組で、
+    ワーカープロセスや `aio` のエグゼキューター内で呼び出される。
+    例外はここで捕捉し、呼び出し元へは `FileResult.error` として返す。
+    """
+    parse_func, source, path, profile = task
+    if profile:
+        with collect() as stats:
+            result = parse_task((parse_func, source, path, False))
+            if result.error is not None:
+                stats.increment("errors.file")
+        result.stats = stats
+        return result
+
+    try:
+        result = parse_func(source)
+    except Exception as e:
+        return FileResult(path=path, error=str(e))
+
+    # 商品詳細パーサーは単一のアイテムまたはNoneを返すため、リストに揃える
+    if result is None:
+        items = []
+    elif isinstance(result, list):
+        items = result
+    else:
+        items = [result]
+    return FileResult(path=path, items=items)
+
+
+def parse_files(
+    paths: Iterable[Any],
+    parse_func: Callable[[str], Any],
+    workers: int = 1,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    ordered: bool = True,
+    profile: bool = False,
+) -> Iterator[FileResult]:
+    """
+    ファイルパスの列を解析し、ファイルごとの結果を順次返すジェネレーター。
+
+    Args:
+        paths: 解析対象のファイルパスの列。
+        parse_func: 各ファイルに適用する `parse_from_file` 関数。
+            ワーカープロセスへ渡すため、モジュールのトップレベル関数である必要がある。
+        workers: ワーカープロセス数。1以下の場合は現在のプロセスで逐次処理する。
+        chunksize: 1回のタスク送信でワーカーに渡すファイル数。
+        ordered: Trueの場合は入力順に、Falseの場合は完了した順に結果を返す。
+        profile: Trueの場合は段階ごとの時間などを計測し、`FileResult.stats` に設定する。
+    """
+    tasks = ((parse_func, str(path), str(path), profile) for path in paths)
+    return _run_tasks(tasks, workers, chunksize, ordered)
+
+
+def parse_documents(
+    documents: Iterable[Any],
+    parse_func: Callable[[Any], Any],
+    workers: int = 1,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    ordered: bool = True,
+    profile: bool = False,
+) -> Iterator[FileResult]:
+    """
+    アーカイブから読み込んだドキュメントの列を解析し、ドキュメントごとの結果を順次返すジェネレーター。
+    ドキュメントの内容はワーカーへ直接送られるため、ワーカーがアーカイブを開き直すことはない。
+
+    Args:
+        documents: `name` 属性を持つドキュメント (`archives.ArchiveDocument`) の列。
+        parse_func: 各ドキュメントに適用する関数 (例: `archives.parse_document`)。
+        workers, chunksize, ordered, profile: `parse_files` と同じ。
+    """
+    tasks = ((parse_func, document, document.name, profile) for document in documents)
+    return _run_tasks(tasks, workers, chunksize, ordered)
+
+
+def _run_tasks(
+    tasks: Iterable[Tuple[Callable[[Any], Any], Any, str, bool]],
+    workers: int,
+    chunksize: int,
+    ordered: bool,
+) -> Iterator[FileResult]:
+    """タスクを現在のプロセスまたはプロセスプールで実行する"""
+    if workers <= 1:
+        for task in tasks:
+            yield parse_task(task)
+        return
+
+    with Pool(processes=workers) as pool:
+        mapper = pool.imap if ordered else pool.imap_unordered
+        yield from mapper(parse_task, tasks, chunksize=max(1, chunksize))
@@ -0,0 +1,137 @@
+"""
+ページタイプを自動判定し、対応するパーサーへ振り分けるHTMLパーサー
+
+カテゴリ・検索結果・ショップ・商品詳細ページが混在したディレクトリでも、
+パーサーの種類を事前に指定せずに1回の走査で解析できる。
+"""
+from typing import Any, Dict, List, Optional, Union
+
+from bs4 import BeautifulSoup
+
+from . import lxml_engine, parser_category, parser_product, parser_search, parser_shop, stream_engine
+from .discovery import open_html
+from .instrumentation import stage
+from .models import ProductBasicItem
+from .models_product import ProductDetailItem
+from .page_type_identifier import PageType, PageTypeSniffer, get_page_type
+from .parser_base import HtmlInput, ParserError, check_engine, make_soup, scan_json_ld
+
+# 自動判定で返されるアイテムの型
+AnyItem = Union[ProductBasicItem, ProductDetailItem]
+
+# lxmlエンジンで解析できるページタイプと、対応する解析関数
+_LXML_TREE_PARSERS = {
+    PageType.CATEGORY: lxml_engine.parse_category_document,
+    PageType.KEYWORD_SEARCH_RESULT: lxml_engine.parse_search_tree,
+    PageType.SHOP: lxml_engine.parse_shop_tree,
+}
+
+# streamエンジンで解析できるページタイプと、対応する解析関数
+_STREAM_PARSERS = {
+    PageType.CATEGORY: stream_engine.iter_category_items,
+    PageType.KEYWORD_SEARCH_RESULT: stream_engine.iter_search_items,
+    PageType.SHOP: stream_engine.iter_shop_items,
+}
+
+
+def parse_soup_as(
+    soup: BeautifulSoup,
+    page_type: PageType,
+    validate: bool = True,
+    json_ld: Optional[List[Dict[str, Any]]] = None,
+) -> List[AnyItem]:
+    """
+    解析済みのBeautifulSoupオブジェクトを、指定されたページタイプのパーサーで解析する。
+    商品詳細パーサーの単一の戻り値もリストに揃えて返す。
+    `validate=False` は商品一覧ページにのみ適用され、商品詳細ページは常に検証する。
+    `json_ld` は商品詳細ページの解析に使用する抽出済みのJSON-LD (省略時はDOMから抽出する)。
+    """
+    if page_type == PageType.CATEGORY:
+        return parser_category.parse_from_soup(soup, validate)
+    if page_type == PageType.KEYWORD_SEARCH_RESULT:
+        return parser_search.parse_from_soup(soup, validate)
+    if page_type == PageType.SHOP:
+        return parser_shop.parse_from_soup(soup, validate)
+    if page_type == PageType.PRODUCT_DETAIL:
+        item = parser_product.parse_from_soup(soup, json_ld)
+        return [item] if item else []
+    return []
+
+
+def parse_any(
+    html_content: HtmlInput,
+    url: Optional[str] = None,
+    engine: str = "bs4",
+    validate: bool = True,
+    prefilter: bool = False,
+) -> List[AnyItem]:
+    """
+    HTMLのページタイプを判定し、対応するパーサーで解析した商品情報のリストを返す。
+
+    ページタイプはまずDOMを構築せずにURLと目印の文字列から判定する。
+    判定できなかった場合のみ、`get_page_type` でJSON-LDを確認して判定する
+    (URLが渡されない場合は、HTML内の保存元URLやcanonicalリンクを使用する)。
+    それでも判定できないページは、DOMを構築せずに空のリストを返す。
+    JSON-LDはDOMを構築せずにHTMLから直接抽出し (`scan_json_ld`)、DOMは解析用に1回だけ構築する。
+
+    Args:
+        html_content: 解析するHTML (文字列または未デコードのバイト列)。
+        url: ページのURL。省略した場合はHTML内の保存元URLなどを使用する。
+        engine: 商品一覧ページの解析エンジン ("bs4", "lxml" または "stream")。
+            商品詳細ページは常にBeautifulSoupで解析する。
+        validate: Falseの場合、商品一覧ページのアイテムのPydantic検証を省略する。
+        prefilter: Trueの場合、DOMの構築前に script / style / svg 要素の中身を取り除く
+            (`parser_base.prefilter_html`)。ページタイプの判定には元のHTMLを使用する。
+    """
+    check_engine(engine)
+    if not html_content:
+        return []
+
+    with stage("sniff"):
+        sniffer = PageTypeSniffer(url)
+        page_type = sniffer.feed(html_content.encode("utf-8") if isinstance(html_content, str) else html_content)
+    # URLが渡されない場合は、HTML内で見つかった保存元URLやcanonicalリンクを使用する
+    page_url = url or sniffer.url
+    if page_type == PageType.UNKNOWN and page_url:
+        # JSON-LDはDOMを構築せずに確認する
+        page_type = get_page_type(html_content, page_url)
+    if page_type == PageType.UNKNOWN:
+        # 対応するパーサーがないため、DOMを構築せずに終了する
+        return []
+
+    if engine == "stream" and page_type in _STREAM_PARSERS:
+        return list(_STREAM_PARSERS[page_type](stream_engine.iter_chunks(html_content), validate))
+    if engine == "lxml" and page_type in _LXML_TREE_PARSERS:
+        tree = lxml_engine.build_tree(html_content, prefilter)
+        return _LXML_TREE_PARSERS[page_type](tree, validate) if tree is not None else []
+
+    json_ld = scan_json_ld(html_content) if page_type == PageType.PRODUCT_DETAIL else None
+    return parse_soup_as(make_soup(html_content, prefilter), page_type, validate, json_ld)
+
+
+def parse_from_string(html_content: HtmlInput, engine: str = "bs4", validate: bool = True, prefilter: bool = False) -> List[AnyItem]:
+    """
+    HTML文字列のページタイプを自動判定して解析し、商品情報のリストを返す。
+    """
+    return parse_any(html_content, engine=engine, validate=validate, prefilter=prefilter)
+
+
+def parse_from_bytes(html_bytes: bytes, engine: str = "bs4", validate: bool = True, prefilter: bool = False) -> List[AnyItem]:
+    """
+    未デコードのHTMLバイト列のページタイプを自動判定して解析し、商品情報のリストを返す。
+    """
+    return parse_any(html_bytes, engine=engine, validate=validate, prefilter=prefilter)
+
+
+def parse_from_file(filepath: str, engine: str = "bs4", validate: bool = True, prefilter: bool = False) -> List[AnyItem]:
+    """
+    指定されたパスのHTMLファイルを読み込み、ページタイプを自動判定して商品情報のリストを返す。
+    """
+    try:
+        with stage("read"), open_html(filepath) as f:
+            html_bytes = f.read()
+        return parse_any(html_bytes, engine=engine, validate=validate, prefilter=prefilter)
+    except FileNotFoundError:
+        raise
+    except Exception as e:
+        raise ParserError(f"Error reading or parsing file {filepath}: {e}")
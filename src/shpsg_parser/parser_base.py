@@ -3,17 +3,361 @@
 """
 import re
 import os
+import json
+import codecs
+import functools
 from urllib.parse import urljoin
-from typing import Optional
+from typing import Any, Dict, Iterable, List, Optional, Type, TypeVar, Union
+
+from bs4 import BeautifulSoup
+from pydantic import BaseModel, HttpUrl, TypeAdapter, ValidationError
+
+from .instrumentation import count, stage
+# 価格・販売数・評価の抽出は `numeric` モジュールで行う (従来の名前で公開する)
+from .numeric import (
+    parse_price as extract_price,
+    parse_rating as extract_rating,
+    parse_sold as extract_sold,
+)
+
+try:
+    # 高速なJSONデコーダー (オプション: pip install 'shpsg-parser[fast-json]')
+    import orjson
+except ImportError:
+    orjson = None
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
 
 BASE_URL = "https://shopee.sg"
 
+# URLの正規化と検証の結果をキャッシュする件数
+# (同じショップ、画像のCDN、商品のURLは、クロール全体で繰り返し現れる)
+URL_CACHE_SIZE = 8192
+
+# パーサーが受け付けるHTMLの型 (デコード済みの文字列、または未デコードのバイト列)
+HtmlInput = Union[str, bytes]
+
+# 利用できる解析エンジン
+# "bs4": BeautifulSoup (既定)、"lxml": lxml.html とXPath (商品一覧ページのみ)、
+# "stream": HTMLを少しずつ読み込み、商品コンテナごとに解析する lxml の HTMLPullParser (商品一覧ページのみ)
+ENGINES = ("bs4", "lxml", "stream")
+
+# 文字コードの宣言 (`<meta charset>` など) を探す範囲 (先頭からのバイト数)
+ENCODING_SNIFF_BYTES = 4096
+
+# 文字コードの宣言が見つからない場合に使用する文字コード
+DEFAULT_ENCODING = "utf-8"
+
+# `<meta charset="...">` と `<meta http-equiv="Content-Type" content="...; charset=...">` の両方に一致する
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([A-Za-z0-9._:-]+)""", re.IGNORECASE)
+
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+# JSON-LDの先頭に置かれることがあるHTML/JavaScriptのコメント行
+_JSON_LD_COMMENT_LINE = re.compile(r"^\s*(//.*|<!--.*-->)", re.MULTILINE)
+
+# JSON-LDのスクリプトのtype属性の値 (DOMの `find_all(type=...)` と同じく大文字と小文字を区別する)
+_JSON_LD_TYPE = b"application/ld+json"
+
+# JSON-LDのスクリプトの開始タグ (属性の順序や引用符の有無を問わない)
+_JSON_LD_SCRIPT_TAG = re.compile(
+    rb"""<script\b[^<>]*?\btype\s*=\s*["']?application/ld\+json["']?(?=[\s/>])[^<>]*>""",
+    re.IGNORECASE,
+)
+
+# DOMの構築前に中身を取り除く要素の開始タグと終了タグ (`prefilter_html` を参照)
+# コメントは1つの字句として読み飛ばし (閉じられていない場合は末尾まで)、
+# 開始タグの引用符で囲まれた属性値に含まれる ">" ではタグを終了しない
+# (閉じられていないタグでバックトラックが増えないよう、独占的な量指定子を使う)
+_PREFILTER_OPEN_TAG = re.compile(
+    rb"""<(?:!--(?:.*?-->|.*)|(script|style|svg)\b(?:"[^"]*"|'[^']*'|[^"'>]++)*+>)""",
+    re.IGNORECASE | re.DOTALL,
+)
+_PREFILTER_JSON_LD_TYPE = re.compile(rb"""\btype\s*=\s*["']?application/ld\+json["']?(?=[\s/>])""", re.IGNORECASE)
+_PREFILTER_CLOSE_TAGS = {
+    name: re.compile(b"</" + name, re.IGNORECASE) for name in (b"script", b"style", b"svg")
+}
+
 class ParserError(Exception):
     """
     解析中に回復不能なエラーが発生した場合に送出されるカスタム例外
     """
     pass
 
+def check_engine(engine: str) -> None:
+    """
+    解析エンジンの名前を検証する。
+
+    Raises:
+        ValueError: 未対応のエンジンが指定された場合。
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unsupported engine: {engine} (expected one of {', '.join(ENGINES)})")
+
+
+def build_item(model: Type[ModelT], data: Dict[str, Any], validate: bool = True) -> ModelT:
+    """
+    抽出したデータからモデルのインスタンスを生成する。
+    `validate=False` の場合は、モデルに対応する軽量なレコード型 (例: ProductBasicRecord) を
+    検証と型変換なしで生成する。URLなどのフィールドには抽出した文字列がそのまま格納される。
+    大量のページを解析する場合は、`validate_items` でまとめて検証できる。
+    """
+    if validate:
+        with stage("validate"):
+            url_fields = _url_fields(model)
+            if url_fields:
+                data = dict(data)
+                for name in url_fields:
+                    value = data.get(name)
+                    if not isinstance(value, str):
+                        continue
+                    try:
+                        data[name] = to_http_url(value)
+                    except ValidationError:
+                        # 不正なURLは、フィールド名を含むモデルの検証エラーとして送出させる
+                        pass
+            return model(**data)
+    record_type = _record_types().get(model)
+    if record_type is None:
+        return model.model_construct(**data)
+    return record_type(**data)
+
+
+def validate_items(items: List[Any]) -> List[BaseModel]:
+    """
+    `validate=False` で生成したレコードを、モデルごとにまとめて検証する。
+    一括検証に失敗した場合は1件ずつ検証し、不正なアイテムは除外する。
+    """
+    if not items:
+        return []
+
+    item_type = type(items[0])
+    if any(type(item) is not item_type for item in items):
+        # 複数の型が混在する場合は1件ずつ検証する
+        return [validated for item in items for validated in validate_items([item])]
+
+    model = _record_models().get(item_type, item_type)
+    with stage("validate"):
+        try:
+            return _list_adapter(model).validate_python(items, from_attributes=True)
+        except ValidationError:
+            pass
+
+        validated = []
+        for item in items:
+            try:
+                validated.append(model.model_validate(item, from_attributes=True))
+            except ValidationError as e:
+                count("errors.validation")
+                print(f"Error validating item '{getattr(item, 'product_name', None)}': {e}")
+        return validated
+
+
+_LIST_ADAPTERS: Dict[type, TypeAdapter] = {}
+
+
+def _list_adapter(model: Type[ModelT]) -> TypeAdapter:
+    """モデルのリストを検証するTypeAdapterを返す (生成コストが高いため再利用する)"""
+    adapter = _LIST_ADAPTERS.get(model)
+    if adapter is None:
+        adapter = _LIST_ADAPTERS[model] = TypeAdapter(List[model])
+    return adapter
+
+
+_URL_FIELDS: Dict[type, List[str]] = {}
+
+
+def _url_fields(model: Type[BaseModel]) -> List[str]:
+    """モデルの `HttpUrl` 型のフィールド名のリストを返す"""
+    fields = _URL_FIELDS.get(model)
+    if fields is None:
+        fields = _URL_FIELDS[model] = [
+            name for name, field in model.model_fields.items() if field.annotation is HttpUrl
+        ]
+    return fields
+
+
+def _record_types() -> Dict[type, type]:
+    """モデルと、検証を省略する場合の軽量なレコード型の対応表"""
+    from .models import ProductBasicItem, ProductBasicRecord
+    return {ProductBasicItem: ProductBasicRecord}
+
+
+def _record_models() -> Dict[type, type]:
+    """軽量なレコード型と、検証後のモデルの対応表"""
+    return {record_type: model for model, record_type in _record_types().items()}
+
+
+def detect_encoding(html_bytes: bytes) -> str:
+    """
+    HTMLのバイト列の文字コードを、BOMまたは先頭付近の `<meta>` タグの宣言から判定する。
+    宣言がない場合や、未知の文字コードが宣言されている場合は `DEFAULT_ENCODING` を返す。
+    """
+    for bom, encoding in _BOMS:
+        if html_bytes.startswith(bom):
+            return encoding
+    match = _META_CHARSET.search(html_bytes, 0, ENCODING_SNIFF_BYTES)
+    if match:
+        try:
+            return codecs.lookup(match.group(1).decode("ascii")).name
+        except LookupError:
+            pass
+    return DEFAULT_ENCODING
+
+
+def decode_html(html: HtmlInput) -> str:
+    """
+    HTMLのバイト列を、判定した文字コードで文字列にデコードする (文字列はそのまま返す)。
+    不正なバイトは置換文字に置き換える。
+    """
+    if isinstance(html, str):
+        return html
+    return codecs.decode(html, detect_encoding(html), "replace")
+
+
+def prefilter_html(html: HtmlInput) -> HtmlInput:
+    """
+    DOMを構築する前に、パーサーが参照しない script / style / svg 要素の中身を取り除く。
+    保存したページの半分近くはインラインのスクリプト・スタイル・SVGアイコンのため、
+    DOMの構築にかかる時間とメモリを削減できる。
+
+    要素そのもの (タグ名と属性) は残すため、兄弟要素の位置やsvgのクラス名
+    (商品詳細ページのレビューの星の数など) を使う処理には影響しない。
+    JSON-LDのスクリプトは中身も含めてそのまま残す。
+    """
+    if isinstance(html, str):
+        return prefilter_html(html.encode("utf-8")).decode("utf-8")
+
+    with stage("prefilter"):
+        parts = []
+        start = pos = 0
+        while True:
+            match = _PREFILTER_OPEN_TAG.search(html, pos)
+            if match is None:
+                break
+            if match.group(1) is None:
+                # コメント
+                pos = match.end()
+                continue
+            name = match.group(1).lower()
+            if name == b"svg" and match.group(0).endswith(b"/>"):
+                # 中身のないsvg要素
+                pos = match.end()
+                continue
+            # 中身は最初の終了タグまで (HTMLの字句解析と同じ規則)
+            close = _PREFILTER_CLOSE_TAGS[name].search(html, match.end())
+            if close is None:
+                break
+            if name != b"script" or not _PREFILTER_JSON_LD_TYPE.search(match.group(0)):
+                parts.append(html[start:match.end()])
+                start = close.start()
+            pos = close.end()
+        if not parts:
+            return html
+        parts.append(html[start:])
+        return b"".join(parts)
+
+
+def make_soup(html: HtmlInput, prefilter: bool = False) -> BeautifulSoup:
+    """
+    HTMLを解析してBeautifulSoupオブジェクトを生成する。
+    生成したオブジェクトは、ページタイプ判定・JSON-LD抽出・各パーサーの
+    `parse_from_soup` で共有できるため、1ファイルにつき1回だけ構築すればよい。
+    バイト列を渡した場合、文字コードは `detect_encoding` で判定してデコードする
+    (BeautifulSoupによる文字コードの推測よりも速い)。
+    `prefilter=True` の場合は、構築前に `prefilter_html` で不要な要素の中身を取り除く。
+    """
+    if prefilter:
+        html = prefilter_html(html)
+    with stage("tree"):
+        return BeautifulSoup(decode_html(html), "lxml")
+
+
+def parse_json_ld_texts(texts: Iterable[str]) -> List[Dict[str, Any]]:
+    """
+    `application/ld+json` スクリプトの本文の列を解析し、JSON-LDオブジェクトのリストを返す。
+    スクリプトがリストの場合は展開し、解析できないスクリプトは無視する。
+    """
+    objects = []
+    for text in texts:
+        try:
+            data = _loads_json(text)
+        except ValueError:
+            # 先頭にコメントが含まれていてJSONとして解析できない場合がある
+            try:
+                data = _loads_json(_JSON_LD_COMMENT_LINE.sub("", text))
+            except ValueError:
+                count("errors.json_ld")
+                continue
+            count("json_ld.comment_stripped")
+        if isinstance(data, list):
+            objects.extend(item for item in data if isinstance(item, dict) and item)
+        elif isinstance(data, dict) and data:
+            objects.append(data)
+    return objects
+
+
+def _loads_json(text: str) -> Any:
+    """
+    JSONを解析する。orjsonがインストールされている場合はorjsonを使用し、
+    文字列中の改行など、`json.loads(strict=False)` でしか読めない場合は標準のjsonで読み直す。
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(text, strict=False)
+
+
+def extract_json_ld(soup: BeautifulSoup) -> List[Dict[str, Any]]:
+    """
+    解析済みのHTMLから `application/ld+json` のスクリプトを読み取り、
+    JSON-LDオブジェクトのリストを返す。
+    """
+    with stage("json_ld"):
+        return parse_json_ld_texts(
+            script.get_text() for script in soup.find_all("script", type="application/ld+json")
+        )
+
+
+def scan_json_ld(html: HtmlInput) -> List[Dict[str, Any]]:
+    """
+    DOMを構築せずに、HTMLから `application/ld+json` のスクリプトの本文だけを探して
+    JSON-LDオブジェクトのリストを返す (`extract_json_ld` と同じ結果)。
+    ページ全体を解析し直す必要がないため、DOMを持たない場合のJSON-LDの確認に使用する。
+    """
+    if isinstance(html, str):
+        data, encoding = html.encode("utf-8"), "utf-8"
+    else:
+        data, encoding = html, detect_encoding(html)
+
+    with stage("json_ld"):
+        texts = []
+        pos = 0
+        while True:
+            hit = data.find(_JSON_LD_TYPE, pos)
+            if hit < 0:
+                break
+            pos = hit + len(_JSON_LD_TYPE)
+            tag_start = data.rfind(b"<", 0, hit)
+            tag_end = data.find(b">", hit)
+            if tag_start < 0 or tag_end < 0 or not _JSON_LD_SCRIPT_TAG.match(data, tag_start, tag_end + 1):
+                continue
+            # スクリプトの本文は、最初の終了タグまで (HTMLの字句解析と同じ規則)
+            body_end = data.find(b"</script", tag_end)
+            if body_end < 0:
+                body_end = len(data)
+            texts.append(codecs.decode(data[tag_end + 1:body_end], encoding, "replace"))
+            pos = body_end
+        return parse_json_ld_texts(texts)
+
+
+@functools.lru_cache(maxsize=URL_CACHE_SIZE)
 def to_absolute_url(url: str) -> str:
     """
     相対URLを絶対URLに変換する。
@@ -21,8 +365,13 @@ def to_absolute_url(url: str) -> str:
     """
     if not url or url.startswith('http'):
         return url
+    # 商品の "/{商品名}-i.{shop_id}.{item_id}" のようなルート相対パスは、urljoinを使わずに結合する
+    # (urljoinが正規化する "." や ".." のセグメントを含む場合を除く)
+    if url[0] == '/' and not url.startswith('//') and '/.' not in url:
+        return BASE_URL + url
     return urljoin(BASE_URL, url)
 
+@functools.lru_cache(maxsize=URL_CACHE_SIZE)
 def to_absolute_image_url(url: str) -> str:
     """
     画像用の相対URLを絶対URLに変換する。
@@ -42,57 +391,13 @@ def to_absolute_image_url(url: str) -> str:
 
     return f"https://down-sg.img.susercontent.com/file/{filename}"
 
-def extract_price(price_str: str) -> float:
-    """価格文字列から数値のみを抽出する"""
-    if not price_str:
-        return 0.0
-    # " - " で区切られている範囲価格の場合、低い方の価格を取得
-    price_str = price_str.split('-')[0].strip()
-    match = re.search(r'[\d,.]+', price_str)
-    if match:
-        return float(match.group(0).replace(',', ''))
-    return 0.0
-
-def extract_sold(sold_str: str) -> int:
-    """販売数文字列から数値を抽出する"""
-    if not sold_str:
-        return 0
-
-    value_str = sold_str.lower().replace('sold/month', '').replace('sold', '').strip()
-    multiplier = 1
-
-    if 'k' in value_str:
-        multiplier = 1000
-        value_str = value_str.replace('k', '').strip()
-    elif 'm' in value_str:
-        multiplier = 1000000
-        value_str = value_str.replace('m', '').strip()
-
-    try:
-        numeric_part = re.search(r'[\d.]+', value_str)
-        if numeric_part:
-            return int(float(numeric_part.group(0)) * multiplier)
-    except (ValueError, TypeError):
-        return 0
-    return 0
-
-
-def extract_rating(rating_str: Optional[str]) -> Optional[float]:
+@functools.lru_cache(maxsize=URL_CACHE_SIZE)
+def to_http_url(url: str) -> HttpUrl:
     """
-    評価文字列から評価値を抽出し、浮動小数点数として返す。
-    抽出できない場合はNoneを返す。
-    """
-    if not rating_str:
-        return None
+    URLを検証し、`HttpUrl` のオブジェクトを返す。
+    モデルのフィールドに渡すと、Pydanticは文字列の場合と異なりURLを再び解析しない。
 
-    # 正規表現で数値（小数を含む）を検索
-    match = re.search(r'[\d.]+', rating_str)
-    if match:
-        try:
-            # 抽出した文字列を浮動小数点数に変換
-            return float(match.group(0))
-        except (ValueError, TypeError):
-            # 変換に失敗した場合はNoneを返す
-            return None
-
-    return None
+    Raises:
+        ValidationError: 不正なURLの場合 (結果はキャッシュされない)。
+    """
+    return HttpUrl(url)
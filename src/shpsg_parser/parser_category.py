@@ -1,60 +1,73 @@
 """
 カテゴリページのHTMLパーサー
 """
-from typing import List
-import re
-import json
+from typing import Any, Dict, Iterator, List, Optional
 from bs4 import BeautifulSoup
 from pydantic import ValidationError
 
+from . import lxml_engine, stream_engine
+from .discovery import open_html
+from .instrumentation import count, extractor, stage
 from .models import ProductBasicItem
 from .parser_base import (
+    HtmlInput,
     ParserError,
+    check_engine,
+    build_item,
+    make_soup,
+    extract_json_ld,
     to_absolute_url,
     to_absolute_image_url,
     extract_price,
     extract_sold,
     extract_rating,
 )
+from .selector_plan import (
+    CATEGORY_ITEM_CONTAINERS,
+    collect_item_elements,
+    select_item_containers,
+)
 
 
-def parse_from_file(filepath: str) -> List[ProductBasicItem]:
+def parse_from_file(filepath: str, engine: str = "bs4", validate: bool = True, prefilter: bool = False) -> List[ProductBasicItem]:
     """
     指定されたパスのHTMLファイルを読み込み、商品情報のリストを返す。
+    `engine="lxml"` を指定すると、BeautifulSoupを使わずにlxmlとXPathで解析する。
+    `engine="stream"` を指定すると、ファイル全体を読み込まずに少しずつパーサーへ渡して解析する。
+    `prefilter=True` を指定すると、DOMの構築前に script / style / svg 要素の中身を取り除く。
+    """
+    return list(iter_from_file(filepath, engine=engine, validate=validate, prefilter=prefilter))
+
+
+def iter_from_file(filepath: str, engine: str = "bs4", validate: bool = True, prefilter: bool = False) -> Iterator[ProductBasicItem]:
+    """
+    指定されたパスのHTMLファイルを解析し、商品情報を1件ずつ返すイテレーター。
+    引数は `parse_from_file` と同じ。
     """
     try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            html_content = f.read()
-        return parse_from_string(html_content)
+        if engine == "stream":
+            yield from stream_engine.iter_category_items(stream_engine.iter_file_chunks(filepath), validate)
+            return
+        # デコードせずにバイト列のまま渡す (文字コードは <meta> タグから判定する)
+        with stage("read"), open_html(filepath) as f:
+            html_bytes = f.read()
+        yield from iter_from_string(html_bytes, engine=engine, validate=validate, prefilter=prefilter)
     except FileNotFoundError:
         raise
     except Exception as e:
         raise ParserError(f"Error reading or parsing file {filepath}: {e}")
 
 
-def _parse_item_page(soup: BeautifulSoup) -> List[ProductBasicItem]:
-    """商品詳細ページのHTMLを解析する"""
-    json_ld_scripts = soup.find_all("script", type="application/ld+json")
-    if not json_ld_scripts:
-        return []
-
-    product_json_ld = None
-    for script in json_ld_scripts:
-        if not script.string:
-            continue
-        try:
-            data = json.loads(script.string)
-            if isinstance(data, list):
-                product_json_ld = next(
-                    (item for item in data if item.get("@type") == "Product"), None
-                )
-                if product_json_ld:
-                    break
-            elif isinstance(data, dict) and data.get("@type") == "Product":
-                product_json_ld = data
-                break
-        except json.JSONDecodeError:
-            continue
+def _parse_item_page(
+    soup: BeautifulSoup, validate: bool = True, json_ld: Optional[List[Dict[str, Any]]] = None
+) -> List[ProductBasicItem]:
+    """
+    商品詳細ページのHTMLを解析する。
+    `json_ld` を省略した場合は、解析済みのオブジェクトからJSON-LDを抽出する。
+    """
+    if json_ld is None:
+        json_ld = extract_json_ld(soup)
+    product_json_ld = next((item for item in json_ld if item.get("@type") == "Product"), None)
 
     if not product_json_ld:
         return []
@@ -90,37 +103,42 @@ def _parse_item_page(soup: BeautifulSoup) -> List[ProductBasicItem]:
             "page_type": "item",
             "rating": rating,
         }
-        return [ProductBasicItem(**product_data)]
+        return [build_item(ProductBasicItem, product_data, validate)]
     except (KeyError, IndexError, ValidationError) as e:
+        count("errors.item")
         print(f"Error processing item page: {e}")
         return []
 
 
-def _parse_category_page(
-    soup: BeautifulSoup
-) -> List[ProductBasicItem]:
+def _iter_category_page(
+    soup: BeautifulSoup, validate: bool = True
+) -> Iterator[ProductBasicItem]:
     """カテゴリページのHTMLを解析する"""
-    products = []
     # 商品アイテムのコンテナは 'div.col-xs-2-4' または 'li.shopee-search-item-result__item'
-    item_containers = soup.select("div.col-xs-2-4, li.shopee-search-item-result__item")
+    with stage("select"):
+        item_containers = select_item_containers(soup, CATEGORY_ITEM_CONTAINERS)
 
     for container in item_containers:
         try:
-            name_div = container.select_one("div.line-clamp-2")
+            # 抽出に必要な要素を、商品コンテナの1回の走査でまとめて収集する
+            with stage("select"):
+                elements = collect_item_elements(container)
+
+            name_div = elements.name_div
             name = name_div.get_text(separator=" ", strip=True) if name_div else ""
             if not name:
                 continue
 
-            a_tag = container.find("a", href=True)
+            a_tag = elements.link
             product_url = to_absolute_url(a_tag["href"]) if a_tag else ""
 
-            img_tag = container.find("img", alt=True)
+            img_tag = elements.img_with_alt
             image_url = to_absolute_image_url(img_tag["src"]) if img_tag and img_tag.has_attr("src") else ""
 
-            price_spans = container.select("div.flex.items-baseline span")
             price = 0.0
-            if len(price_spans) > 1:
-                price = extract_price(price_spans[1].text)
+            price_span = elements.price_span(1)
+            if price_span is not None:
+                price = extract_price(price_span.text)
 
             rating = None
             sold = 0
@@ -131,29 +149,33 @@ def _parse_category_page(
 
             # 【レート抽出】
             # パターン1: <img alt="rating-star-full"> の隣の <div>
-            rating_star_img = container.select_one('img[alt="rating-star-full"]')
+            rating_star_img = elements.rating_star_full_img
             if rating_star_img:
                 rating_div = rating_star_img.find_next_sibling('div')
                 if rating_div:
                     rating = extract_rating(rating_div.text)
+                    if rating is not None:
+                        count("rating.pattern1")
 
             # パターン2: <img alt="rating-star"> の隣の <span>
             if rating is None:
-                rating_star_img_alt = container.select_one('img[alt="rating-star"]')
+                rating_star_img_alt = elements.rating_star_img
                 if rating_star_img_alt:
                     rating_span = rating_star_img_alt.find_next_sibling('span')
                     if rating_span:
                         rating = extract_rating(rating_span.text)
+                        if rating is not None:
+                            count("rating.pattern2")
 
             # 【販売数抽出】
             # "sold" または "sold/month" を含むテキストを持つdivを探す
-            sold_div = container.find("div", string=re.compile(r"sold/month|sold", re.IGNORECASE))
+            sold_div = elements.sold_div
             if sold_div:
                 sold = extract_sold(sold_div.text)
 
             # 【配送国抽出】
             # 'location-icon' のalt属性を持つimgを探す
-            location_img = container.select_one('img[alt="location-icon"]')
+            location_img = elements.location_img
             if location_img:
                 # 親要素からテキストを取得する方が確実な場合がある
                 if location_img.parent and location_img.parent.get_text(strip=True):
@@ -163,6 +185,7 @@ def _parse_category_page(
                     location_span = location_img.find_next_sibling('span')
                     if location_span:
                         location = location_span.get_text(strip=True)
+                        count("location.sibling_span")
 
             # --- ▲▲▲ここまでが最終修正箇所▲▲▲ ---
 
@@ -181,26 +204,69 @@ def _parse_category_page(
             if rating is not None:
                 product_data['rating'] = rating
 
-            products.append(ProductBasicItem(**product_data))
+            item = build_item(ProductBasicItem, product_data, validate)
         except (ValidationError, Exception) as e:
+            count("errors.item")
             print(f"Error processing item '{name}': {e}")
             continue
-    return products
+        yield item
 
 
-def parse_from_string(html_content: str) -> List[ProductBasicItem]:
+@extractor("category")
+def iter_from_soup(
+    soup: BeautifulSoup, validate: bool = True, json_ld: Optional[List[Dict[str, Any]]] = None
+) -> Iterator[ProductBasicItem]:
+    """
+    解析済みのBeautifulSoupオブジェクトから、商品情報を1件ずつ返すイテレーター。
+    引数は `parse_from_soup` と同じ。
+    """
+    if soup.select("li.shopee-search-item-result__item"):
+        yield from _iter_category_page(soup, validate)
+    # Heuristic to detect item page. A product page has a div with a class like "page-product"
+    elif soup.select_one("div.page-product"):
+        yield from _parse_item_page(soup, validate, json_ld)
+
+
+def parse_from_soup(
+    soup: BeautifulSoup, validate: bool = True, json_ld: Optional[List[Dict[str, Any]]] = None
+) -> List[ProductBasicItem]:
+    """
+    解析済みのBeautifulSoupオブジェクトから商品情報のリストを返す。
+    `validate=False` の場合はPydanticの検証を省略する (`parser_base.build_item` を参照)。
+    `json_ld` は商品詳細ページの場合のみ使用する (`parser_base.scan_json_ld` で抽出済みのもの)。
+    """
+    return list(iter_from_soup(soup, validate, json_ld))
+
+
+def parse_from_string(html_content: HtmlInput, engine: str = "bs4", validate: bool = True, prefilter: bool = False) -> List[ProductBasicItem]:
     """
     HTML文字列を直接解析し、商品情報のリストを返す。
     """
+    return list(iter_from_string(html_content, engine=engine, validate=validate, prefilter=prefilter))
+
+
+def iter_from_string(html_content: HtmlInput, engine: str = "bs4", validate: bool = True, prefilter: bool = False) -> Iterator[ProductBasicItem]:
+    """
+    HTML文字列を解析し、商品情報を1件ずつ返すイテレーター。
+    bs4/lxmlエンジンではページ全体のDOMを構築してから、商品コンテナを1つずつ解析する。
+    """
+    check_engine(engine)
     if not html_content:
-        return []
+        return
 
-    soup = BeautifulSoup(html_content, "lxml")
+    if engine == "stream":
+        yield from stream_engine.iter_category_items(stream_engine.iter_chunks(html_content), validate)
+    elif engine == "lxml":
+        tree = lxml_engine.build_tree(html_content, prefilter)
+        if tree is not None:
+            yield from lxml_engine.iter_category_document(tree, validate)
+    else:
+        yield from iter_from_soup(make_soup(html_content, prefilter), validate)
 
-    if soup.select("li.shopee-search-item-result__item"):
-        return _parse_category_page(soup)
-    # Heuristic to detect item page. A product page has a div with a class like "page-product"
-    elif soup.select_one("div.page-product"):
-        return _parse_item_page(soup)
 
-    return []
+def parse_from_bytes(html_bytes: bytes, engine: str = "bs4", validate: bool = True, prefilter: bool = False) -> List[ProductBasicItem]:
+    """
+    未デコードのHTMLバイト列を解析し、商品情報のリストを返す。
+    文字コードは `<meta>` タグなどから判定される。
+    """
+    return parse_from_string(html_bytes, engine=engine, validate=validate, prefilter=prefilter)
@@ -2,12 +2,13 @@
 商品詳細ページのHTMLパーサー
 """
 from typing import Optional, List, Dict, Any
-import extruct
 from bs4 import BeautifulSoup
-from pydantic import ValidationError, HttpUrl
+from pydantic import ValidationError
 
+from .discovery import open_html
+from .instrumentation import count, extractor, stage
 from .models_product import ProductDetailItem, ProductRating, ShippingInfo
-from .parser_base import ParserError, to_absolute_url
+from .parser_base import HtmlInput, ParserError, make_soup, extract_json_ld, scan_json_ld, to_absolute_url, to_http_url
 
 def _extract_shipping_info(soup: BeautifulSoup) -> Optional[ShippingInfo]:
     """配送情報を抽出し、ShippingInfoオブジェクトとして返す"""
@@ -99,27 +100,23 @@ def _extract_variations(soup: BeautifulSoup) -> List[Dict[str, Any]]:
     return variations
 
 
-def parse_from_string(html_content: str) -> Optional[ProductDetailItem]:
+@extractor("product")
+def parse_from_soup(
+    soup: BeautifulSoup, json_ld: Optional[List[Dict[str, Any]]] = None
+) -> Optional[ProductDetailItem]:
     """
-    HTML文字列を直接解析し、商品情報の詳細を返す。
+    解析済みのBeautifulSoupオブジェクトから商品情報の詳細を返す。
+    `json_ld` に `scan_json_ld` で抽出済みのJSON-LDを渡した場合はそれを使用し、
+    省略した場合は同じオブジェクトから抽出する (いずれもHTMLの再解析は行わない)。
     """
-    if not html_content:
+    # 1. JSON-LDデータを抽出
+    if json_ld is None:
+        json_ld = extract_json_ld(soup)
+    product_data_list = [item for item in json_ld if item.get('@type') == 'Product']
+    if not product_data_list:
+        count("json_ld.product_missing")
         return None
-
-    soup = BeautifulSoup(html_content, "lxml")
-
-    # 1. extructでJSON-LDデータを抽出
-    try:
-        data = extruct.extract(html_content, syntaxes=['json-ld'], uniform=True)
-        product_data_list = [item for item in data.get('json-ld', []) if item.get('@type') == 'Product']
-        if not product_data_list:
-            # print("DEBUG: No JSON-LD product data found.")
-            return None
-        json_ld = product_data_list[0]
-        # print(f"DEBUG: Found JSON-LD: {json_ld}")
-    except Exception as e:
-        # print(f"DEBUG: extruct failed: {e}")
-        return None # extructが失敗した場合
+    json_ld = product_data_list[0]
 
     try:
         # 2. JSON-LDから基本情報を取得
@@ -180,48 +177,77 @@ def parse_from_string(html_content: str) -> Optional[ProductDetailItem]:
         shopping_guarantee = shopping_guarantee_element.get_text(strip=True) if shopping_guarantee_element else None
 
 
+        detailed_ratings = _extract_detailed_ratings(soup)
+        specifications = _extract_specifications(soup)
+        variations = _extract_variations(soup)
+        shipping_info = _extract_shipping_info(soup)
+
         # 4. ProductDetailItemモデルにマッピング
-        item = ProductDetailItem(
-            product_id=json_ld.get("productID"),
-            product_name=json_ld.get("name"),
-            product_description=json_ld.get("description"),
-            price=float(offers.get("price")) if offers.get("price") else None,
-            original_price=None, # サンプルに元価格がないためNone
-            currency=offers.get("priceCurrency"),
-            product_url=HttpUrl(product_url_str),
-            image_urls=[HttpUrl(url) for url in image_urls],
-            quantity=quantity,
-            rating=float(aggregate_rating.get("ratingValue")) if aggregate_rating.get("ratingValue") else None,
-            rating_count=int(aggregate_rating.get("ratingCount")) if aggregate_rating.get("ratingCount") else None,
-            sold=sold_count,
-            detailed_ratings=_extract_detailed_ratings(soup),
-            shop_id=shop_id,
-            shop_name=seller.get("name"),
-            shop_url=HttpUrl(shop_url) if shop_url else None,
-            specifications=_extract_specifications(soup),
-            variations=_extract_variations(soup),
-            shipping_info=_extract_shipping_info(soup),
-            shopping_guarantee=shopping_guarantee,
-        )
+        with stage("validate"):
+            item = ProductDetailItem(
+                product_id=json_ld.get("productID"),
+                product_name=json_ld.get("name"),
+                product_description=json_ld.get("description"),
+                price=float(offers.get("price")) if offers.get("price") else None,
+                original_price=None, # サンプルに元価格がないためNone
+                currency=offers.get("priceCurrency"),
+                product_url=to_http_url(product_url_str),
+                image_urls=[to_http_url(url) for url in image_urls],
+                quantity=quantity,
+                rating=float(aggregate_rating.get("ratingValue")) if aggregate_rating.get("ratingValue") else None,
+                rating_count=int(aggregate_rating.get("ratingCount")) if aggregate_rating.get("ratingCount") else None,
+                sold=sold_count,
+                detailed_ratings=detailed_ratings,
+                shop_id=shop_id,
+                shop_name=seller.get("name"),
+                shop_url=to_http_url(shop_url) if shop_url else None,
+                specifications=specifications,
+                variations=variations,
+                shipping_info=shipping_info,
+                shopping_guarantee=shopping_guarantee,
+            )
         return item
 
     except (ValidationError, KeyError, TypeError, AttributeError, ValueError) as e:
         # Pydanticのバリデーションエラーやキーエラーは、構造が期待と異なることを示す
         # この場合、製品ページではないか、構造が大幅に変更された可能性があるためNoneを返す
+        count("errors.item")
         # import traceback
         # print(f"DEBUG: Parsing failed in the final block: {e}")
         # print(traceback.format_exc())
         return None
 
 
-def parse_from_file(filepath: str) -> Optional[ProductDetailItem]:
+def parse_from_string(html_content: HtmlInput, prefilter: bool = False) -> Optional[ProductDetailItem]:
+    """
+    HTML文字列を直接解析し、商品情報の詳細を返す。
+    `prefilter=True` の場合、DOMの構築前に script / style / svg 要素の中身を取り除く
+    (svg要素の属性は残るため、レビューの星の数は変わらない)。
+    """
+    if not html_content:
+        return None
+
+    # JSON-LDはDOMを走査せずにHTMLから直接抽出する
+    return parse_from_soup(make_soup(html_content, prefilter), scan_json_ld(html_content))
+
+
+def parse_from_bytes(html_bytes: bytes, prefilter: bool = False) -> Optional[ProductDetailItem]:
+    """
+    未デコードのHTMLバイト列を解析し、商品情報の詳細を返す。
+    文字コードは `<meta>` タグなどから判定される。
+    """
+    return parse_from_string(html_bytes, prefilter=prefilter)
+
+
+def parse_from_file(filepath: str, prefilter: bool = False) -> Optional[ProductDetailItem]:
     """
     指定されたパスのHTMLファイルを読み込み、商品情報の詳細を返す。
     """
     try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            html_content = f.read()
-        return parse_from_string(html_content)
+        # デコードせずにバイト列のまま渡す (文字コードは <meta> タグから判定する)
+        with stage("read"), open_html(filepath) as f:
+            html_bytes = f.read()
+        return parse_from_bytes(html_bytes, prefilter=prefilter)
     except FileNotFoundError:
         raise
     except Exception as e:
@@ -1,68 +1,98 @@
 """
 キーワード検索結果ページのHTMLパーサー
 """
-from typing import List
-import re
+from typing import Iterator, List
 from bs4 import BeautifulSoup, Tag
 from pydantic import ValidationError
 
+from . import lxml_engine, stream_engine
+from .discovery import open_html
+from .instrumentation import count, extractor, stage
 from .models import ProductBasicItem
 from .parser_base import (
+    HtmlInput,
     ParserError,
+    check_engine,
+    build_item,
+    make_soup,
     to_absolute_url,
     to_absolute_image_url,
     extract_price,
     extract_sold,
     extract_rating,
 )
+from .selector_plan import (
+    SEARCH_ITEM_CONTAINERS,
+    collect_item_elements,
+    select_item_containers,
+)
 
-def parse_from_file(filepath: str) -> List[ProductBasicItem]:
+def parse_from_file(filepath: str, engine: str = "bs4", validate: bool = True, prefilter: bool = False) -> List[ProductBasicItem]:
     """
     指定されたパスのHTMLファイルを読み込み、商品情報のリストを返す。
+    `engine="lxml"` を指定すると、BeautifulSoupを使わずにlxmlとXPathで解析する。
+    `engine="stream"` を指定すると、ファイル全体を読み込まずに少しずつパーサーへ渡して解析する。
+    `prefilter=True` を指定すると、DOMの構築前に script / style / svg 要素の中身を取り除く。
+    """
+    return list(iter_from_file(filepath, engine=engine, validate=validate, prefilter=prefilter))
+
+def iter_from_file(filepath: str, engine: str = "bs4", validate: bool = True, prefilter: bool = False) -> Iterator[ProductBasicItem]:
+    """
+    指定されたパスのHTMLファイルを解析し、商品情報を1件ずつ返すイテレーター。
+    引数は `parse_from_file` と同じ。
     """
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        return parse_from_string(html_content)
+        if engine == "stream":
+            yield from stream_engine.iter_search_items(stream_engine.iter_file_chunks(filepath), validate)
+            return
+        # デコードせずにバイト列のまま渡す (文字コードは <meta> タグから判定する)
+        with stage("read"), open_html(filepath) as f:
+            html_bytes = f.read()
+        yield from iter_from_string(html_bytes, engine=engine, validate=validate, prefilter=prefilter)
     except FileNotFoundError:
         raise
     except Exception as e:
         raise ParserError(f"Error reading or parsing file {filepath}: {e}")
 
-def _parse_search_page_by_scraping(soup: BeautifulSoup) -> List[ProductBasicItem]:
+def _iter_search_page_by_scraping(soup: BeautifulSoup, validate: bool = True) -> Iterator[ProductBasicItem]:
     """
     BeautifulSoupを使用してキーワード検索結果ページをスクレイピングする。
     """
-    products = []
-    item_containers = soup.select('li.shopee-search-item-result__item')
+    with stage("select"):
+        item_containers = select_item_containers(soup, SEARCH_ITEM_CONTAINERS)
 
     for container in item_containers:
         if not isinstance(container, Tag):
             continue
 
         try:
-            name_div = container.select_one('div.line-clamp-2')
+            # 抽出に必要な要素を、商品コンテナの1回の走査でまとめて収集する
+            with stage("select"):
+                elements = collect_item_elements(container)
+
+            name_div = elements.name_div
             name = name_div.get_text(strip=True) if name_div else ''
             if not name:
                 continue
 
-            a_tag = container.find('a', href=True)
+            a_tag = elements.link
             product_url = to_absolute_url(a_tag['href']) if a_tag else ''
 
-            img_tag = container.select_one('img[src]')
+            img_tag = elements.img_with_src
             image_url = to_absolute_image_url(img_tag['src']) if img_tag and img_tag.has_attr('src') else ''
 
             price = 0.0
-            price_dollar_span = container.find("span", string="$")
+            price_dollar_span = elements.dollar_span
             if price_dollar_span:
                 price_value_span = price_dollar_span.find_next_sibling("span")
                 if price_value_span:
                     price = extract_price(price_value_span.text)
 
             if price == 0.0:
-                price_div = container.select_one("div[class*='_3_FVSo']")
+                price_div = elements.fallback_price_div
                 if price_div:
                     price = extract_price(price_div.text)
+                    count("price.fallback_3_FVSo")
 
             rating = None
             sold = 0
@@ -71,26 +101,30 @@ def _parse_search_page_by_scraping(soup: BeautifulSoup) -> List[ProductBasicItem
             # 複数のHTML構造パターンに対応するため、各情報を個別に探索する
 
             # 【レート抽出】
-            rating_star_img = container.select_one('img[alt="rating-star-full"]')
+            rating_star_img = elements.rating_star_full_img
             if rating_star_img:
                 rating_div = rating_star_img.find_next_sibling('div')
                 if rating_div:
                     rating = extract_rating(rating_div.text)
+                    if rating is not None:
+                        count("rating.pattern1")
 
             if rating is None:
-                rating_star_img_alt = container.select_one('img[alt="rating-star"]')
+                rating_star_img_alt = elements.rating_star_img
                 if rating_star_img_alt:
                     rating_span = rating_star_img_alt.find_next_sibling('span')
                     if rating_span:
                         rating = extract_rating(rating_span.text)
+                        if rating is not None:
+                            count("rating.pattern2")
 
             # 【販売数抽出】
-            sold_div = container.find("div", string=re.compile(r"sold/month|sold", re.IGNORECASE))
+            sold_div = elements.sold_div
             if sold_div:
                 sold = extract_sold(sold_div.text)
 
             # 【配送国抽出】
-            location_img = container.select_one('img[alt="location-icon"]')
+            location_img = elements.location_img
             if location_img:
                 if location_img.parent and location_img.parent.get_text(strip=True):
                     location = location_img.parent.get_text(strip=True)
@@ -98,6 +132,7 @@ def _parse_search_page_by_scraping(soup: BeautifulSoup) -> List[ProductBasicItem
                     location_span = location_img.find_next_sibling('span')
                     if location_span:
                         location = location_span.get_text(strip=True)
+                        count("location.sibling_span")
 
             product_data = {
                 "product_name": name,
@@ -113,20 +148,54 @@ def _parse_search_page_by_scraping(soup: BeautifulSoup) -> List[ProductBasicItem
             if rating is not None:
                 product_data['rating'] = rating
 
-            products.append(ProductBasicItem(**product_data))
+            item = build_item(ProductBasicItem, product_data, validate)
         except (ValidationError, Exception) as e:
+            count("errors.item")
             print(f"Error processing item '{name}': {e}")
             continue
+        yield item
+
+@extractor("search")
+def iter_from_soup(soup: BeautifulSoup, validate: bool = True) -> Iterator[ProductBasicItem]:
+    """
+    解析済みのキーワード検索結果ページのBeautifulSoupオブジェクトから、商品情報を1件ずつ返すイテレーター。
+    """
+    yield from _iter_search_page_by_scraping(soup, validate)
 
-    return products
+def parse_from_soup(soup: BeautifulSoup, validate: bool = True) -> List[ProductBasicItem]:
+    """
+    解析済みのキーワード検索結果ページのBeautifulSoupオブジェクトから商品情報のリストを返す。
+    `validate=False` の場合はPydanticの検証を省略する (`parser_base.build_item` を参照)。
+    """
+    return list(iter_from_soup(soup, validate))
 
-def parse_from_string(html_content: str) -> List[ProductBasicItem]:
+def parse_from_string(html_content: HtmlInput, engine: str = "bs4", validate: bool = True, prefilter: bool = False) -> List[ProductBasicItem]:
     """
     キーワード検索結果ページのHTML文字列を解析し、商品情報のリストを返す。
     """
-    if not html_content:
-        return []
+    return list(iter_from_string(html_content, engine=engine, validate=validate, prefilter=prefilter))
 
-    soup = BeautifulSoup(html_content, 'lxml')
-    products = _parse_search_page_by_scraping(soup)
-    return products
+def iter_from_string(html_content: HtmlInput, engine: str = "bs4", validate: bool = True, prefilter: bool = False) -> Iterator[ProductBasicItem]:
+    """
+    キーワード検索結果ページのHTML文字列を解析し、商品情報を1件ずつ返すイテレーター。
+    bs4/lxmlエンジンではページ全体のDOMを構築してから、商品コンテナを1つずつ解析する。
+    """
+    check_engine(engine)
+    if not html_content:
+        return
+
+    if engine == "stream":
+        yield from stream_engine.iter_search_items(stream_engine.iter_chunks(html_content), validate)
+    elif engine == "lxml":
+        tree = lxml_engine.build_tree(html_content, prefilter)
+        if tree is not None:
+            yield from lxml_engine.iter_search_tree(tree, validate)
+    else:
+        yield from iter_from_soup(make_soup(html_content, prefilter), validate)
+
+def parse_from_bytes(html_bytes: bytes, engine: str = "bs4", validate: bool = True, prefilter: bool = False) -> List[ProductBasicItem]:
+    """
+    キーワード検索結果ページの未デコードのHTMLバイト列を解析し、商品情報のリストを返す。
+    文字コードは `<meta>` タグなどから判定される。
+    """
+    return parse_from_string(html_bytes, engine=engine, validate=validate, prefilter=prefilter)
@@ -1,14 +1,21 @@
 """
 ショップページのHTMLパーサー
 """
-from typing import List
+from typing import Iterator, List
 import re
 from bs4 import BeautifulSoup, Tag
 from pydantic import ValidationError
 
+from . import lxml_engine, stream_engine
+from .discovery import open_html
+from .instrumentation import count, extractor, stage
 from .models import ProductBasicItem
 from .parser_base import (
+    HtmlInput,
     ParserError,
+    check_engine,
+    build_item,
+    make_soup,
     to_absolute_url,
     to_absolute_image_url,
     extract_price,
@@ -17,26 +24,40 @@ from .parser_base import (
 )
 
 
-def parse_from_file(filepath: str) -> List[ProductBasicItem]:
+def parse_from_file(filepath: str, engine: str = "bs4", validate: bool = True, prefilter: bool = False) -> List[ProductBasicItem]:
     """
     指定されたパスのHTMLファイルを読み込み、商品情報のリストを返す。
+    `engine="lxml"` を指定すると、BeautifulSoupを使わずにlxmlとXPathで解析する。
+    `engine="stream"` を指定すると、ファイル全体を読み込まずに少しずつパーサーへ渡して解析する。
+    `prefilter=True` を指定すると、DOMの構築前に script / style / svg 要素の中身を取り除く。
+    """
+    return list(iter_from_file(filepath, engine=engine, validate=validate, prefilter=prefilter))
+
+def iter_from_file(filepath: str, engine: str = "bs4", validate: bool = True, prefilter: bool = False) -> Iterator[ProductBasicItem]:
+    """
+    指定されたパスのHTMLファイルを解析し、商品情報を1件ずつ返すイテレーター。
+    引数は `parse_from_file` と同じ。
     """
     try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        return parse_from_string(html_content)
+        if engine == "stream":
+            yield from stream_engine.iter_shop_items(stream_engine.iter_file_chunks(filepath), validate)
+            return
+        # デコードせずにバイト列のまま渡す (文字コードは <meta> タグから判定する)
+        with stage("read"), open_html(filepath) as f:
+            html_bytes = f.read()
+        yield from iter_from_string(html_bytes, engine=engine, validate=validate, prefilter=prefilter)
     except FileNotFoundError:
         raise
     except Exception as e:
         raise ParserError(f"Error reading or parsing file {filepath}: {e}")
 
-def _parse_shop_page(soup: BeautifulSoup) -> List[ProductBasicItem]:
+def _iter_shop_page(soup: BeautifulSoup, validate: bool = True) -> Iterator[ProductBasicItem]:
     """
     BeautifulSoupを使用してショップページをスクレイピングする。
     """
-    products = []
     # ショップページの商品コンテナセレクタ
-    item_containers = soup.select('div.shop-search-result-view__item')
+    with stage("select"):
+        item_containers = soup.select('div.shop-search-result-view__item')
 
     # ショップの配送国はページ全体で共通の可能性が高いため、最初に一度だけ取得する
     location = None
@@ -92,24 +113,56 @@ def _parse_shop_page(soup: BeautifulSoup) -> List[ProductBasicItem]:
             }
             if rating is not None:
                 product_data['rating'] = rating
-            products.append(ProductBasicItem(**product_data))
+            item = build_item(ProductBasicItem, product_data, validate)
         except (ValidationError, Exception) as e:
+            count("errors.item")
             print(f"Error processing a shop item '{name}': {e}")
             continue
+        yield item
 
-    return products
-
-def parse_from_string(html_content: str) -> List[ProductBasicItem]:
+@extractor("shop")
+def iter_from_soup(soup: BeautifulSoup, validate: bool = True) -> Iterator[ProductBasicItem]:
     """
-    ショップページのHTML文字列を解析し、商品情報のリストを返す。
+    解析済みのショップページのBeautifulSoupオブジェクトから、商品情報を1件ずつ返すイテレーター。
     """
-    if not html_content:
-        return []
-
-    soup = BeautifulSoup(html_content, 'lxml')
-
     # Check if it's a shop page
     if soup.select_one('div.shop-search-result-view'):
-        return _parse_shop_page(soup)
+        yield from _iter_shop_page(soup, validate)
+
+def parse_from_soup(soup: BeautifulSoup, validate: bool = True) -> List[ProductBasicItem]:
+    """
+    解析済みのショップページのBeautifulSoupオブジェクトから商品情報のリストを返す。
+    `validate=False` の場合はPydanticの検証を省略する (`parser_base.build_item` を参照)。
+    """
+    return list(iter_from_soup(soup, validate))
+
+def parse_from_string(html_content: HtmlInput, engine: str = "bs4", validate: bool = True, prefilter: bool = False) -> List[ProductBasicItem]:
+    """
+    ショップページのHTML文字列を解析し、商品情報のリストを返す。
+    """
+    return list(iter_from_string(html_content, engine=engine, validate=validate, prefilter=prefilter))
 
-    return []
+def iter_from_string(html_content: HtmlInput, engine: str = "bs4", validate: bool = True, prefilter: bool = False) -> Iterator[ProductBasicItem]:
+    """
+    ショップページのHTML文字列を解析し、商品情報を1件ずつ返すイテレーター。
+    bs4/lxmlエンジンではページ全体のDOMを構築してから、商品コンテナを1つずつ解析する。
+    """
+    check_engine(engine)
+    if not html_content:
+        return
+
+    if engine == "stream":
+        yield from stream_engine.iter_shop_items(stream_engine.iter_chunks(html_content), validate)
+    elif engine == "lxml":
+        tree = lxml_engine.build_tree(html_content, prefilter)
+        if tree is not None:
+            yield from lxml_engine.iter_shop_tree(tree, validate)
+    else:
+        yield from iter_from_soup(make_soup(html_content, prefilter), validate)
+
+def parse_from_bytes(html_bytes: bytes, engine: str = "bs4", validate: bool = True, prefilter: bool = False) -> List[ProductBasicItem]:
+    """
+    ショップページの未デコードのHTMLバイト列を解析し、商品情報のリストを返す。
+    文字コードは `<meta>` タグなどから判定される。
+    """
+    return parse_from_string(html_bytes, engine=engine, validate=validate, prefilter=prefilter)
@@ -0,0 +1,123 @@
+"""
+商品一覧ページの商品コンテナから、抽出に必要な要素をまとめて収集するモジュール
+
+各フィールドごとに `select_one` や `find` を呼び出すと、商品コンテナの部分木を
+フィールドの数だけ走査し、そのたびにCSSセレクタの文字列が解析される。
+ここでは、セレクタと正規表現をインポート時に一度だけコンパイルし、
+商品コンテナの部分木を1回だけ走査して必要な要素をすべて収集する。
+"""
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import soupsieve
+from bs4 import BeautifulSoup, Tag
+
+# カテゴリページ・検索結果ページの商品コンテナ
+CATEGORY_ITEM_CONTAINERS = soupsieve.compile("div.col-xs-2-4, li.shopee-search-item-result__item")
+SEARCH_ITEM_CONTAINERS = soupsieve.compile("li.shopee-search-item-result__item")
+
+# "sold" または "sold/month" を含む販売数のテキスト
+SOLD_TEXT_PATTERN = re.compile(r"sold/month|sold", re.IGNORECASE)
+
+
+@dataclass(slots=True)
+class ItemElements:
+    """
+    1つの商品コンテナから収集した要素。
+    各フィールドには、条件に合う最初の要素 (文書順) が格納される。
+    """
+    # div.line-clamp-2 (商品名)
+    name_div: Optional[Tag] = None
+    # a[href] (商品URL)
+    link: Optional[Tag] = None
+    # img[alt] (カテゴリページの商品画像)
+    img_with_alt: Optional[Tag] = None
+    # img[src] (検索結果ページの商品画像)
+    img_with_src: Optional[Tag] = None
+    # div.flex.items-baseline (価格のspanを含むdiv、すべて)
+    price_divs: List[Tag] = field(default_factory=list)
+    # 文字列が "$" のspan (検索結果ページの通貨記号)
+    dollar_span: Optional[Tag] = None
+    # div[class*='_3_FVSo'] (検索結果ページの価格のフォールバック)
+    fallback_price_div: Optional[Tag] = None
+    # img[alt="rating-star-full"] (レートのパターン1)
+    rating_star_full_img: Optional[Tag] = None
+    # img[alt="rating-star"] (レートのパターン2)
+    rating_star_img: Optional[Tag] = None
+    # 文字列が "sold" を含むdiv (販売数)
+    sold_div: Optional[Tag] = None
+    # img[alt="location-icon"] (配送国)
+    location_img: Optional[Tag] = None
+
+    def price_span(self, index: int) -> Optional[Tag]:
+        """
+        `div.flex.items-baseline span` に一致するspanのうち、文書順で指定番目の要素を返す。
+        """
+        seen = set()
+        spans = []
+        for div in self.price_divs:
+            for span in div.find_all("span"):
+                if id(span) not in seen:
+                    seen.add(id(span))
+                    spans.append(span)
+                    if len(spans) > index:
+                        return spans[index]
+        return None
+
+
+def select_item_containers(soup: BeautifulSoup, selector: soupsieve.SoupSieve) -> List[Tag]:
+    """コンパイル済みのセレクタで商品コンテナを選択する"""
+    return selector.select(soup)
+
+
+def collect_item_elements(container: Tag) -> ItemElements:
+    """
+    商品コンテナの部分木を1回だけ走査し、抽出に必要な要素を収集する。
+    """
+    elements = ItemElements()
+
+    for node in container.descendants:
+        if not isinstance(node, Tag):
+            continue
+        name = node.name
+
+        if name == "div":
+            classes = node.get("class") or ()
+            if elements.name_div is None and "line-clamp-2" in classes:
+                elements.name_div = node
+            if "flex" in classes and "items-baseline" in classes:
+                elements.price_divs.append(node)
+            if elements.fallback_price_div is None and "_3_FVSo" in " ".join(classes):
+                elements.fallback_price_div = node
+            if elements.sold_div is None:
+                text = node.string
+                if text is not None and SOLD_TEXT_PATTERN.search(text):
+                    elements.sold_div = node
+
+        elif name == "img":
+            alt = node.get("alt")
+            if alt is not None:
+                if elements.img_with_alt is None:
+                    elements.img_with_alt = node
+                if alt == "rating-star-full":
+                    if elements.rating_star_full_img is None:
+                        elements.rating_star_full_img = node
+                elif alt == "rating-star":
+                    if elements.rating_star_img is None:
+                        elements.rating_star_img = node
+                elif alt == "location-icon":
+                    if elements.location_img is None:
+                        elements.location_img = node
+            if elements.img_with_src is None and node.get("src") is not None:
+                elements.img_with_src = node
+
+        elif name == "a":
+            if elements.link is None and node.get("href") is not None:
+                elements.link = node
+
+        elif name == "span":
+            if elements.dollar_span is None and node.string == "$":
+                elements.dollar_span = node
+
+    return elements
@@ -0,0 +1,234 @@
+"""
+lxmlの `HTMLPullParser` でHTMLを少しずつ読み込みながら、商品一覧ページを解析するエンジン
+
+ページ全体の要素ツリーを構築してから解析する `lxml_engine` と異なり、HTMLをチャンク単位で
+パーサーへ渡し、商品コンテナの終了タグが現れた時点でそのコンテナを解析してアイテムを返す。
+解析したコンテナの部分木はすぐに破棄し、パーサーが参照しない script / style / svg 要素の中身も
+要素の終了時に破棄するため、大きなページでも最初のアイテムが得られるまでの時間と最大メモリ
+使用量が小さくなる。
+
+コンテナの解析には `lxml_engine` と同じ関数を使用するため、アイテムは `lxml_engine` と同じになる。
+"""
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence
+
+from lxml import etree, html as lxml_html
+
+from . import lxml_engine
+from .discovery import open_html
+from .instrumentation import count_page, stage
+from .models import ProductBasicItem
+from .parser_base import HtmlInput, detect_encoding
+
+# HTMLをパーサーへ渡す単位 (バイト数、または文字数)
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# 終了イベントを受け取る要素 (商品コンテナと、中身を破棄する要素)
+_EVENT_TAGS = ("li", "div", "script", "style", "svg")
+
+# ショップページでは、ショップの説明の `span` も受け取る
+_SHOP_EVENT_TAGS = _EVENT_TAGS + ("span",)
+
+
+def _has_class(element: etree._Element, name: str) -> bool:
+    """class属性に指定したクラス名を含むかを返す (`lxml_engine._has_class` のXPath条件と同じ判定)"""
+    classes = element.get("class")
+    # ほとんどの要素は部分文字列の検索だけで除外できる
+    return classes is not None and name in classes and name in classes.split()
+
+
+def _is_category_container(element: etree._Element) -> bool:
+    if element.tag == "li":
+        return _has_class(element, "shopee-search-item-result__item")
+    return element.tag == "div" and _has_class(element, "col-xs-2-4")
+
+
+def _is_search_container(element: etree._Element) -> bool:
+    return element.tag == "li" and _has_class(element, "shopee-search-item-result__item")
+
+
+def _is_shop_container(element: etree._Element) -> bool:
+    return element.tag == "div" and _has_class(element, "shop-search-result-view__item")
+
+
+def _is_shop_result_view(element: etree._Element) -> bool:
+    return _has_class(element, "shop-search-result-view")
+
+
+def _is_shop_description_span(element: etree._Element) -> bool:
+    parent = element.getparent()
+    return (
+        element.tag == "span" and parent is not None and parent.tag == "div"
+        and _has_class(parent, "shop-page-shop-description")
+    )
+
+
+def _has_ancestor(element: etree._Element, predicate: Callable[[etree._Element], bool]) -> bool:
+    return any(predicate(ancestor) for ancestor in element.iterancestors("li", "div"))
+
+
+def iter_chunks(html_content: HtmlInput, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[HtmlInput]:
+    """メモリ上のHTMLを、`chunk_size` ごとに分けて返す"""
+    for start in range(0, len(html_content), chunk_size):
+        yield html_content[start:start + chunk_size]
+
+
+def iter_file_chunks(filepath: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """HTMLファイル (gzip/zstdで圧縮されたものを含む) を、`chunk_size` バイトごとに読み込んで返す"""
+    with open_html(filepath) as f:
+        while True:
+            with stage("read"):
+                chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def _discard_contents(element: etree._Element) -> None:
+    """要素の属性と後続のテキストは残し、子要素とテキストを破棄する"""
+    for child in list(element):
+        element.remove(child)
+    element.text = None
+
+
+class _PullParser:
+    """チャンクを順に読み込み、終了した要素を返すパーサー"""
+
+    def __init__(self, chunks: Iterable[HtmlInput], tags: Sequence[str] = _EVENT_TAGS):
+        self.chunks = iter(chunks)
+        self.tags = tags
+        self.parser: Optional[etree.HTMLPullParser] = None
+        self.root: Optional[etree._Element] = None
+
+    def _create_parser(self, first_chunk: HtmlInput) -> etree.HTMLPullParser:
+        options = {}
+        if isinstance(first_chunk, bytes):
+            # 文字コードは先頭のチャンクの宣言から判定する (`lxml_engine.build_tree` と同じ)
+            options["encoding"] = detect_encoding(first_chunk)
+        parser = etree.HTMLPullParser(events=("end",), tag=self.tags, **options)
+        # `lxml.html` の要素のクラス (`text_content` などを持つ) を使用する
+        # (`HtmlElementClassLookup` はPythonで実装されていて、要素ごとの呼び出しが遅い)
+        parser.set_element_class_lookup(etree.ElementDefaultClassLookup(element=lxml_html.HtmlElement))
+        return parser
+
+    def __iter__(self) -> Iterator[etree._Element]:
+        for chunk in self.chunks:
+            if not chunk:
+                continue
+            with stage("tree"):
+                if self.parser is None:
+                    self.parser = self._create_parser(chunk)
+                self.parser.feed(chunk)
+                events = list(self.parser.read_events())
+            for _, element in events:
+                yield element
+        if self.parser is None:
+            return
+        with stage("tree"):
+            try:
+                self.root = self.parser.close()
+            except etree.XMLSyntaxError:
+                self.root = None
+            events = list(self.parser.read_events())
+        for _, element in events:
+            yield element
+
+    def release(self, element: etree._Element) -> None:
+        """解析が済んだ要素の中身を破棄する"""
+        _discard_contents(element)
+
+    def discard_unused(self, element: etree._Element) -> bool:
+        """パーサーが参照しない要素の中身を破棄し、破棄した場合はTrueを返す (JSON-LDは残す)"""
+        if element.tag == "style" or element.tag == "svg":
+            _discard_contents(element)
+            return True
+        if element.tag == "script" and element.get("type") != "application/ld+json":
+            element.text = None
+            return True
+        return False
+
+
+def iter_category_items(chunks: Iterable[HtmlInput], validate: bool = True) -> Iterator[ProductBasicItem]:
+    """
+    カテゴリページのHTMLのチャンクの列を解析し、商品コンテナごとにアイテムを返す。
+    `lxml_engine.parse_category_document` と同じく、`li` の商品コンテナがあるページのみを
+    カテゴリページとして扱い、ない場合はページの末尾まで読み込んでから商品詳細ページとして解析する。
+    """
+    parser = _PullParser(chunks)
+    # `li` のコンテナが現れるまでは、`div` のコンテナのアイテムを保留する
+    pending: List[ProductBasicItem] = []
+    is_category_page = False
+    item_count = 0
+    for element in parser:
+        if parser.discard_unused(element) or not _is_category_container(element):
+            continue
+        if _has_ancestor(element, _is_category_container):
+            # 入れ子のコンテナは、外側のコンテナと一緒に解析されるまで残す
+            continue
+        with stage("extract"):
+            item = lxml_engine.category_item(element, validate)
+        parser.release(element)
+        if not is_category_page and element.tag == "li":
+            is_category_page = True
+            item_count += len(pending)
+            yield from pending
+            pending = []
+        if item is None:
+            continue
+        if is_category_page:
+            item_count += 1
+            yield item
+        else:
+            pending.append(item)
+
+    if is_category_page:
+        count_page("category", item_count)
+    elif parser.root is not None:
+        yield from lxml_engine.parse_category_document(parser.root, validate)
+
+
+def iter_search_items(chunks: Iterable[HtmlInput], validate: bool = True) -> Iterator[ProductBasicItem]:
+    """キーワード検索結果ページのHTMLのチャンクの列を解析し、商品コンテナごとにアイテムを返す"""
+    parser = _PullParser(chunks)
+    item_count = 0
+    for element in parser:
+        if parser.discard_unused(element) or not _is_search_container(element):
+            continue
+        if _has_ancestor(element, _is_search_container):
+            continue
+        with stage("extract"):
+            item = lxml_engine.search_item(element, validate)
+        parser.release(element)
+        if item is not None:
+            item_count += 1
+            yield item
+    count_page("search", item_count)
+
+
+def iter_shop_items(chunks: Iterable[HtmlInput], validate: bool = True) -> Iterator[ProductBasicItem]:
+    """
+    ショップページのHTMLのチャンクの列を解析し、商品コンテナごとにアイテムを返す。
+    ショップの配送国は、商品コンテナより前にあるショップの説明から判定する。
+    """
+    parser = _PullParser(chunks, _SHOP_EVENT_TAGS)
+    location: Optional[str] = None
+    description_found = False
+    item_count = 0
+    for element in parser:
+        if parser.discard_unused(element):
+            continue
+        if element.tag == "span":
+            if not description_found and _is_shop_description_span(element):
+                description_found = True
+                location = lxml_engine.shop_location(element)
+            continue
+        if not _is_shop_container(element) or not _has_ancestor(element, _is_shop_result_view):
+            continue
+        if _has_ancestor(element, _is_shop_container):
+            continue
+        with stage("extract"):
+            item = lxml_engine.shop_item(element, location, validate)
+        parser.release(element)
+        if item is not None:
+            item_count += 1
+            yield item
+    count_page("shop", item_count)
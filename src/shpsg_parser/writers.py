@@ -0,0 +1,587 @@
+"""
+解析結果をファイルへ逐次書き出すライターを定義するモジュール
+
+全件をメモリに保持してから書き出すのではなく、一定件数ごとにバッチで書き出すため、
+大量のファイルを解析してもメモリ使用量が一定に保たれ、途中で異常終了しても
+それまでの結果がファイルに残る。
+"""
+import csv
+import json
+import pathlib
+import sqlite3
+import types
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Sequence, Type, Union, get_args, get_origin
+
+# CLIの起動時にも読み込まれるため、時間のかかるPydanticは型注釈のためだけにはインポートしない
+if TYPE_CHECKING:
+    from pydantic import BaseModel
+
+# 1回の書き込みでまとめて出力する件数の既定値
+DEFAULT_BATCH_SIZE = 500
+
+# カンマ区切りの1つの文字列として出力するリスト型のカラム
+JOINED_LIST_COLUMNS = ("image_urls",)
+
+# Parquetの1つの行グループにまとめる行数の既定値
+DEFAULT_ROW_GROUP_SIZE = 10_000
+
+# 出力するアイテムのモデル (複数のモデルが混在する場合はその列)
+ModelSpec = Union[Type["BaseModel"], Sequence[Type["BaseModel"]]]
+
+
+def _models_of(model: ModelSpec) -> List[Type["BaseModel"]]:
+    return [model] if isinstance(model, type) else list(model)
+
+
+def columns_for(model: ModelSpec) -> List[str]:
+    """
+    モデルのフィールド定義順にカラム名のリストを返す。
+    複数のモデルが指定された場合は、先に指定されたモデルのカラムから順に重複なく並べる。
+    """
+    columns: List[str] = []
+    for m in _models_of(model):
+        columns.extend(name for name in m.model_fields if name not in columns)
+    return columns
+
+
+class ItemWriter:
+    """
+    Pydanticモデルのアイテムをバッチ単位でファイルに書き出すライターの基底クラス。
+    ファイルは最初のバッチを書き出す時点で開かれるため、1件も書き出さなかった場合は
+    ファイルが作成されない。
+    `append=True` の場合は既存のファイルの末尾に追記する。
+    `on_flush` を指定した場合は、バッチを書き出すたびに (書き出した後に) 呼び出す。
+    """
+
+    def __init__(
+        self,
+        path: Union[str, pathlib.Path],
+        model: ModelSpec,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        append: bool = False,
+        on_flush: Optional[Callable[[], None]] = None,
+    ):
+        self.path = pathlib.Path(path)
+        self.model = model
+        self.batch_size = max(1, batch_size)
+        self.append = append
+        self.on_flush = on_flush
+        # カラム順はモデルのフィールド定義順で固定する
+        self.columns: List[str] = columns_for(model)
+        self.count = 0
+        self._buffer: List["BaseModel"] = []
+        self._file = None
+
+    @property
+    def buffered(self) -> int:
+        """バッファ内の、まだ書き出していないアイテム数"""
+        return len(self._buffer)
+
+    def write(self, item: "BaseModel") -> None:
+        """アイテムを1件追加し、バッチサイズに達したら書き出す"""
+        self._buffer.append(item)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def write_many(self, items: Iterable["BaseModel"]) -> None:
+        """複数のアイテムを追加する"""
+        for item in items:
+            self.write(item)
+
+    def flush(self) -> None:
+        """バッファ内のアイテムをファイルに書き出す"""
+        if not self._buffer:
+            return
+        if self._file is None:
+            self._open()
+        self._write_batch(self._buffer)
+        self.count += len(self._buffer)
+        self._buffer = []
+        self._sync()
+        if self.on_flush is not None:
+            self.on_flush()
+
+    def close(self) -> None:
+        """残りのアイテムを書き出し、ファイルを閉じる"""
+        try:
+            self.flush()
+        finally:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self) -> "ItemWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def _open(self) -> None:
+        raise NotImplementedError
+
+    def _appending_to_existing_file(self) -> bool:
+        """既存の空でないファイルに追記するかを返す"""
+        return self.append and self.path.exists() and self.path.stat().st_size > 0
+
+    def _write_batch(self, items: List["BaseModel"]) -> None:
+        raise NotImplementedError
+
+    def _sync(self) -> None:
+        # 異常終了しても書き出し済みの結果が残るよう、OSのバッファまで送る
+        self._file.flush()
+
+
+def _item_to_dict(item: Any, mode: str = "python") -> dict:
+    """
+    アイテムを辞書に変換する。
+    検証を省略したレコード (`ProductBasicRecord` など、`__slots__` を持つデータクラス) にも対応する。
+    """
+    if hasattr(item, "model_dump"):
+        # model_construct で生成したアイテム (URLが文字列のまま) でも警告を出さずに出力する
+        return item.model_dump(mode=mode, warnings=False)
+    return {name: getattr(item, name) for name in item.__slots__}
+
+
+def _to_csv_value(column: str, value: Any) -> Any:
+    """CSVの1セルに書き出せる値に変換する"""
+    if value is None:
+        return ""
+    if isinstance(value, list) and column in JOINED_LIST_COLUMNS:
+        return ",".join(map(str, value))
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    # HttpUrl、辞書、リストなどは文字列表現で出力する
+    return str(value)
+
+
+class CsvItemWriter(ItemWriter):
+    """
+    アイテムをCSV形式で書き出すライター。
+    Excelでの文字化けを防ぐため、BOM付きUTF-8で出力する。
+    """
+
+    def _open(self) -> None:
+        # 追記の場合、BOMとヘッダー行は既存のファイルの先頭にあるため出力しない
+        write_header = not self._appending_to_existing_file()
+        self._file = open(self.path, "a" if self.append else "w", encoding="utf-8-sig", newline="")
+        self._writer = csv.writer(self._file, lineterminator="\n")
+        if write_header:
+            self._writer.writerow(self.columns)
+
+    def _write_batch(self, items: List["BaseModel"]) -> None:
+        rows = []
+        for item in items:
+            data = _item_to_dict(item)
+            rows.append([_to_csv_value(col, data.get(col)) for col in self.columns])
+        self._writer.writerows(rows)
+
+
+class NdjsonItemWriter(ItemWriter):
+    """
+    アイテムを1行1JSONオブジェクトのNDJSON形式で書き出すライター。
+    リストや辞書のフィールドは文字列化せず、JSONの構造のまま出力する。
+    """
+
+    def _open(self) -> None:
+        self._file = open(self.path, "a" if self.append else "w", encoding="utf-8")
+
+    def _write_batch(self, items: List["BaseModel"]) -> None:
+        lines = []
+        for item in items:
+            data = _item_to_dict(item, mode="json")
+            record = {col: data.get(col) for col in self.columns}
+            lines.append(json.dumps(record, ensure_ascii=False))
+        self._file.write("\n".join(lines) + "\n")
+
+
+# SQLiteの各テーブルの定義 (カラム名と型)
+_SQLITE_PRODUCT_COLUMNS = {
+    "product_url": "TEXT PRIMARY KEY",
+    "product_name": "TEXT NOT NULL",
+    "price": "REAL",
+    "sold": "INTEGER",
+    "rating": "REAL",
+    "location": "TEXT",
+    "image_url": "TEXT",
+    "discount": "REAL",
+    "shop_type": "TEXT",
+    "currency": "TEXT",
+    "page_type": "TEXT",
+}
+
+_SQLITE_DETAIL_COLUMNS = {
+    "product_id": "TEXT PRIMARY KEY",
+    "product_name": "TEXT NOT NULL",
+    "product_description": "TEXT",
+    "price": "REAL",
+    "original_price": "REAL",
+    "currency": "TEXT",
+    "product_url": "TEXT",
+    "quantity": "INTEGER",
+    "rating": "REAL",
+    "rating_count": "INTEGER",
+    "sold": "INTEGER",
+    "shop_id": "TEXT",
+    "shop_name": "TEXT",
+    "shop_url": "TEXT",
+    "shipping_guarantee_text": "TEXT",
+    "shipping_cost_text": "TEXT",
+    "shipping_late_arrival_voucher_text": "TEXT",
+    "shopping_guarantee": "TEXT",
+    "page_type": "TEXT",
+}
+
+# 商品詳細の子テーブル (商品IDと並び順に紐づく行)
+_SQLITE_CHILD_TABLES = {
+    "product_images": {"url": "TEXT"},
+    "product_ratings": {
+        "username": "TEXT",
+        "rating_stars": "INTEGER",
+        "timestamp": "TEXT",
+        "variation": "TEXT",
+        "comment": "TEXT",
+    },
+    "product_specifications": {"name": "TEXT", "value": "TEXT"},
+    "product_variations": {"name": "TEXT", "price": "REAL", "available": "INTEGER"},
+    "product_shop_vouchers": {"data": "TEXT"},
+}
+
+_SQLITE_INDEXES = {
+    "products": ("price", "sold", "shop_type"),
+    "product_details": ("price", "sold", "shop_id"),
+}
+
+
+def _upsert_sql(table: str, columns: Sequence[str], key: str) -> str:
+    """主キーが重複した場合は既存の行を更新するINSERT文を返す"""
+    placeholders = ", ".join("?" for _ in columns)
+    updates = ", ".join(f"{col} = excluded.{col}" for col in columns if col != key)
+    return (
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders}) "
+        f"ON CONFLICT({key}) DO UPDATE SET {updates}"
+    )
+
+
+class SqliteItemWriter(ItemWriter):
+    """
+    アイテムをSQLiteデータベースに書き出すライター。
+
+    一覧ページのアイテムは `products` テーブルに商品URLをキーとして、商品詳細のアイテムは
+    `product_details` テーブルに商品IDをキーとして登録し、既存の行は更新する (upsert)。
+    商品詳細のレビュー・仕様・バリエーションなどのリストは、文字列化せずに子テーブルへ格納する。
+    バッチごとに1トランザクションで `executemany` を実行し、WALモードで書き込む。
+    既存のデータベースには常に追記・更新するため、`append` の指定は結果に影響しない。
+    """
+
+    def _open(self) -> None:
+        self._file = sqlite3.connect(self.path)
+        self._file.execute("PRAGMA journal_mode=WAL")
+        self._file.execute("PRAGMA synchronous=NORMAL")
+        with self._file:
+            for table, columns in (("products", _SQLITE_PRODUCT_COLUMNS), ("product_details", _SQLITE_DETAIL_COLUMNS)):
+                definition = ", ".join(f"{col} {col_type}" for col, col_type in columns.items())
+                self._file.execute(f"CREATE TABLE IF NOT EXISTS {table} ({definition})")
+            for table, columns in _SQLITE_CHILD_TABLES.items():
+                definition = ", ".join(f"{col} {col_type}" for col, col_type in columns.items())
+                self._file.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} ("
+                    f"product_id TEXT NOT NULL, position INTEGER NOT NULL, {definition}, "
+                    f"PRIMARY KEY (product_id, position))"
+                )
+            for table, columns in _SQLITE_INDEXES.items():
+                for col in columns:
+                    self._file.execute(f"CREATE INDEX IF NOT EXISTS {table}_{col} ON {table} ({col})")
+
+    def _write_batch(self, items: List["BaseModel"]) -> None:
+        products = []
+        details = []
+        children = {table: [] for table in _SQLITE_CHILD_TABLES}
+        for item in items:
+            data = _item_to_dict(item, mode="json")
+            if "product_id" in data:
+                details.append(self._detail_row(data, children))
+            else:
+                products.append([data.get(col) for col in _SQLITE_PRODUCT_COLUMNS])
+
+        with self._file:
+            if products:
+                self._file.executemany(_upsert_sql("products", list(_SQLITE_PRODUCT_COLUMNS), "product_url"), products)
+            if details:
+                self._file.executemany(
+                    _upsert_sql("product_details", list(_SQLITE_DETAIL_COLUMNS), "product_id"), details
+                )
+                # 更新された商品の子テーブルの行は、いったん削除してから登録し直す
+                product_ids = [(row[0],) for row in details]
+                for table, columns in _SQLITE_CHILD_TABLES.items():
+                    self._file.executemany(f"DELETE FROM {table} WHERE product_id = ?", product_ids)
+                    if children[table]:
+                        placeholders = ", ".join("?" for _ in range(len(columns) + 2))
+                        self._file.executemany(f"INSERT INTO {table} VALUES ({placeholders})", children[table])
+
+    @staticmethod
+    def _detail_row(data: dict, children: dict) -> list:
+        """商品詳細の行を返し、子テーブルの行を `children` に追加する"""
+        product_id = data["product_id"]
+        shipping_info = data.get("shipping_info") or {}
+        row = dict(data)
+        row["shipping_guarantee_text"] = shipping_info.get("guarantee_text")
+        row["shipping_cost_text"] = shipping_info.get("cost_text")
+        row["shipping_late_arrival_voucher_text"] = shipping_info.get("late_arrival_voucher_text")
+
+        for i, url in enumerate(data.get("image_urls") or []):
+            children["product_images"].append((product_id, i, url))
+        for i, rating in enumerate(data.get("detailed_ratings") or []):
+            children["product_ratings"].append((
+                product_id, i, rating.get("username"), rating.get("rating_stars"),
+                rating.get("timestamp"), rating.get("variation"), rating.get("comment"),
+            ))
+        for i, (name, value) in enumerate((data.get("specifications") or {}).items()):
+            children["product_specifications"].append((product_id, i, name, value))
+        for i, variation in enumerate(data.get("variations") or []):
+            available = variation.get("available")
+            children["product_variations"].append((
+                product_id, i, variation.get("name"), variation.get("price"),
+                None if available is None else int(bool(available)),
+            ))
+        for i, voucher in enumerate(data.get("shop_vouchers") or []):
+            children["product_shop_vouchers"].append((product_id, i, json.dumps(voucher, ensure_ascii=False)))
+        return [row.get(col) for col in _SQLITE_DETAIL_COLUMNS]
+
+    def _sync(self) -> None:
+        # バッチごとにコミット済みのため、追加の処理は不要
+        pass
+
+
+def _import_pyarrow():
+    """pyarrowをインポートする (Parquet出力を使用する場合のみ必要)"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError(
+            "Parquet output requires pyarrow. Install it with: pip install 'shpsg-parser[parquet]'"
+        ) from e
+    return pyarrow
+
+
+def _non_none_args(annotation: Any) -> List[Any]:
+    return [arg for arg in get_args(annotation) if arg is not type(None)]
+
+
+def _is_union(annotation: Any) -> bool:
+    return get_origin(annotation) in (Union, types.UnionType)
+
+
+def _arrow_type(annotation: Any):
+    """
+    Pydanticのフィールドの型注釈に対応するArrowの型を返す。
+    リストはlist型、辞書はmap型、モデルはstruct型として入れ子のまま表現し、
+    URLや `Any` などのその他の型は文字列として扱う。
+    """
+    pa = _import_pyarrow()
+    origin = get_origin(annotation)
+    if _is_union(annotation):
+        args = _non_none_args(annotation)
+        return _arrow_type(args[0]) if len(args) == 1 else pa.string()
+    if origin is list:
+        return pa.list_(_arrow_type(get_args(annotation)[0]))
+    if origin is dict:
+        return pa.map_(pa.string(), _arrow_type(get_args(annotation)[1]))
+    if isinstance(annotation, type) and hasattr(annotation, "model_fields"):
+        return pa.struct([(name, _arrow_type(f.annotation)) for name, f in annotation.model_fields.items()])
+    if annotation is bool:
+        return pa.bool_()
+    if annotation is int:
+        return pa.int64()
+    if annotation is float:
+        return pa.float64()
+    return pa.string()
+
+
+# 辞書のリストとして宣言されたフィールドのうち、要素の形が決まっているもの (SQLiteの子テーブルと同じ形)。
+# Parquetでは文字列のmapではなく、フィールドごとに型を持つstructのlistとして出力する
+_PARQUET_STRUCT_LISTS = {
+    "variations": {"name": str, "price": float, "available": bool},
+}
+
+
+def _to_struct_value(fields: Dict[str, type], value: dict) -> dict:
+    """辞書をstructの各フィールドの型に変換する (変換できない値はNoneとし、余分なキーは含めない)"""
+    row = {}
+    for name, field_type in fields.items():
+        v = value.get(name)
+        if v is not None and not isinstance(v, field_type):
+            try:
+                v = field_type(v)
+            except (TypeError, ValueError):
+                v = None
+        row[name] = v
+    return row
+
+
+def arrow_schema(model: ModelSpec):
+    """
+    モデルの定義からArrowのスキーマを生成する。
+    複数のモデルが指定された場合は、カラムの和集合を `columns_for` と同じ順序で並べる。
+    """
+    pa = _import_pyarrow()
+    fields: Dict[str, Any] = {}
+    for m in _models_of(model):
+        for name, field in m.model_fields.items():
+            if name in fields:
+                continue
+            if name in _PARQUET_STRUCT_LISTS:
+                struct_fields = _PARQUET_STRUCT_LISTS[name].items()
+                fields[name] = pa.list_(pa.struct([(k, _arrow_type(t)) for k, t in struct_fields]))
+            else:
+                fields[name] = _arrow_type(field.annotation)
+    return pa.schema(list(fields.items()))
+
+
+def _contains_any(annotation: Any) -> bool:
+    """型注釈に `Any` が含まれるか (値を文字列に変換する必要があるか) を返す"""
+    if annotation is Any:
+        return True
+    return any(_contains_any(arg) for arg in get_args(annotation))
+
+
+def _to_arrow_value(annotation: Any, value: Any) -> Any:
+    """`Any` として宣言された値を文字列に変換する (文字列以外はJSONで表現する)"""
+    if value is None:
+        return None
+    if annotation is Any:
+        return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+    if _is_union(annotation):
+        args = _non_none_args(annotation)
+        return _to_arrow_value(args[0], value) if len(args) == 1 else value
+    origin = get_origin(annotation)
+    if origin is list:
+        (arg,) = get_args(annotation)
+        return [_to_arrow_value(arg, v) for v in value]
+    if origin is dict:
+        value_type = get_args(annotation)[1]
+        return {k: _to_arrow_value(value_type, v) for k, v in value.items()}
+    return value
+
+
+class ParquetItemWriter(ItemWriter):
+    """
+    アイテムを型付きのParquetファイルに書き出すライター (pyarrowが必要)。
+
+    スキーマはモデルの定義から生成され、画像URL・レビュー・仕様・バリエーションなどは
+    文字列化せずにlist/struct/map型の入れ子のカラムとして出力する。
+    バッチごとにArrowのレコードバッチに変換し、`row_group_size` 行ごとに行グループとして書き出す。
+    Parquetファイルは末尾にメタデータを書き込むため、追記には対応していない。
+    """
+
+    def __init__(
+        self,
+        path: Union[str, pathlib.Path],
+        model: ModelSpec,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        append: bool = False,
+        on_flush: Optional[Callable[[], None]] = None,
+        compression: str = "zstd",
+        row_group_size: int = DEFAULT_ROW_GROUP_SIZE,
+    ):
+        super().__init__(path, model, batch_size=batch_size, append=append, on_flush=on_flush)
+        if self._appending_to_existing_file():
+            raise ValueError("Parquet output does not support appending to an existing file")
+        self.schema = arrow_schema(model)
+        self.compression = compression
+        self.row_group_size = max(1, row_group_size)
+        # `Any` を含むカラムのみ、値の変換が必要になる
+        annotations = {}
+        for m in _models_of(model):
+            for name, field in m.model_fields.items():
+                annotations.setdefault(name, field.annotation)
+        self._converted_columns = {
+            name: annotation for name, annotation in annotations.items()
+            if _contains_any(annotation) and name not in _PARQUET_STRUCT_LISTS
+        }
+        self._pending_batches = []
+        self._pending_rows = 0
+
+    def _open(self) -> None:
+        pa = _import_pyarrow()
+        self._file = pa.parquet.ParquetWriter(self.path, self.schema, compression=self.compression)
+
+    def _write_batch(self, items: List["BaseModel"]) -> None:
+        pa = _import_pyarrow()
+        rows = []
+        for item in items:
+            data = _item_to_dict(item, mode="json")
+            for name, annotation in self._converted_columns.items():
+                if name in data:
+                    data[name] = _to_arrow_value(annotation, data[name])
+            for name, fields in _PARQUET_STRUCT_LISTS.items():
+                if data.get(name):
+                    data[name] = [_to_struct_value(fields, v) for v in data[name]]
+            rows.append(data)
+        self._pending_batches.append(pa.RecordBatch.from_pylist(rows, schema=self.schema))
+        self._pending_rows += len(rows)
+        if self._pending_rows >= self.row_group_size:
+            self._write_row_groups(final=False)
+
+    def _write_row_groups(self, final: bool) -> None:
+        """
+        保留中の行を `row_group_size` 行ずつの行グループとして書き出す。
+        `final=False` の場合、行グループに満たない残りの行は次回に持ち越す。
+        """
+        pa = _import_pyarrow()
+        if not self._pending_batches:
+            return
+        table = pa.Table.from_batches(self._pending_batches, schema=self.schema)
+        while table.num_rows >= self.row_group_size:
+            self._file.write_table(table.slice(0, self.row_group_size))
+            table = table.slice(self.row_group_size)
+        if final and table.num_rows:
+            self._file.write_table(table)
+            table = table.slice(table.num_rows)
+        self._pending_batches = table.to_batches()
+        self._pending_rows = table.num_rows
+
+    def _sync(self) -> None:
+        # 行グループ単位で書き出すため、バッチごとの処理は不要
+        pass
+
+    def close(self) -> None:
+        """残りのアイテムを行グループとして書き出し、ファイルを閉じる"""
+        try:
+            self.flush()
+            if self._file is not None:
+                self._write_row_groups(final=True)
+        finally:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+WRITERS = {
+    "csv": CsvItemWriter,
+    "ndjson": NdjsonItemWriter,
+    "sqlite": SqliteItemWriter,
+    "parquet": ParquetItemWriter,
+}
+
+
+def open_writer(
+    path: Union[str, pathlib.Path],
+    model: ModelSpec,
+    output_format: str = "csv",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    append: bool = False,
+    **options: Any,
+) -> ItemWriter:
+    """
+    出力形式に対応するライターを生成する。
+    `append=True` の場合は既存のファイルに追記する。
+    `options` は出力形式ごとのライターにそのまま渡される (例: Parquetの `compression`)。
+
+    Raises:
+        ValueError: 未対応の出力形式が指定された場合。
+    """
+    writer_class: Optional[Type[ItemWriter]] = WRITERS.get(output_format)
+    if writer_class is None:
+        raise ValueError(f"Unsupported output format: {output_format}")
+    return writer_class(path, model, batch_size=batch_size, append=append, **options)
@@ -7,6 +7,7 @@ from datetime import datetime
 from shpsg_parser.parser_category import parse_from_string as parse_from_string_category
 from shpsg_parser.parser_search import parse_from_string as parse_from_string_search
 from shpsg_parser.parser_shop import parse_from_string as parse_from_string_shop
+from shpsg_parser.parser_auto import parse_from_string as parse_from_string_auto
 from shpsg_parser.models import ProductBasicItem
 
 # 新しく追加したパーサーとモデル
@@ -27,7 +28,7 @@ def list_page_view():
 
     parser_type = st.selectbox(
         "パーサーの種類を選択してください:",
-        ("カテゴリページ", "検索結果ページ", "ショップページ")
+        ("カテゴリページ", "検索結果ページ", "ショップページ", "自動判定")
     )
 
     if parser_type == "カテゴリページ":
@@ -36,9 +37,12 @@ def list_page_view():
     elif parser_type == "検索結果ページ":
         parse_function = parse_from_string_search
         st.info("検索結果ページのHTMLファイルをアップロードしてください。")
-    else:
+    elif parser_type == "ショップページ":
         parse_function = parse_from_string_shop
         st.info("ショップページのHTMLファイルをアップロードしてください。")
+    else:
+        parse_function = parse_from_string_auto
+        st.info("ページの種類は自動で判定されます。種類の異なるHTMLファイルをまとめてアップロードできます。")
 
     uploaded_files = st.file_uploader(
         "HTMLファイルをドラッグ＆ドロップするか、ボタンをクリックして選択してください。",
@@ -52,8 +56,9 @@ def list_page_view():
         progress_bar = st.progress(0)
         for i, uploaded_file in enumerate(uploaded_files):
             try:
-                html_content = uploaded_file.getvalue().decode("utf-8")
-                products = parse_function(html_content)
+                # デコードせずにバイト列のまま渡す (文字コードはパーサーが <meta> タグから判定する)
+                html_bytes = uploaded_file.getvalue()
+                products = parse_function(html_bytes)
                 if products:
                     all_products.extend(products)
             except Exception as e:
@@ -64,8 +69,10 @@ def list_page_view():
             st.success(f"合計 {len(all_products)} 件の商品情報を抽出しました。")
             dict_products = [p.model_dump() for p in all_products]
             df = pd.DataFrame(dict_products)
-            df['product_url'] = df['product_url'].astype(str)
-            df['image_url'] = df['image_url'].astype(str)
+            # 自動判定では商品詳細ページのアイテムも混在するため、存在するカラムのみ変換する
+            for col in ['product_url', 'image_url', 'image_urls', 'shop_url']:
+                if col in df.columns:
+                    df[col] = df[col].astype(str)
 
             # 表示するカラムの順番を調整
             display_columns = [
@@ -111,8 +118,8 @@ def product_detail_view():
 
         for i, uploaded_file in enumerate(uploaded_files):
             try:
-                html_content = uploaded_file.getvalue().decode("utf-8")
-                item = parse_product_from_string(html_content)
+                html_bytes = uploaded_file.getvalue()
+                item = parse_product_from_string(html_bytes)
                 if item:
                     all_products.append(item)
             except Exception as e:
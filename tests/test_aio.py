@@ -0,0 +1,161 @@
+"""
+非同期API (`aio`) のテスト
+"""
+import asyncio
+import contextlib
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from shpsg_parser.aio import aparse_from_bytes, aparse_many, aparse_stream
+from shpsg_parser.archives import ArchiveDocument
+from shpsg_parser.parser_category import parse_from_string as parse_from_string_category
+from shpsg_parser.parser_product import parse_from_string as parse_from_string_product
+
+SAMPLES_DIR = Path(__file__).parent.parent / "data" / "samples"
+CATEGORY_HTML = (SAMPLES_DIR / "category_sample.html").read_bytes()
+PRODUCT_HTML = (SAMPLES_DIR / "product_detail_sample.html").read_bytes()
+
+
+class _SlowParser:
+    """解析に時間がかかるパーサー。同時に実行された数の最大値を記録する"""
+
+    def __init__(self, seconds: float = 0.05):
+        self.seconds = seconds
+        self.running = 0
+        self.max_running = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, html_content, **options):
+        with self._lock:
+            self.running += 1
+            self.calls += 1
+            self.max_running = max(self.max_running, self.running)
+        time.sleep(float(html_content) if html_content else self.seconds)
+        with self._lock:
+            self.running -= 1
+        if not html_content:
+            raise ValueError("empty page")
+        return [html_content]
+
+
+def test_aparse_from_bytes_matches_sync():
+    """非同期の解析結果が、同期のパーサーの結果と一致することを確認する"""
+    items = asyncio.run(aparse_from_bytes(CATEGORY_HTML, parse_from_string_category))
+    assert items == parse_from_string_category(CATEGORY_HTML)
+
+    # パーサーを省略した場合はページタイプを自動判定する
+    products = asyncio.run(aparse_from_bytes(PRODUCT_HTML))
+    assert [p.product_name for p in products] == [parse_from_string_product(PRODUCT_HTML).product_name]
+
+
+def test_aparse_from_bytes_raises_errors():
+    """解析中の例外が呼び出し元へ送出されることを確認する"""
+    with pytest.raises(ValueError, match="empty page"):
+        asyncio.run(aparse_from_bytes(b"", _SlowParser(0)))
+
+
+def test_aparse_many_with_process_pool():
+    """プロセスプールで解析した結果が、入力順に返されることを確認する"""
+    documents = [
+        ArchiveDocument(name="category.html", content=CATEGORY_HTML),
+        PRODUCT_HTML,
+        ArchiveDocument(name="empty.html", content=b"<html></html>"),
+    ]
+
+    async def run():
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            return await aparse_many(documents, executor=executor, concurrency=2)
+
+    results = asyncio.run(run())
+    assert [r.path for r in results] == ["category.html", "<document 1>", "empty.html"]
+    assert len(results[0].items) == 60
+    assert len(results[1].items) == 1
+    assert results[2].error is None and results[2].items == []
+
+
+def test_aparse_stream_limits_concurrency():
+    """同時に実行される解析が `concurrency` 件までに制限され、完了した順に結果が返されることを確認する"""
+    parser = _SlowParser()
+    documents = [b"0.2", b"0.01", b"0.01", b"0.01"]
+
+    async def run():
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            return [r.items[0] async for r in aparse_stream(documents, parser, executor=executor, concurrency=2)]
+
+    order = asyncio.run(run())
+    assert parser.max_running == 2
+    assert sorted(order) == sorted(documents)
+    assert order[-1] == b"0.2"
+
+
+def test_aparse_stream_reads_input_lazily():
+    """解析が追いつかない間は、非同期イテレーターの入力が読み込まれないことを確認する"""
+    parser = _SlowParser()
+    produced = []
+
+    async def documents():
+        for i in range(100):
+            produced.append(i)
+            yield b""
+
+    async def run():
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            async with contextlib.aclosing(aparse_stream(documents(), parser, executor=executor, concurrency=2)) as stream:
+                async for result in stream:
+                    assert result.error == "empty page"
+                    break
+
+    asyncio.run(run())
+    assert len(produced) <= 3
+    assert parser.calls <= 3
+
+
+def test_aparse_many_cancellation():
+    """呼び出し元のタスクがキャンセルされた場合、未開始の解析がキャンセルされることを確認する"""
+    parser = _SlowParser()
+
+    async def run():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            task = asyncio.create_task(aparse_many([b"0.1"] * 10, parser, executor=executor, concurrency=5))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+    asyncio.run(run())
+    # 実行中だった1件のみが解析され、エグゼキューターの待ち行列にあった解析は実行されない
+    assert parser.calls == 1
+
+
+def test_aparse_stream_reads_sync_iterator_off_loop():
+    """読み込みでブロックする同期的なイテレーターが、イベントループを止めないことを確認する"""
+    def documents():
+        for _ in range(2):
+            time.sleep(0.1)
+            yield b"0.01"
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker_task = asyncio.create_task(ticker())
+        try:
+            results = [r async for r in aparse_stream(documents(), _SlowParser())]
+        finally:
+            ticker_task.cancel()
+        return results, ticks
+
+    results, ticks = asyncio.run(run())
+    assert [r.items for r in results] == [[b"0.01"], [b"0.01"]]
+    # 入力を待つ0.2秒の間も、他のタスクが実行される
+    assert ticks >= 10
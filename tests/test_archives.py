@@ -0,0 +1,140 @@
+"""
+アーカイブの読み込み (`archives`) のテスト
+"""
+import gzip
+import io
+import tarfile
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from shpsg_parser.archives import ArchiveDocument, iter_archive, parse_document
+from shpsg_parser.parallel import parse_documents
+from shpsg_parser.parser_category import parse_from_file as parse_from_file_category
+from shpsg_parser.parser_category import parse_from_string as parse_from_string_category
+from shpsg_parser.parser_shop import parse_from_file as parse_from_file_shop
+
+SAMPLES_DIR = Path(__file__).parent.parent / "data" / "samples"
+CATEGORY_HTML_PATH = SAMPLES_DIR / "category_sample.html"
+SHOP_HTML_PATH = SAMPLES_DIR / "shop_sample.html"
+
+
+def _warc_record(headers: dict, block: bytes) -> bytes:
+    lines = ["WARC/1.0"] + [f"{name}: {value}" for name, value in headers.items()]
+    lines.append(f"Content-Length: {len(block)}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("utf-8") + block + b"\r\n\r\n"
+
+
+def _http_response(body: bytes, content_type: str = "text/html; charset=utf-8") -> bytes:
+    """gzipで圧縮し、chunked転送エンコーディングで送られたHTTPレスポンス"""
+    compressed = gzip.compress(body)
+    half = len(compressed) // 2
+    chunked = b"".join(
+        f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n" for chunk in (compressed[:half], compressed[half:])
+    ) + b"0\r\n\r\n"
+    head = (
+        "HTTP/1.1 200 OK\r\n"
+        f"Content-Type: {content_type}\r\n"
+        "Content-Encoding: gzip\r\n"
+        "Transfer-Encoding: chunked\r\n\r\n"
+    )
+    return head.encode("utf-8") + chunked
+
+
+@pytest.fixture
+def expected():
+    return {
+        "category": parse_from_file_category(str(CATEGORY_HTML_PATH)),
+        "shop": parse_from_file_shop(str(SHOP_HTML_PATH)),
+    }
+
+
+def test_iter_tar(tmp_path):
+    """tarのHTMLメンバー (圧縮されたものを含む) のみが順に読み込まれることを確認する"""
+    path = tmp_path / "crawl.tar.gz"
+    with tarfile.open(path, "w:gz") as tar:
+        for name, data in [
+            ("2025-01-01/category.html", CATEGORY_HTML_PATH.read_bytes()),
+            ("2025-01-01/notes.txt", b"notes"),
+            ("2025-01-02/shop.html.gz", gzip.compress(SHOP_HTML_PATH.read_bytes())),
+        ]:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+
+    documents = list(iter_archive(path))
+    assert [doc.name for doc in documents] == [
+        f"{path}::2025-01-01/category.html",
+        f"{path}::2025-01-02/shop.html.gz",
+    ]
+    assert documents[1].content == SHOP_HTML_PATH.read_bytes()
+    assert [doc.name for doc in iter_archive(path, exclude=["2025-01-02/*"])] == [f"{path}::2025-01-01/category.html"]
+
+
+def test_iter_zip(tmp_path):
+    """zipのHTMLメンバーが読み込まれることを確認する"""
+    path = tmp_path / "crawl.zip"
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("pages/category.html", CATEGORY_HTML_PATH.read_bytes())
+        archive.writestr("pages/image.png", b"png")
+
+    documents = list(iter_archive(path))
+    assert [doc.name for doc in documents] == [f"{path}::pages/category.html"]
+    assert documents[0].content == CATEGORY_HTML_PATH.read_bytes()
+
+
+def test_iter_warc(tmp_path):
+    """WARCのHTMLのレスポンスのみが、デコードされた本文とURLとともに読み込まれることを確認する"""
+    url = "https://shopee.sg/shop-name"
+    path = tmp_path / "crawl.warc.gz"
+    records = [
+        _warc_record({"WARC-Type": "warcinfo"}, b"software: test"),
+        _warc_record({"WARC-Type": "request", "WARC-Target-URI": url}, b"GET / HTTP/1.1\r\n\r\n"),
+        _warc_record({"WARC-Type": "response", "WARC-Target-URI": url}, _http_response(SHOP_HTML_PATH.read_bytes())),
+        _warc_record(
+            {"WARC-Type": "response", "WARC-Target-URI": "https://shopee.sg/logo.png"},
+            _http_response(b"png", content_type="image/png"),
+        ),
+    ]
+    # WARCファイルはレコードごとのgzipメンバーを連結した形式で保存される
+    path.write_bytes(b"".join(gzip.compress(record) for record in records))
+
+    documents = list(iter_archive(path))
+    assert len(documents) == 1
+    assert documents[0].url == url
+    assert documents[0].content == SHOP_HTML_PATH.read_bytes()
+
+
+def test_iter_archive_unsupported(tmp_path):
+    """対応していない形式のファイルは ValueError になることを確認する"""
+    path = tmp_path / "crawl.bin"
+    path.write_bytes(b"not an archive")
+    with pytest.raises(ValueError):
+        iter_archive(path)
+
+
+def test_iter_archive_opens_archive_eagerly(tmp_path):
+    """壊れたアーカイブは、ドキュメントを読み進める前 (呼び出し時) にエラーになることを確認する"""
+    bad_zip = tmp_path / "bad.zip"
+    bad_zip.write_bytes(b"PK\x03\x04garbage")
+    with pytest.raises(zipfile.BadZipFile):
+        iter_archive(bad_zip)
+
+    bad_warc = tmp_path / "bad.warc"
+    bad_warc.write_bytes(b"not a warc record\r\n")
+    with pytest.raises(ValueError):
+        iter_archive(bad_warc)
+
+
+def test_parse_documents_in_parallel(tmp_path, expected):
+    """ドキュメントを並列に解析した結果が、ファイルから解析した結果と一致することを確認する"""
+    documents = [
+        ArchiveDocument(name="category", content=CATEGORY_HTML_PATH.read_bytes()),
+        ArchiveDocument(name="shop", content=SHOP_HTML_PATH.read_bytes(), url="https://shopee.sg/shop-name"),
+    ]
+    results = list(parse_documents(documents, parse_document, workers=2, chunksize=1))
+    assert [r.path for r in results] == ["category", "shop"]
+    assert [r.items for r in results] == [expected["category"], expected["shop"]]
+
+    assert parse_document(documents[0], parse_from_string_category, engine="lxml") == expected["category"]
@@ -0,0 +1,171 @@
+"""
+解析結果のキャッシュ (`cache`) のテスト
+"""
+import shutil
+import sqlite3
+from pathlib import Path
+
+from shpsg_parser.cache import CACHE_FILENAME, ResultCache, file_digest, parse_files_cached
+from shpsg_parser.parallel import parse_files
+from shpsg_parser.parser_category import parse_from_file as parse_from_file_category
+
+SAMPLES_DIR = Path(__file__).parent.parent / "data" / "samples"
+CATEGORY_HTML_PATH = SAMPLES_DIR / "category_sample.html"
+
+
+def _count_calls(calls):
+    def parse_func(path):
+        calls.append(path)
+        return parse_from_file_category(path)
+    return parse_func
+
+
+def test_cache_hit_skips_parsing(tmp_path):
+    """2回目の実行では、内容が変わっていないファイルを再解析しないことを確認する"""
+    html_path = tmp_path / "category.html"
+    shutil.copy(CATEGORY_HTML_PATH, html_path)
+    expected = list(parse_files([html_path], parse_from_file_category))
+
+    calls = []
+    with ResultCache(tmp_path / "cache", "category") as cache:
+        first = list(parse_files_cached([html_path], _count_calls(calls), cache))
+        assert (cache.stats.hits, cache.stats.misses) == (0, 1)
+
+    with ResultCache(tmp_path / "cache", "category") as cache:
+        second = list(parse_files_cached([html_path], _count_calls(calls), cache))
+        assert (cache.stats.hits, cache.stats.misses) == (1, 0)
+
+    assert calls == [str(html_path)]
+    assert first[0].items == second[0].items == expected[0].items
+
+
+def test_cache_key_depends_on_content_and_namespace(tmp_path):
+    """ファイルの内容や名前空間 (解析オプション) が変わった場合は再解析されることを確認する"""
+    html_path = tmp_path / "category.html"
+    shutil.copy(CATEGORY_HTML_PATH, html_path)
+    with ResultCache(tmp_path / "cache", "category") as cache:
+        list(parse_files_cached([html_path], parse_from_file_category, cache))
+
+    with ResultCache(tmp_path / "cache", "category:lxml") as cache:
+        list(parse_files_cached([html_path], parse_from_file_category, cache))
+        assert cache.stats.misses == 1
+
+    with open(html_path, "a", encoding="utf-8") as f:
+        f.write("<!-- updated -->")
+    with ResultCache(tmp_path / "cache", "category") as cache:
+        list(parse_files_cached([html_path], parse_from_file_category, cache))
+        assert cache.stats.misses == 1
+
+
+def test_cache_preserves_order_and_errors(tmp_path):
+    """キャッシュの有無が混在しても入力順に結果が返り、エラーはキャッシュされないことを確認する"""
+    first = tmp_path / "a.html"
+    second = tmp_path / "b.html"
+    shutil.copy(CATEGORY_HTML_PATH, first)
+    second.write_text("<html><body></body></html>", encoding="utf-8")
+    missing = tmp_path / "missing.html"
+
+    with ResultCache(tmp_path / "cache") as cache:
+        list(parse_files_cached([second], parse_from_file_category, cache))
+        results = list(parse_files_cached([first, second, missing], parse_from_file_category, cache))
+
+    assert [r.path for r in results] == [str(first), str(second), str(missing)]
+    assert [len(r.items) for r in results] == [60, 0, 0]
+    assert results[2].error is not None
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    """合計サイズが上限を超えた場合、最後に使われた日時が古いものから削除されることを確認する"""
+    with ResultCache(tmp_path / "cache", max_bytes=200) as cache:
+        cache.put("old", ["x" * 80])
+        cache.put("new", ["y" * 80])
+        assert cache.get("old") == ["x" * 80]  # "old" を最近使ったものにする
+        cache.put("newest", ["z" * 80])
+
+        assert cache.stats.evictions == 1
+        assert cache.get("new") is None
+        assert cache.get("old") is not None
+        assert cache.get("newest") is not None
+
+
+def test_file_digest(tmp_path):
+    """同じ内容のファイルは同じハッシュになることを確認する"""
+    a = tmp_path / "a.html"
+    b = tmp_path / "b.html"
+    a.write_bytes(b"<html></html>")
+    b.write_bytes(b"<html></html>")
+    assert file_digest(a) == file_digest(b)
+    assert len(file_digest(a)) == 64
+
+
+def test_digest_for_reuses_digest_of_unchanged_file(tmp_path, monkeypatch):
+    """サイズと更新日時が変わっていないファイルは、内容を読まずにハッシュを返すことを確認する"""
+    html_path = tmp_path / "a.html"
+    html_path.write_bytes(b"<html></html>")
+    with ResultCache(tmp_path / "cache") as cache:
+        digest = cache.digest_for(html_path)
+
+    with ResultCache(tmp_path / "cache") as cache:
+        monkeypatch.setattr("shpsg_parser.cache.file_digest", lambda path: "changed")
+        assert cache.digest_for(html_path) == digest
+
+        html_path.write_bytes(b"<html><body></body></html>")
+        assert cache.digest_for(html_path) == "changed"
+
+
+def test_cache_parses_paths_as_they_arrive(tmp_path):
+    """パスの列を全て読む前に、キャッシュにないファイルの解析が始まることを確認する"""
+    paths = [tmp_path / f"{i}.html" for i in range(3)]
+    for path in paths:
+        shutil.copy(CATEGORY_HTML_PATH, path)
+    events = []
+
+    def discover():
+        for path in paths:
+            events.append(("found", str(path)))
+            yield path
+
+    def parse_func(path):
+        events.append(("parsed", path))
+        return parse_from_file_category(path)
+
+    with ResultCache(tmp_path / "cache") as cache:
+        results = parse_files_cached(discover(), parse_func, cache)
+        next(results)
+        assert events == [("found", str(paths[0])), ("parsed", str(paths[0]))]
+        list(results)
+        # 内容が同じ2件目以降はキャッシュから返される
+        assert (cache.stats.hits, cache.stats.misses) == (2, 1)
+
+
+def test_cache_counts_evicted_entry_once(tmp_path):
+    """実行中に削除されたキャッシュを解析し直した場合も、ミスが1件として数えられることを確認する"""
+    cached = tmp_path / "cached.html"
+    other = tmp_path / "other.html"
+    shutil.copy(CATEGORY_HTML_PATH, cached)
+    other.write_text(CATEGORY_HTML_PATH.read_text(encoding="utf-8") + "<!-- other -->", encoding="utf-8")
+    with ResultCache(tmp_path / "cache") as cache:
+        list(parse_files_cached([cached], parse_from_file_category, cache))
+        size = cache._total_bytes
+
+    # 上限を1件分にし、`other` の結果の保存で `cached` の結果が削除されるようにする
+    with ResultCache(tmp_path / "cache", max_bytes=size) as cache:
+        results = list(parse_files_cached([other, cached], parse_from_file_category, cache, workers=2, chunksize=1))
+        # 解析し直した `cached` の結果の保存で、`other` の結果も削除される
+        assert cache.stats.evictions == 2
+        assert (cache.stats.hits, cache.stats.misses) == (0, 2)
+    assert [r.path for r in results] == [str(other), str(cached)]
+    assert [len(r.items) for r in results] == [60, 60]
+
+
+def test_cache_commits_each_result(tmp_path):
+    """キャッシュを閉じる前でも、保存した結果がデータベースに確定されていることを確認する"""
+    html_path = tmp_path / "category.html"
+    shutil.copy(CATEGORY_HTML_PATH, html_path)
+    with ResultCache(tmp_path / "cache") as cache:
+        list(parse_files_cached([html_path], parse_from_file_category, cache))
+        conn = sqlite3.connect(tmp_path / "cache" / CACHE_FILENAME)
+        try:
+            assert conn.execute("SELECT COUNT(*) FROM results").fetchone()[0] == 1
+        finally:
+            conn.close()
@@ -0,0 +1,140 @@
+"""
+CLI (`cli.parse`) のテスト
+"""
+import csv
+import json
+import shutil
+import sqlite3
+from pathlib import Path
+
+from typer.testing import CliRunner
+
+from shpsg_parser import cli
+from shpsg_parser.cli import app
+
+SAMPLES_DIR = Path(__file__).parent.parent / "data" / "samples"
+CATEGORY_HTML_PATH = SAMPLES_DIR / "category_sample.html"
+
+runner = CliRunner()
+
+
+def test_no_validate_output_matches_validated_run(tmp_path):
+    """`--no-validate` でも、検証した場合と同じ内容が出力されることを確認する"""
+    validated = tmp_path / "validated.csv"
+    trusted = tmp_path / "trusted.csv"
+    for output, options in ((validated, []), (trusted, ["--no-validate"])):
+        result = runner.invoke(app, [str(output), "--html-dir", str(SAMPLES_DIR), "--engine", "lxml", *options])
+        assert result.exit_code == 0, result.output
+
+    assert trusted.read_text(encoding="utf-8") == validated.read_text(encoding="utf-8")
+    # URLは検証済みのモデルと同じく正規化 (パーセントエンコード) されている
+    assert "Direct-From-Japan%E2%98%85-i." in trusted.read_text(encoding="utf-8")
+
+
+def _html_dir(tmp_path, count: int = 2) -> Path:
+    html_dir = tmp_path / "html"
+    html_dir.mkdir()
+    for i in range(count):
+        shutil.copy(CATEGORY_HTML_PATH, html_dir / f"{i}.html")
+    return html_dir
+
+
+def _data_rows(path: Path) -> int:
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        return len(list(csv.reader(f))) - 1
+
+
+def test_incremental_rewrites_deleted_output(tmp_path):
+    """出力ファイルが削除された場合は、マニフェストに記録済みのファイルも解析し直すことを確認する"""
+    html_dir = _html_dir(tmp_path)
+    output = tmp_path / "products.csv"
+    args = [str(output), "--html-dir", str(html_dir), "--incremental"]
+    assert runner.invoke(app, args).exit_code == 0
+    assert _data_rows(output) == 120
+
+    output.unlink()
+    result = runner.invoke(app, args)
+    assert result.exit_code == 0, result.output
+    assert _data_rows(output) == 120
+
+
+def test_incremental_saves_manifest_per_batch(tmp_path, monkeypatch):
+    """バッチを書き出すたびにマニフェストが保存され、異常終了後の実行で行が重複しないことを確認する"""
+    html_dir = _html_dir(tmp_path)
+    output = tmp_path / "products.csv"
+    manifest_path = tmp_path / "products.csv.manifest.json"
+    parse_files = cli.parse_files
+
+    def crashing_parse_files(paths, *args, **kwargs):
+        results = parse_files(paths, *args, **kwargs)
+        yield next(results)
+        # 1件目の結果は書き出され、マニフェストに記録されている
+        assert len(json.loads(manifest_path.read_text(encoding="utf-8"))["files"]) == 1
+        raise RuntimeError("crash")
+
+    args = [str(output), "--html-dir", str(html_dir), "--incremental", "--batch-size", "1"]
+    monkeypatch.setattr(cli, "parse_files", crashing_parse_files)
+    result = runner.invoke(app, args)
+    assert isinstance(result.exception, RuntimeError)
+    assert _data_rows(output) == 60
+
+    monkeypatch.setattr(cli, "parse_files", parse_files)
+    result = runner.invoke(app, args)
+    assert result.exit_code == 0, result.output
+    assert _data_rows(output) == 120
+
+
+def test_corrupt_archives_report_clean_error(tmp_path):
+    """壊れたzipやWARCを指定した場合、トレースバックではなくエラーメッセージで終了することを確認する"""
+    bad_zip = tmp_path / "bad.zip"
+    bad_zip.write_bytes(b"PK\x03\x04garbage")
+    bad_warc = tmp_path / "bad.warc"
+    bad_warc.write_bytes(b"not a warc record\r\n")
+    for archive in (bad_zip, bad_warc):
+        result = runner.invoke(app, [str(tmp_path / "out.csv"), "--parser-type", "auto", "--archive", str(archive)])
+        assert result.exit_code == 1
+        assert result.exception is None or isinstance(result.exception, SystemExit)
+        assert "エラー: アーカイブを読み込めませんでした" in result.output
+
+
+def test_archive_corrupted_midway_keeps_read_documents(tmp_path):
+    """読み込みの途中で破損が見つかった場合、それまでの結果を出力してエラーで終了することを確認する"""
+    html = CATEGORY_HTML_PATH.read_bytes()
+    record = (
+        b"WARC/1.0\r\nWARC-Type: resource\r\nWARC-Target-URI: https://shopee.sg/a-cat.1\r\n"
+        b"Content-Type: text/html\r\nContent-Length: " + str(len(html)).encode() + b"\r\n\r\n" + html + b"\r\n\r\n"
+    )
+    archive = tmp_path / "crawl.warc"
+    archive.write_bytes(record + b"garbage\r\n")
+    output = tmp_path / "out.csv"
+
+    result = runner.invoke(app, [str(output), "--parser-type", "auto", "--archive", str(archive)])
+    assert result.exit_code == 1
+    assert result.exception is None or isinstance(result.exception, SystemExit)
+    assert "エラー: アーカイブを読み込めませんでした" in result.output
+    assert _data_rows(output) == 60
+
+
+def test_incremental_changed_file_rows(tmp_path):
+    """変更されたファイルは再解析され、CSVでは以前の行が残り、SQLiteでは重複しないことを確認する"""
+    html_dir = _html_dir(tmp_path)
+    csv_output = tmp_path / "products.csv"
+    sqlite_output = tmp_path / "products.sqlite"
+    runs = [[str(csv_output), "--html-dir", str(html_dir), "--incremental"],
+            [str(sqlite_output), "--html-dir", str(html_dir), "--incremental", "--format", "sqlite"]]
+    for args in runs:
+        assert runner.invoke(app, args).exit_code == 0
+
+    with open(html_dir / "0.html", "a", encoding="utf-8") as f:
+        f.write("<!-- updated -->")
+    for args in runs:
+        result = runner.invoke(app, args)
+        assert result.exit_code == 0, result.output
+
+    # CSVは追記のみのため、変更されたファイルの行が重複する (ドキュメントに記載した動作)
+    assert _data_rows(csv_output) == 180
+    conn = sqlite3.connect(sqlite_output)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM products").fetchone()[0] == 60
+    finally:
+        conn.close()
@@ -0,0 +1,89 @@
+"""
+HTMLファイルの探索と圧縮ファイルの読み込み (`discovery`) のテスト
+"""
+import gzip
+import types
+from pathlib import Path
+
+import pytest
+
+from shpsg_parser.discovery import discover_files, open_html
+from shpsg_parser.parser_category import parse_from_file as parse_from_file_category
+from shpsg_parser.parser_auto import parse_from_file as parse_from_file_auto
+
+SAMPLES_DIR = Path(__file__).parent.parent / "data" / "samples"
+CATEGORY_HTML_PATH = SAMPLES_DIR / "category_sample.html"
+
+
+@pytest.fixture
+def crawl_dir(tmp_path):
+    """日付とショップごとに入れ子になったクロール結果のディレクトリ"""
+    for relative_path in [
+        "b.html",
+        "a.html",
+        "notes.txt",
+        "2025-01-02/shop1/p1.html.gz",
+        "2025-01-01/shop2/p2.html",
+        "2025-01-01/shop2/tmp/p3.html",
+    ]:
+        path = tmp_path / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"<html></html>")
+    return tmp_path
+
+
+def _relative(paths, root):
+    return [path.relative_to(root).as_posix() for path in paths]
+
+
+def test_discover_files_flat(crawl_dir):
+    """既定では直下のHTMLファイルのみを名前順に返すことを確認する"""
+    files = discover_files(crawl_dir)
+    assert isinstance(files, types.GeneratorType)
+    assert _relative(files, crawl_dir) == ["a.html", "b.html"]
+
+
+def test_discover_files_recursive_with_patterns(crawl_dir):
+    """再帰的な探索と、ファイル名・相対パスによる対象・除外の指定を確認する"""
+    files = discover_files(crawl_dir, recursive=True)
+    assert _relative(files, crawl_dir) == [
+        "a.html",
+        "b.html",
+        "2025-01-01/shop2/p2.html",
+        "2025-01-01/shop2/tmp/p3.html",
+        "2025-01-02/shop1/p1.html.gz",
+    ]
+
+    files = discover_files(crawl_dir, include=["*.html"], exclude=["tmp", "b.*"], recursive=True)
+    assert _relative(files, crawl_dir) == ["a.html", "2025-01-01/shop2/p2.html"]
+
+    files = discover_files(crawl_dir, include=["2025-01-02/*"], recursive=True)
+    assert _relative(files, crawl_dir) == ["2025-01-02/shop1/p1.html.gz"]
+
+
+def test_open_html_gzip(tmp_path):
+    """gzipで圧縮されたファイルを展開して読み込めることを確認する"""
+    path = tmp_path / "page.html.gz"
+    path.write_bytes(gzip.compress("<html>日本語</html>".encode("utf-8")))
+    with open_html(path) as f:
+        assert f.read() == "<html>日本語</html>".encode("utf-8")
+    with open_html(path, "r") as f:
+        assert f.read() == "<html>日本語</html>"
+
+
+def test_open_html_zstd(tmp_path):
+    """zstdで圧縮されたファイルを展開して読み込めることを確認する"""
+    zstandard = pytest.importorskip("zstandard")
+    path = tmp_path / "page.html.zst"
+    path.write_bytes(zstandard.ZstdCompressor().compress(b"<html></html>"))
+    with open_html(path) as f:
+        assert f.read() == b"<html></html>"
+
+
+def test_parse_compressed_file(tmp_path):
+    """圧縮されたHTMLファイルを、元のファイルと同じ結果に解析できることを確認する"""
+    path = tmp_path / "category.html.gz"
+    path.write_bytes(gzip.compress(CATEGORY_HTML_PATH.read_bytes()))
+    expected = parse_from_file_category(str(CATEGORY_HTML_PATH))
+    assert parse_from_file_category(str(path)) == expected
+    assert parse_from_file_auto(str(path)) == expected
@@ -0,0 +1,138 @@
+"""
+解析の計測 (`instrumentation`) のテスト
+"""
+import threading
+import time
+from pathlib import Path
+
+from shpsg_parser import instrumentation
+from shpsg_parser.instrumentation import ParseStats, collect, count, stage
+from shpsg_parser.parallel import parse_files
+from shpsg_parser.parser_category import parse_from_file as parse_from_file_category
+from shpsg_parser.parser_product import parse_from_file as parse_from_file_product
+from shpsg_parser.parser_search import iter_from_file as iter_from_file_search
+from shpsg_parser.parser_search import parse_from_file as parse_from_file_search
+
+SAMPLES_DIR = Path(__file__).parent.parent / "data" / "samples"
+CATEGORY_HTML_PATH = SAMPLES_DIR / "category_sample.html"
+SEARCH_HTML_PATH = SAMPLES_DIR / "keyword_search_result_sample.html"
+PRODUCT_HTML_PATH = SAMPLES_DIR / "product_detail_sample.html"
+
+
+def test_disabled_by_default():
+    """計測を有効にしない限り、何も記録されないことを確認する"""
+    assert not instrumentation.is_enabled()
+    with stage("tree"):
+        count("items")
+    parse_from_file_category(str(CATEGORY_HTML_PATH))
+    assert not instrumentation.is_enabled()
+
+
+def test_collect_records_stages_and_counters():
+    """カテゴリページの解析で、段階ごとの時間とページ数・アイテム数が記録されることを確認する"""
+    with collect() as stats:
+        items = parse_from_file_category(str(CATEGORY_HTML_PATH))
+
+    assert not instrumentation.is_enabled()
+    assert {"read", "tree", "select", "extract", "validate"} <= set(stats.timings)
+    assert stats.calls["read"] == stats.calls["tree"] == stats.calls["extract"] == 1
+    assert stats.calls["validate"] == len(items) == 60
+    assert stats.counters["pages.category"] == 1
+    assert stats.counters["items.category"] == 60
+    assert "rating.pattern1" in stats.counters
+
+
+def test_nested_stages_exclude_inner_time():
+    """入れ子の段階では、外側の時間に内側の時間が含まれないことを確認する"""
+    with collect() as stats:
+        with stage("outer"):
+            with stage("inner"):
+                time.sleep(0.05)
+
+    assert stats.timings["inner"] >= 0.05
+    assert stats.timings["outer"] < 0.05
+
+
+def test_stages_in_threads_do_not_interleave():
+    """別のスレッドで並行に実行した段階が、互いの時間に影響しないことを確認する"""
+    outer_entered = threading.Event()
+    other_entered = threading.Event()
+    outer_exited = threading.Event()
+
+    def other():
+        outer_entered.wait()
+        with stage("other"):
+            other_entered.set()
+            outer_exited.wait()
+
+    with collect() as stats:
+        thread = threading.Thread(target=other)
+        thread.start()
+        with stage("outer"):
+            time.sleep(0.05)
+            outer_entered.set()
+            other_entered.wait()
+        outer_exited.set()
+        thread.join()
+
+    assert stats.timings["outer"] >= 0.05
+    assert stats.timings["other"] < 0.05
+    assert stats.calls == {"outer": 1, "other": 1}
+
+
+def test_counters_match_between_engines():
+    """同じページでは、bs4とlxmlのエンジンでフォールバックの件数が一致することを確認する"""
+    counters = {}
+    for engine in ("bs4", "lxml"):
+        with collect() as stats:
+            parse_from_file_search(str(SEARCH_HTML_PATH), engine=engine)
+        counters[engine] = stats.counters
+    assert counters["bs4"] == counters["lxml"]
+
+
+def test_product_page_counts_single_item():
+    """商品詳細ページは1ページ1アイテムとして数えられることを確認する"""
+    with collect() as stats:
+        parse_from_file_product(str(PRODUCT_HTML_PATH))
+    assert stats.counters["pages.product"] == 1
+    assert stats.counters["items.product"] == 1
+    assert "json_ld" in stats.timings
+
+
+def test_parse_files_with_profile(tmp_path):
+    """`profile=True` では、ワーカーで計測した結果とファイルのエラー数が返されることを確認する"""
+    paths = [CATEGORY_HTML_PATH, tmp_path / "missing.html"]
+    results = list(parse_files(paths, parse_from_file_category, workers=2, profile=True))
+    total = ParseStats()
+    for result in results:
+        total.merge(result.stats)
+
+    assert total.counters["items.category"] == 60
+    assert total.counters["errors.file"] == 1
+    assert all(r.stats is None for r in parse_files(paths, parse_from_file_category))
+
+
+def test_summary_lists_stages_and_counters():
+    """集計結果の表に、段階とカウンターが含まれることを確認する"""
+    stats = ParseStats()
+    stats.add_time("tree", 0.5)
+    stats.increment("errors.item", 2)
+    summary = stats.summary()
+    assert "tree" in summary and "100.0%" in summary
+    assert "errors.item" in summary
+
+
+def test_iterator_counts_items_when_closed_early():
+    """アイテムを1件ずつ返すパーサーでも、途中で閉じた場合に返した件数とページ数が記録されることを確認する"""
+    with collect() as stats:
+        items = iter_from_file_search(str(SEARCH_HTML_PATH), engine="lxml")
+        first_items = [next(items) for _ in range(5)]
+        time.sleep(0.05)
+        items.close()
+
+    assert len(first_items) == 5
+    assert stats.counters["pages.search"] == 1
+    assert stats.counters["items.search"] == 5
+    assert stats.calls["extract"] == 1
+    # 呼び出し元の処理時間は、抽出の時間に含まれない
+    assert stats.timings["extract"] < 0.05
@@ -0,0 +1,79 @@
+"""
+lxmlエンジン (`lxml_engine`) のテスト
+
+`data/samples` のすべてのHTMLファイルについて、各パーサーの `engine="lxml"` の結果が
+BeautifulSoup版の結果と一致することを確認する。
+"""
+import pytest
+from pathlib import Path
+
+from shpsg_parser import parser_category, parser_search, parser_shop
+from shpsg_parser.lxml_engine import build_tree, get_string, get_text
+from shpsg_parser.parser_base import make_soup
+
+SAMPLES_DIR = Path(__file__).parent.parent / "data" / "samples"
+SAMPLE_FILES = sorted(SAMPLES_DIR.glob("*.html"))
+PARSERS = [parser_category, parser_search, parser_shop]
+
+
+@pytest.mark.parametrize("parser", PARSERS, ids=lambda m: m.__name__.split(".")[-1])
+@pytest.mark.parametrize("sample_path", SAMPLE_FILES, ids=lambda p: p.name)
+def test_lxml_engine_parity(parser, sample_path):
+    """lxmlエンジンの結果がBeautifulSoup版と一致することを確認する"""
+    html_bytes = sample_path.read_bytes()
+    expected = parser.parse_from_bytes(html_bytes)
+    actual = parser.parse_from_bytes(html_bytes, engine="lxml")
+    assert actual == expected
+
+
+def test_parse_from_file_with_lxml_engine():
+    """`parse_from_file` でもエンジンを選択できることを確認する"""
+    items = parser_category.parse_from_file(str(SAMPLES_DIR / "category_sample.html"), engine="lxml")
+    assert len(items) == 60
+    assert items[0].rating == 4.9
+
+
+def test_unsupported_engine():
+    """未対応のエンジンを指定した場合に ValueError が発生することを確認する"""
+    with pytest.raises(ValueError):
+        parser_search.parse_from_string("<html></html>", engine="html5lib")
+
+
+def test_lxml_engine_empty_document():
+    """空のドキュメントや不正なHTMLで空のリストが返ることを確認する"""
+    assert parser_shop.parse_from_string("", engine="lxml") == []
+    assert parser_category.parse_from_string("   ", engine="lxml") == []
+    assert parser_category.parse_from_string("This is not valid HTML.", engine="lxml") == []
+
+
+@pytest.mark.parametrize("html", [
+    "<div>10 sold</div>",
+    "<div><span>10 sold</span></div>",
+    "<div> <span>10 sold</span></div>",
+    "<div><span>a</span><span>b</span></div>",
+    "<div></div>",
+    "<div><!--c--></div>",
+])
+def test_get_string_matches_beautifulsoup(html):
+    """`get_string` がBeautifulSoupの `Tag.string` と同じ値を返すことを確認する"""
+    element = build_tree(f"<html><body>{html}</body></html>").find(".//div")
+    assert get_string(element) == make_soup(html).div.string
+
+
+def test_get_text_skips_scripts_and_comments():
+    """`get_text` がscriptの中身とコメントを含まないことを確認する"""
+    html = "<div>x<!-- c -->y<script>var z</script><span> q </span>t</div>"
+    element = build_tree(html).find(".//div")
+    assert get_text(element) == make_soup(html).div.get_text()
+    assert get_text(element, strip=True) == "xyqt"
+
+
+@pytest.mark.parametrize("html, encoding", [
+    ('<html><head><meta charset="shift_jis"></head><body><p>日本語</p></body></html>', "shift_jis"),
+    # 文字コードの宣言がない場合もLatin-1ではなくUTF-8として扱う
+    ("<html><body><p>日本語</p></body></html>", "utf-8"),
+])
+def test_build_tree_from_bytes_detects_encoding(html, encoding):
+    """バイト列から構築したツリーで、文字コードが正しく判定されることを確認する"""
+    tree = build_tree(html.encode(encoding))
+    assert get_text(tree.find(".//p")) == "日本語"
@@ -0,0 +1,55 @@
+"""
+処理済みファイルのマニフェスト (`manifest`) のテスト
+"""
+import os
+
+import pytest
+
+from shpsg_parser.manifest import Manifest
+
+
+def _write(path, content: bytes, mtime_ns: int = None):
+    path.write_bytes(content)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_changed_files_after_record(tmp_path):
+    """記録済みのファイルは次回以降の判定で除外されることを確認する"""
+    a = tmp_path / "a.html"
+    b = tmp_path / "b.html"
+    _write(a, b"<html>a</html>")
+    _write(b, b"<html>b</html>")
+
+    manifest = Manifest.load(tmp_path / "out.csv.manifest.json")
+    assert list(manifest.changed_files([a, b])) == [str(a), str(b)]
+    manifest.record(a)
+    manifest.save()
+
+    # 解析に失敗して記録されなかったファイルは、次回も対象になる
+    reloaded = Manifest.load(tmp_path / "out.csv.manifest.json")
+    assert list(reloaded.changed_files([a, b])) == [str(b)]
+
+
+def test_changed_files_detects_modified_content(tmp_path):
+    """内容が変わったファイルのみが対象になり、更新日時のみの変更は除外されることを確認する"""
+    a = tmp_path / "a.html"
+    b = tmp_path / "b.html"
+    _write(a, b"<html>a</html>", mtime_ns=1_000_000_000)
+    _write(b, b"<html>b</html>", mtime_ns=1_000_000_000)
+    manifest = Manifest(tmp_path / "manifest.json")
+    for path in manifest.changed_files([a, b]):
+        manifest.record(path)
+
+    _write(a, b"<html>a</html>", mtime_ns=2_000_000_000)  # 同じ内容で保存し直した
+    _write(b, b"<html>B</html>", mtime_ns=2_000_000_000)  # 内容が変わった
+    assert list(manifest.changed_files([a, b])) == [str(b)]
+    assert manifest.entries[str(a)].mtime_ns == 2_000_000_000
+
+
+def test_load_unsupported_version(tmp_path):
+    """未対応の形式のマニフェストを読み込んだ場合に ValueError が発生することを確認する"""
+    path = tmp_path / "manifest.json"
+    path.write_text('{"version": 999, "files": {}}', encoding="utf-8")
+    with pytest.raises(ValueError):
+        Manifest.load(path)
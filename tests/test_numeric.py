@@ -0,0 +1,79 @@
+"""
+数値の抽出 (`numeric`) のテスト
+"""
+import math
+from array import array
+
+import pytest
+
+from shpsg_parser.numeric import (
+    parse_price,
+    parse_prices,
+    parse_rating,
+    parse_ratings,
+    parse_sold,
+    parse_sold_counts,
+)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("$1,234.50 - $2,000", 1234.5),
+    ("S$12.90", 12.9),
+    ("$27.25", 27.25),
+    ("-$5", 0.0),
+    ("$", 0.0),
+    (None, 0.0),
+])
+def test_parse_price(text, expected):
+    """範囲価格や桁区切りを含む価格文字列から、低い方の価格が抽出されることを確認する"""
+    assert parse_price(text) == expected
+
+
+def test_parse_price_invalid_number():
+    """数値として解釈できない価格は、従来と同じく `ValueError` となることを確認する"""
+    with pytest.raises(ValueError):
+        parse_price("$1.2.3")
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("1.2k sold/month", 1200),
+    ("5.6K sold/month", 5600),
+    ("4.1k sold", 4100),
+    ("2.01M sold", 2010000),
+    ("10k+ sold", 10000),
+    ("Sold 1.2k", 1200),
+    ("1,234 sold", 1234),
+    ("100 sold / month", 100),
+    ("0 sold", 0),
+    ("1.2.3 sold", 0),
+    ("No sales", 0),
+    (None, 0),
+])
+def test_parse_sold(text, expected):
+    """数値の直後の k/m のみを単位として扱い、小数の誤差で切り捨てられないことを確認する"""
+    assert parse_sold(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("4.9", 4.9),
+    ("Rating: 5.0 / 5", 5.0),
+    ("...", None),
+    ("no rating", None),
+    ("", None),
+])
+def test_parse_rating(text, expected):
+    """評価文字列から最初の数値が抽出され、抽出できない場合はNoneとなることを確認する"""
+    assert parse_rating(text) == expected
+
+
+def test_batch_variants_return_arrays():
+    """まとめて変換する関数が、1件ずつ変換した結果と同じ値の配列を返すことを確認する"""
+    prices = parse_prices(["$1,234.50 - $2,000", "", "S$9.90"])
+    assert prices == array("d", [1234.5, 0.0, 9.9])
+
+    sold = parse_sold_counts(["1.2k sold/month", None, "2M sold"])
+    assert sold == array("q", [1200, 0, 2000000])
+
+    ratings = parse_ratings(["4.8", "no rating"])
+    assert ratings.typecode == "d"
+    assert ratings[0] == 4.8 and math.isnan(ratings[1])
@@ -0,0 +1,38 @@
+"""
+パッケージ (`shpsg_parser`) の公開APIと遅延インポートのテスト
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+import shpsg_parser
+from shpsg_parser import parser_category
+
+
+def _imported_modules(statement: str, modules) -> list:
+    """新しいプロセスで `statement` を実行し、読み込まれたモジュールのうち `modules` に含まれるものを返す"""
+    code = f"{statement}\nimport sys\nprint(' '.join(m for m in {list(modules)!r} if m in sys.modules))"
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    completed = subprocess.run([sys.executable, "-c", code], env=env, check=True, capture_output=True, text=True)
+    return completed.stdout.split()
+
+
+def test_lazy_exports():
+    """公開する名前が、初回のアクセス時に定義元のモジュールから読み込まれることを確認する"""
+    assert shpsg_parser.parse_from_file is parser_category.parse_from_file
+    assert set(shpsg_parser.__all__) <= set(dir(shpsg_parser))
+
+
+def test_unknown_attribute():
+    """存在しない名前にアクセスした場合はAttributeErrorとなることを確認する"""
+    with pytest.raises(AttributeError, match="no_such_name"):
+        shpsg_parser.no_such_name
+
+
+def test_cli_import_does_not_load_parsers():
+    """パッケージとCLIのインポートでは、パーサーやBeautifulSoup、Pydanticが読み込まれないことを確認する"""
+    heavy = ["bs4", "pydantic", "shpsg_parser.parser_category", "shpsg_parser.parser_product"]
+    assert _imported_modules("import shpsg_parser", heavy) == []
+    assert _imported_modules("import shpsg_parser.cli", heavy) == []
@@ -1,6 +1,16 @@
+import io
 import pytest
 import os
-from shpsg_parser.page_type_identifier import get_page_type, PageType
+import re
+from shpsg_parser.page_type_identifier import (
+    get_page_type,
+    sniff_page_type,
+    sniff_page_type_from_file,
+    sniff_page_type_from_stream,
+    find_page_url,
+    PageTypeSniffer,
+    PageType,
+)
 
 SAMPLES_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'samples')
 
@@ -63,3 +73,103 @@ def test_get_page_type_broken_json_ld():
     # Fallback to URL should still identify it as a product page
     url = "https://shopee.sg/Test-Product-i.123.456"
     assert get_page_type(html_content, url) == PageType.PRODUCT_DETAIL
+
+def test_get_page_type_json_ld_without_dom():
+    """Tests the JSON-LD lookup on raw bytes and strings, without a parsed document."""
+    html_content = '<html><head><script type="application/ld+json">{"@type": "Organization"}</script></head></html>'
+    url = "https://shopee.sg/some/nested/path"
+    assert get_page_type(html_content, url) == PageType.SHOP
+    assert get_page_type(html_content.encode("utf-8"), url) == PageType.SHOP
+
+@pytest.mark.parametrize("filename, expected_type", [
+    ("product_detail_sample.html", PageType.PRODUCT_DETAIL),
+    ("shop_sample.html", PageType.SHOP),
+    ("category_sample.html", PageType.CATEGORY),
+    ("keyword_search_result_sample.html", PageType.KEYWORD_SEARCH_RESULT),
+])
+def test_sniff_page_type_with_samples(filename, expected_type):
+    """URLを渡さなくても、保存元URLと目印の文字列だけで判定できることを確認する"""
+    with open(os.path.join(SAMPLES_DIR, filename), 'rb') as f:
+        html_bytes = f.read()
+    assert sniff_page_type(html_bytes) == expected_type
+
+
+def test_sniff_page_type_by_container_marker():
+    """URLが判定に使えない場合、商品コンテナの目印で判定されることを確認する"""
+    html_content = '<html><body><div class="shop-search-result-view"></div></body></html>'
+    assert sniff_page_type(html_content, "https://shopee.sg/some.shop") == PageType.SHOP
+    assert sniff_page_type("<html><body></body></html>") == PageType.UNKNOWN
+
+
+def _without_saved_from_url(filename):
+    html_bytes = load_sample(filename).encode("utf-8")
+    return re.sub(rb"<!-- saved from url=.*? -->", b"", html_bytes, count=1)
+
+
+@pytest.mark.parametrize("chunk_size", [None, 4096])
+def test_sniff_search_page_without_saved_from_url(chunk_size):
+    """保存元URLがない検索結果ページが、カテゴリページと区別されることを確認する"""
+    search_bytes = _without_saved_from_url("keyword_search_result_sample.html")
+    category_bytes = _without_saved_from_url("category_sample.html")
+    if chunk_size is None:
+        assert sniff_page_type(search_bytes) == PageType.KEYWORD_SEARCH_RESULT
+        assert sniff_page_type(category_bytes) == PageType.CATEGORY
+    else:
+        assert sniff_page_type_from_stream(io.BytesIO(search_bytes), chunk_size=chunk_size) == PageType.KEYWORD_SEARCH_RESULT
+        assert sniff_page_type_from_stream(io.BytesIO(category_bytes), chunk_size=chunk_size) == PageType.CATEGORY
+
+
+def test_sniff_item_container_uses_canonical_link():
+    """商品コンテナの目印では、canonicalリンクがカテゴリのURLでない場合に検索結果ページと判定されることを確認する"""
+    container = b'<div class="shopee-search-item-result__item"></div>'
+    search_head = b'<link rel="canonical" href="https://shopee.sg/" data-rh="true">'
+    category_head = b'<link rel="canonical" href="https://shopee.sg/Socks-cat.1" data-rh="true">'
+    assert sniff_page_type(search_head + container) == PageType.KEYWORD_SEARCH_RESULT
+    assert sniff_page_type(category_head + container) == PageType.CATEGORY
+    # canonicalリンクがない場合はカテゴリページとして扱う
+    assert sniff_page_type(container) == PageType.CATEGORY
+
+
+def test_find_page_url():
+    """保存元URLのコメントがcanonicalリンクより優先されることを確認する"""
+    html_content = load_sample("keyword_search_result_sample.html")
+    assert find_page_url(html_content).startswith("https://shopee.sg/search?keyword=")
+    assert find_page_url('<link rel="canonical" href="https://shopee.sg/a-cat.1">') == "https://shopee.sg/a-cat.1"
+    assert find_page_url("<html></html>") is None
+
+
+@pytest.mark.parametrize("filename, expected_type", [
+    ("product_detail_sample.html", PageType.PRODUCT_DETAIL),
+    ("shop_sample.html", PageType.SHOP),
+    ("category_sample.html", PageType.CATEGORY),
+    ("keyword_search_result_sample.html", PageType.KEYWORD_SEARCH_RESULT),
+])
+def test_sniff_page_type_from_file(filename, expected_type):
+    """ファイルを少しずつ読み込む判定でも、全体を読んだ場合と同じ結果になることを確認する"""
+    path = os.path.join(SAMPLES_DIR, filename)
+    assert sniff_page_type_from_file(path, chunk_size=4096) == expected_type
+
+
+def test_sniffer_stops_at_decisive_marker():
+    """保存元URLで判定できる場合、先頭のチャンクだけで判定が確定することを確認する"""
+    sniffer = PageTypeSniffer()
+    with open(os.path.join(SAMPLES_DIR, "category_sample.html"), "rb") as f:
+        sniffer.feed(f.read(4096))
+    assert sniffer.done
+    assert sniffer.page_type == PageType.CATEGORY
+    assert sniffer.bytes_read == 4096
+
+
+def test_sniffer_finds_marker_across_chunks():
+    """チャンクの境界をまたぐ目印も見つけられることを確認する"""
+    html_bytes = b'<html><body>' + b' ' * 100 + b'<div class="shop-search-result-view"></div></body></html>'
+    sniffer = PageTypeSniffer()
+    for i in range(0, len(html_bytes), 16):
+        sniffer.feed(html_bytes[i:i + 16])
+    assert sniffer.page_type == PageType.SHOP
+
+
+def test_sniff_page_type_from_file_max_bytes():
+    """読み込むバイト数の上限に達した場合は判定を打ち切ることを確認する"""
+    path = os.path.join(SAMPLES_DIR, "shop_sample.html")
+    assert sniff_page_type_from_file(path, max_bytes=1024) == PageType.UNKNOWN
@@ -0,0 +1,50 @@
+"""
+並列解析モジュール (`parallel`) のテスト
+"""
+from pathlib import Path
+
+from shpsg_parser.parallel import parse_files
+from shpsg_parser.parser_category import parse_from_file as parse_from_file_category
+from shpsg_parser.parser_product import parse_from_file as parse_from_file_product
+
+SAMPLES_DIR = Path(__file__).parent.parent / "data" / "samples"
+CATEGORY_HTML_PATH = SAMPLES_DIR / "category_sample.html"
+PRODUCT_HTML_PATH = SAMPLES_DIR / "product_detail_sample.html"
+
+
+def test_parse_files_sequential():
+    """workers=1 の場合、現在のプロセスで逐次解析されることを確認する"""
+    results = list(parse_files([CATEGORY_HTML_PATH], parse_from_file_category))
+    assert len(results) == 1
+    assert results[0].error is None
+    assert len(results[0].items) == 60
+
+
+def test_parse_files_parallel_matches_sequential():
+    """並列解析の結果が逐次解析と同じ順序・内容になることを確認する"""
+    paths = [CATEGORY_HTML_PATH, PRODUCT_HTML_PATH, CATEGORY_HTML_PATH]
+    sequential = list(parse_files(paths, parse_from_file_category))
+    parallel = list(parse_files(paths, parse_from_file_category, workers=2, chunksize=1))
+
+    assert [r.path for r in parallel] == [str(p) for p in paths]
+    assert [len(r.items) for r in parallel] == [len(r.items) for r in sequential]
+    assert parallel[0].items == sequential[0].items
+
+
+def test_parse_files_unordered_returns_all_results():
+    """ordered=False の場合でも全ファイルの結果が返されることを確認する"""
+    paths = [CATEGORY_HTML_PATH, PRODUCT_HTML_PATH]
+    results = list(parse_files(paths, parse_from_file_category, workers=2, ordered=False))
+    assert sorted(r.path for r in results) == sorted(str(p) for p in paths)
+
+
+def test_parse_files_captures_errors():
+    """解析中の例外がファイル単位で捕捉され、処理が継続されることを確認する"""
+    paths = [SAMPLES_DIR / "non_existent_file.html", PRODUCT_HTML_PATH]
+    results = list(parse_files(paths, parse_from_file_product, workers=2))
+
+    assert results[0].error is not None
+    assert results[0].items == []
+    # 商品詳細パーサーの単一の戻り値はリストに揃えられる
+    assert results[1].error is None
+    assert len(results[1].items) == 1
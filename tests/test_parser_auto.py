@@ -0,0 +1,97 @@
+"""
+ページタイプ自動判定パーサー (`parser_auto`) のテスト
+"""
+import re
+from pathlib import Path
+
+import pytest
+
+from shpsg_parser import parser_auto
+from shpsg_parser.models import ProductBasicItem
+from shpsg_parser.page_type_identifier import PageType
+from shpsg_parser.models_product import ProductDetailItem
+from shpsg_parser.parser_auto import parse_any, parse_from_file
+
+SAMPLES_DIR = Path(__file__).parent.parent / "data" / "samples"
+
+
+@pytest.mark.parametrize("filename, expected_count, expected_page_type", [
+    ("category_sample.html", 60, "category"),
+    ("keyword_search_result_sample.html", 60, "search"),
+    ("shop_sample.html", 30, "shop"),
+    ("product_detail_sample.html", 1, "product_detail"),
+])
+def test_parse_from_file_dispatches_by_page_type(filename, expected_count, expected_page_type):
+    """各サンプルが対応するパーサーへ振り分けられることを確認する"""
+    items = parse_from_file(str(SAMPLES_DIR / filename))
+    assert len(items) == expected_count
+    assert {item.page_type for item in items} == {expected_page_type}
+
+
+def test_parse_any_returns_detail_item_in_list():
+    """商品詳細ページの結果がリストに揃えられることを確認する"""
+    items = parse_any((SAMPLES_DIR / "product_detail_sample.html").read_bytes())
+    assert len(items) == 1
+    assert isinstance(items[0], ProductDetailItem)
+
+
+def test_parse_any_url_overrides_html():
+    """URLが渡された場合は、HTML内の保存元URLよりも優先されることを確認する"""
+    html = (SAMPLES_DIR / "category_sample.html").read_text(encoding="utf-8")
+    items = parse_any(html, url="https://shopee.sg/search?keyword=socks")
+    assert len(items) == 60
+    assert all(isinstance(item, ProductBasicItem) for item in items)
+    assert items[0].page_type == "search"
+
+
+def test_parse_any_unknown_page():
+    """判定できないページでは空のリストが返ることを確認する"""
+    assert parse_any("<html><body><p>Hello</p></body></html>") == []
+    assert parse_any("") == []
+
+
+def test_parse_any_unknown_page_skips_dom(monkeypatch):
+    """判定できないページでは、DOMを構築せずに空のリストが返ることを確認する"""
+    def make_soup(*args, **kwargs):
+        raise AssertionError("DOM should not be built")
+
+    monkeypatch.setattr(parser_auto, "make_soup", make_soup)
+    assert parse_any("<html><body><p>Hello</p></body></html>", url="https://example.com/some/path") == []
+
+
+def test_parse_any_search_page_without_saved_from_url():
+    """保存元URLのない検索結果ページが、検索結果ページとして解析されることを確認する"""
+    html = (SAMPLES_DIR / "keyword_search_result_sample.html").read_text(encoding="utf-8")
+    html = re.sub(r"<!-- saved from url=.*? -->", "", html, count=1)
+    items = parse_any(html)
+    assert len(items) == 60
+    assert {item.page_type for item in items} == {"search"}
+
+
+SHOP_PAGE_WITHOUT_MARKERS = (
+    '<html><head><link rel="canonical" href="https://shopee.sg/someshop">'
+    '<script type="application/ld+json">{"@type": "Organization"}</script></head><body></body></html>'
+)
+
+
+@pytest.mark.parametrize("engine", ["bs4", "lxml"])
+def test_parse_any_json_ld_fallback_uses_page_url(monkeypatch, engine):
+    """URLが渡されない場合も、canonicalリンクとJSON-LDで判定したパーサーと指定のエンジンで解析されることを確認する"""
+    calls = []
+    monkeypatch.setattr(parser_auto.parser_shop, "parse_from_soup", lambda soup, validate: calls.append("bs4") or [])
+    monkeypatch.setitem(parser_auto._LXML_TREE_PARSERS, PageType.SHOP, lambda tree, validate: calls.append("lxml") or [])
+    assert parse_any(SHOP_PAGE_WITHOUT_MARKERS, engine=engine) == []
+    assert calls == [engine]
+
+
+def test_parse_from_file_not_found():
+    """存在しないファイルを指定した場合に `FileNotFoundError` が発生することを確認する"""
+    with pytest.raises(FileNotFoundError):
+        parse_from_file(str(SAMPLES_DIR / "non_existent_file.html"))
+
+
+def test_parse_any_lxml_engine_matches_bs4():
+    """lxmlエンジンを指定した場合も、BeautifulSoup版と同じ結果になることを確認する"""
+    for path in sorted(SAMPLES_DIR.glob("*.html")):
+        html_bytes = path.read_bytes()
+        assert parse_any(html_bytes, engine="lxml") == parse_any(html_bytes)
@@ -1,11 +1,29 @@
+from pathlib import Path
+from urllib.parse import urljoin
+
 import pytest
+from pydantic import HttpUrl, ValidationError
+from shpsg_parser import parser_category, parser_product, parser_search, parser_shop
+from shpsg_parser.models import ProductBasicItem, ProductBasicRecord
 from shpsg_parser.parser_base import (
     to_absolute_url,
+    to_absolute_image_url,
+    to_http_url,
     extract_price,
     extract_sold,
     BASE_URL,
+    make_soup,
+    extract_json_ld,
+    build_item,
+    validate_items,
+    detect_encoding,
+    decode_html,
+    scan_json_ld,
+    prefilter_html,
 )
 
+SAMPLES_DIR = Path(__file__).parent.parent / "data" / "samples"
+
 def test_to_absolute_url():
     """to_absolute_url関数のテスト"""
     # 既に絶対URLの場合
@@ -17,6 +35,34 @@ def test_to_absolute_url():
     # Noneの場合
     assert to_absolute_url(None) is None
 
+@pytest.mark.parametrize("url", [
+    "/Demon-Slayer-Figure-i.123456.7890123?sp_atk=abc&xptdk=def",
+    "/shop/123#reviews",
+    "/a/./b/../c",
+    "/..",
+    "//cdn.example.com/x.webp",
+    "Demon-Slayer-i.1.2",
+    "./Shopee_files/abc_tn.webp",
+    "?page=2",
+])
+def test_to_absolute_url_matches_urljoin(url):
+    """urljoinを使わない高速な経路を含め、結果がurljoinと一致することを確認する"""
+    assert to_absolute_url(url) == urljoin(BASE_URL, url)
+
+def test_url_normalization_is_cached():
+    """URLの正規化と検証の結果がキャッシュされ、同じオブジェクトが返されることを確認する"""
+    image = "./Shopee_files/sg-11134207-abc_tn.webp"
+    assert to_absolute_image_url(image) == "https://down-sg.img.susercontent.com/file/sg-11134207-abc.webp"
+    hits = to_absolute_image_url.cache_info().hits
+    to_absolute_image_url(image)
+    assert to_absolute_image_url.cache_info().hits == hits + 1
+
+    url = to_http_url(f"{BASE_URL}/Demon-Slayer-i.1.2")
+    assert isinstance(url, HttpUrl)
+    assert to_http_url(f"{BASE_URL}/Demon-Slayer-i.1.2") is url
+    with pytest.raises(ValidationError):
+        to_http_url("not a url")
+
 def test_extract_price():
     """extract_price関数のテスト"""
     assert extract_price("$27.25") == 27.25
@@ -37,3 +83,205 @@ def test_extract_sold():
     assert extract_sold("No sales") == 0
     assert extract_sold("") == 0
     assert extract_sold(None) == 0
+
+def test_extract_json_ld():
+    """extract_json_ld関数のテスト"""
+    html = """
+    <html><head>
+      <script type="application/ld+json">{"@type": "WebSite", "name": "Shopee"}</script>
+      <script type="application/ld+json">[{"@type": "Product", "name": "A"}, {"@type": "Offer"}]</script>
+      <script type="application/ld+json">{"@type": "Product", "name": "broken"</script>
+      <script type="text/javascript">var a = 1;</script>
+    </head><body></body></html>
+    """
+    objects = extract_json_ld(make_soup(html))
+    assert [obj["@type"] for obj in objects] == ["WebSite", "Product", "Offer"]
+
+def test_build_item_without_validation():
+    """validate=False の場合、検証せずに軽量なレコードが生成されることを確認する"""
+    data = {
+        "product_name": "Item",
+        "price": 1.0,
+        "sold": 1,
+        "product_url": "https://shopee.sg/item-i.1.2",
+        "image_url": "https://down-sg.img.susercontent.com/file/abc",
+        "currency": "SGD",
+        "page_type": "category",
+    }
+    item = build_item(ProductBasicItem, data, validate=False)
+    assert isinstance(item, ProductBasicRecord)
+    assert item.product_url == "https://shopee.sg/item-i.1.2"  # 文字列のまま
+    assert item.rating == 0.0  # 既定値は設定される
+
+    validated = validate_items([item])
+    assert validated == [build_item(ProductBasicItem, data)]
+    assert isinstance(validated[0].product_url, HttpUrl)
+    assert item.to_model() == validated[0]
+
+
+def test_record_fields_match_model():
+    """軽量なレコードのフィールドが ProductBasicItem と一致することを確認する"""
+    assert set(ProductBasicRecord.__slots__) == set(ProductBasicItem.model_fields)
+
+
+def test_validate_items_drops_invalid_items():
+    """一括検証に失敗した場合、不正なアイテムのみ除外されることを確認する"""
+    valid = build_item(ProductBasicItem, {
+        "product_name": "Valid", "price": 1.0, "sold": 1, "currency": "SGD", "page_type": "category",
+        "product_url": "https://shopee.sg/a", "image_url": "https://shopee.sg/b",
+    }, validate=False)
+    invalid = build_item(ProductBasicItem, {
+        "product_name": "Invalid", "price": 1.0, "sold": 1, "currency": "SGD", "page_type": "category",
+        "product_url": "", "image_url": "",
+    }, validate=False)
+    validated = validate_items([valid, invalid])
+    assert [item.product_name for item in validated] == ["Valid"]
+    assert validate_items([]) == []
+
+
+@pytest.mark.parametrize("html_bytes, expected", [
+    (b'<html><head><meta charset="Shift_JIS"></head></html>', "shift_jis"),
+    (b'<meta http-equiv="Content-Type" content="text/html; charset=UTF-8">', "utf-8"),
+    (b"\xef\xbb\xbf<html></html>", "utf-8-sig"),
+    (b'<meta charset="no-such-encoding">', "utf-8"),
+    (b"<html></html>", "utf-8"),
+])
+def test_detect_encoding(html_bytes, expected):
+    """BOMと <meta> タグの宣言から文字コードが判定されることを確認する"""
+    assert detect_encoding(html_bytes) == expected
+
+
+def test_decode_html():
+    """宣言された文字コードでデコードされ、文字列はそのまま返されることを確認する"""
+    html = '<meta charset="shift_jis"><p>日本語</p>'
+    assert decode_html(html.encode("shift_jis")) == html
+    assert decode_html(html) is html
+    assert make_soup(html.encode("shift_jis")).p.text == "日本語"
+
+
+@pytest.mark.parametrize("filename", [
+    "product_detail_sample.html",
+    "category_sample.html",
+    "keyword_search_result_sample.html",
+    "shop_sample.html",
+])
+def test_scan_json_ld_matches_extract_json_ld(filename):
+    """DOMを構築しないJSON-LDの抽出が、DOMからの抽出と同じ結果になることを確認する"""
+    html_bytes = (SAMPLES_DIR / filename).read_bytes()
+    expected = extract_json_ld(make_soup(html_bytes))
+    assert expected
+    assert scan_json_ld(html_bytes) == expected
+    assert scan_json_ld(html_bytes.decode("utf-8")) == expected
+
+
+def test_scan_json_ld_matches_extruct():
+    """商品詳細ページで、extruct (uniform=True) と同じJSON-LDが抽出されることを確認する"""
+    extruct = pytest.importorskip("extruct")
+    html = (SAMPLES_DIR / "product_detail_sample.html").read_text(encoding="utf-8")
+    expected = extruct.extract(html, syntaxes=["json-ld"], uniform=True)["json-ld"]
+    assert scan_json_ld(html) == expected
+
+
+def test_scan_json_ld_script_tags():
+    """属性の順序や引用符の違いに対応し、JSON-LD以外のスクリプトは無視することを確認する"""
+    html = """
+    <script>var type = "application/ld+json";</script>
+    <script id="a" type='application/ld+json'>{"@type": "WebSite"}</script>
+    <script type=application/ld+json data-x="1">
+    // comment
+    [{"@type": "Product", "name": "商品"}]
+    </script>
+    <link type="application/ld+json" href="/x.json">
+    <script type="application/ld+json">{"@type": "Product", "name": "broken"</script>
+    """
+    objects = scan_json_ld(html.encode("utf-8"))
+    assert [obj["@type"] for obj in objects] == ["WebSite", "Product"]
+    assert objects[1]["name"] == "商品"
+    assert scan_json_ld(b"<html></html>") == []
+
+
+def test_prefilter_html():
+    """script / style / svg の中身だけが取り除かれ、JSON-LDと要素の属性は残ることを確認する"""
+    html = """<html><head>
+    <style>.a { color: red; }</style>
+    <SCRIPT src="/app.js">var html = "<div>not a tag</div>";</SCRIPT>
+    <script type="application/ld+json">{"@type": "Product"}</script>
+    </head><body>
+    <svg class="icon-rating-solid" viewBox="0 0 15 15"><path d="M0 0L15 15"></path></svg>
+    <svg class="empty"/><p>本文</p><svg><polygon points="0,0"/></svg>
+    <noscript><p>noscript</p></noscript>
+    </body></html>"""
+    filtered = prefilter_html(html.encode("utf-8"))
+
+    assert b"color: red" not in filtered and b"not a tag" not in filtered
+    assert b"<path" not in filtered and b"<polygon" not in filtered
+    assert b'<script type="application/ld+json">{"@type": "Product"}</script>' in filtered
+    assert b'<svg class="icon-rating-solid" viewBox="0 0 15 15"></svg>' in filtered
+    assert '<svg class="empty"/><p>本文</p>'.encode("utf-8") in filtered
+    assert b"<noscript><p>noscript</p></noscript>" in filtered
+    # 文字列を渡した場合は文字列を返す
+    assert prefilter_html(html) == filtered.decode("utf-8")
+    assert prefilter_html(b"<p>text</p>") == b"<p>text</p>"
+
+
+def test_prefilter_skips_comments():
+    """コメント内の開始タグは無視され、後続の商品コンテナが取り除かれないことを確認する"""
+    html = b'<div><!-- <script> --><li class="shopee-search-item-result__item">KEEP</li><script>x</script></div>'
+    assert prefilter_html(html) == (
+        b'<div><!-- <script> --><li class="shopee-search-item-result__item">KEEP</li><script></script></div>'
+    )
+    # 閉じられていないコメントは、末尾までコメントとして扱う
+    unterminated = b"<p>a</p><!-- <style> <p>b</p></style>"
+    assert prefilter_html(unterminated) == unterminated
+
+
+def test_prefilter_quoted_attribute_values():
+    """開始タグの引用符で囲まれた属性値に ">" が含まれていても、タグの途中で切られないことを確認する"""
+    html = b"""<svg data-x="a>b"><path/></svg><p>text</p><style title='x>y'>.a{}</style>"""
+    assert prefilter_html(html) == b"""<svg data-x="a>b"></svg><p>text</p><style title='x>y'></style>"""
+    json_ld = b"""<script data-note="a>b" type="application/ld+json">{"@type": "Product"}</script>"""
+    assert prefilter_html(json_ld) == json_ld
+
+
+@pytest.mark.parametrize("parser, filename, engine", [
+    (parser_category, "category_sample.html", "bs4"),
+    (parser_category, "category_sample.html", "lxml"),
+    (parser_search, "keyword_search_result_sample.html", "bs4"),
+    (parser_search, "keyword_search_result_sample.html", "lxml"),
+    (parser_shop, "shop_sample.html", "bs4"),
+    (parser_shop, "shop_sample.html", "lxml"),
+])
+def test_prefilter_keeps_list_results(parser, filename, engine):
+    """事前フィルターの有無で、一覧ページの解析結果が変わらないことを確認する"""
+    html_bytes = (SAMPLES_DIR / filename).read_bytes()
+    expected = parser.parse_from_string(html_bytes, engine=engine)
+    assert expected
+    assert parser.parse_from_string(html_bytes, engine=engine, prefilter=True) == expected
+
+
+def test_prefilter_keeps_product_results():
+    """事前フィルターの有無で、商品詳細ページの解析結果 (レビューの星の数を含む) が変わらないことを確認する"""
+    html_bytes = (SAMPLES_DIR / "product_detail_sample.html").read_bytes()
+    expected = parser_product.parse_from_string(html_bytes)
+    assert expected.detailed_ratings
+    assert parser_product.parse_from_string(html_bytes, prefilter=True) == expected
+
+def test_build_item_uses_prevalidated_urls():
+    """検証時にURLのフィールドへ検証済みのオブジェクトが渡され、通常の検証と同じ結果になることを確認する"""
+    data = {
+        "product_name": "Figure",
+        "product_url": f"{BASE_URL}/Figure-i.1.2",
+        "image_url": "https://down-sg.img.susercontent.com/file/abc.webp",
+        "price": 10.0,
+        "sold": 3,
+        "currency": "SGD",
+        "page_type": "search",
+    }
+    item = build_item(ProductBasicItem, data)
+    assert item == ProductBasicItem(**data)
+    assert item.product_url is to_http_url(data["product_url"])
+    assert isinstance(data["product_url"], str)
+
+    # 不正なURLは、フィールド名を含むモデルの検証エラーになる
+    with pytest.raises(ValidationError, match="image_url"):
+        build_item(ProductBasicItem, {**data, "image_url": ""})
@@ -1,9 +1,14 @@
 import pytest
 from pathlib import Path
 from shpsg_parser.parser_category import (
+    iter_from_file,
+    iter_from_string,
     parse_from_file,
     parse_from_string,
+    parse_from_soup,
+    parse_from_bytes,
 )
+from shpsg_parser.parser_base import make_soup, validate_items
 from shpsg_parser.models import ProductBasicItem
 
 SAMPLES_DIR = Path(__file__).parent.parent / "data" / "samples"
@@ -95,3 +100,36 @@ def test_parse_from_string_empty_html():
     """T-006: 商品情報を含まないHTMLを渡した際に空のリストが返ることを確認する"""
     result = parse_from_string("<html><body></body></html>")
     assert result == []
+
+def test_parse_from_soup_and_bytes():
+    """`parse_from_soup` と `parse_from_bytes` が `parse_from_string` と同じ結果を返すことを確認する"""
+    html_bytes = CATEGORY_HTML_PATH.read_bytes()
+    expected = parse_from_string(html_bytes.decode("utf-8"))
+    assert parse_from_soup(make_soup(html_bytes)) == expected
+    assert parse_from_bytes(html_bytes) == expected
+
+@pytest.mark.parametrize("engine", ["bs4", "lxml"])
+def test_parse_without_validation(engine):
+    """検証を省略して解析し、後からまとめて検証した結果が通常の結果と一致することを確認する"""
+    html_bytes = CATEGORY_HTML_PATH.read_bytes()
+    trusted = parse_from_bytes(html_bytes, engine=engine, validate=False)
+    assert len(trusted) == 60
+    assert isinstance(trusted[0].product_url, str)
+    assert validate_items(trusted) == parse_from_bytes(html_bytes, engine=engine)
+
+@pytest.mark.parametrize("engine", ["bs4", "lxml", "stream"])
+def test_iter_from_file_and_string(engine):
+    """`iter_from_file` と `iter_from_string` が、`parse_from_file` と同じアイテムを1件ずつ返すことを確認する"""
+    expected = parse_from_file(str(CATEGORY_HTML_PATH), engine=engine)
+    items = iter_from_file(str(CATEGORY_HTML_PATH), engine=engine)
+    assert not isinstance(items, list)
+    assert next(items) == expected[0]
+    assert [expected[0], *items] == expected
+    assert list(iter_from_string(CATEGORY_HTML_PATH.read_bytes(), engine=engine)) == expected
+    assert list(iter_from_file(str(ITEM_HTML_PATH), engine=engine)) == parse_from_file(str(ITEM_HTML_PATH))
+
+def test_iter_from_file_not_found():
+    """`iter_from_file` でも、存在しないファイルは最初のアイテムの取得時に `FileNotFoundError` となることを確認する"""
+    items = iter_from_file(str(NON_EXISTENT_FILE_PATH))
+    with pytest.raises(FileNotFoundError):
+        next(items)
@@ -8,7 +8,9 @@ from pydantic import HttpUrl
 # TDD: Implement tests before the actual parser module exists.
 # These imports will fail until the files are created.
 from shpsg_parser.models_product import ProductDetailItem
-from shpsg_parser.parser_product import parse_from_file, parse_from_string, ParserError
+from shpsg_parser.parser_product import parse_from_file, parse_from_string, parse_from_soup, parse_from_bytes, ParserError
+from shpsg_parser.parser_base import make_soup
+from shpsg_parser.page_type_identifier import get_page_type, PageType
 
 # --- テスト用のフィクスチャ ---
 
@@ -119,3 +121,25 @@ def test_parse_non_product_page(category_page_html_content: str):
     T-016: 商品情報を含まないHTML（カテゴリページ）を渡した際にNoneが返されることを確認する
     """
     assert parse_from_string(category_page_html_content) is None
+
+
+# --- 解析済みドキュメントの共有 ---
+
+def test_parse_from_soup_shares_document(product_detail_html_content: str):
+    """
+    解析済みのBeautifulSoupオブジェクトをページタイプ判定と商品情報の抽出で共有できることを確認する
+    """
+    soup = make_soup(product_detail_html_content)
+    assert get_page_type(None, "https://shopee.sg/Item-i.672907573.19445913336", soup=soup) == PageType.PRODUCT_DETAIL
+
+    item = parse_from_soup(soup)
+    assert item is not None
+    assert item == parse_from_string(product_detail_html_content)
+
+
+def test_parse_from_bytes(product_detail_html_path: str):
+    """未デコードのバイト列からも同じ結果が得られることを確認する"""
+    with open(product_detail_html_path, "rb") as f:
+        item = parse_from_bytes(f.read())
+    assert item is not None
+    assert item.product_name == "Dr. Scholl Medi Qtto  Outside Sheer Stockings Nature Nude ★Direct From Japan★"
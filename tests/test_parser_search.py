@@ -1,6 +1,7 @@
 import pytest
 from pathlib import Path
-from shpsg_parser.parser_search import parse_from_file, parse_from_string
+from shpsg_parser.parser_search import iter_from_file, iter_from_string, parse_from_file, parse_from_string, parse_from_bytes
+from shpsg_parser.writers import open_writer
 from shpsg_parser.models import ProductBasicItem
 
 SAMPLES_DIR = Path(__file__).parent.parent / "data" / "samples"
@@ -38,3 +39,24 @@ def test_parse_from_string_search_page():
     assert isinstance(results, list)
     assert len(results) == 60
     assert results[0].page_type == "search"
+
+def test_parse_from_bytes_search_page():
+    """`parse_from_bytes` が `parse_from_string` と同じ結果を返すことを確認する"""
+    html_bytes = SEARCH_HTML_PATH.read_bytes()
+    assert parse_from_bytes(html_bytes) == parse_from_string(html_bytes.decode("utf-8"))
+
+@pytest.mark.parametrize("engine", ["bs4", "lxml", "stream"])
+def test_iter_from_file_and_string(engine):
+    """`iter_from_file` と `iter_from_string` が、`parse_from_file` と同じアイテムを1件ずつ返すことを確認する"""
+    expected = parse_from_file(str(SEARCH_HTML_PATH), engine=engine)
+    assert list(iter_from_file(str(SEARCH_HTML_PATH), engine=engine)) == expected
+    assert list(iter_from_string(SEARCH_HTML_PATH.read_text(encoding="utf-8"), engine=engine)) == expected
+
+def test_iter_from_file_into_writer(tmp_path):
+    """複数ファイルのアイテムを、リストにまとめずにライターへ逐次書き出せることを確認する"""
+    output = tmp_path / "products.ndjson"
+    paths = [str(SEARCH_HTML_PATH)] * 3
+    with open_writer(output, ProductBasicItem, "ndjson", batch_size=50) as writer:
+        writer.write_many(item for path in paths for item in iter_from_file(path, engine="stream"))
+    assert writer.count == 180
+    assert len(output.read_text(encoding="utf-8").splitlines()) == 180
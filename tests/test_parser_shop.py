@@ -1,5 +1,6 @@
 import pytest
 from pathlib import Path
+from shpsg_parser.parser_base import make_soup
 
 # Try to import the module to be tested, and skip all tests in this file if it fails.
 parser_shop = pytest.importorskip("shpsg_parser.parser_shop")
@@ -48,3 +49,19 @@ def test_parse_from_string_shop_page():
     assert isinstance(results, list)
     assert len(results) == 30
     assert results[0].page_type == "shop"
+
+def test_parse_from_soup_shop_page():
+    """`parse_from_soup` と `parse_from_bytes` が `parse_from_string` と同じ結果を返すことを確認する"""
+    html_bytes = SHOP_HTML_PATH.read_bytes()
+    expected = parser_shop.parse_from_string(html_bytes.decode("utf-8"))
+    assert parser_shop.parse_from_soup(make_soup(html_bytes)) == expected
+    assert parser_shop.parse_from_bytes(html_bytes) == expected
+
+
+@pytest.mark.parametrize("engine", ["bs4", "lxml", "stream"])
+def test_iter_from_file_and_string(engine):
+    """`iter_from_file` と `iter_from_string` が、`parse_from_file` と同じアイテムを1件ずつ返すことを確認する"""
+    expected = parser_shop.parse_from_file(str(SHOP_HTML_PATH), engine=engine)
+    assert len(expected) == 30
+    assert list(parser_shop.iter_from_file(str(SHOP_HTML_PATH), engine=engine)) == expected
+    assert list(parser_shop.iter_from_string(SHOP_HTML_PATH.read_bytes(), engine=engine)) == expected
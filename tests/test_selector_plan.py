@@ -0,0 +1,52 @@
+"""
+商品コンテナの要素収集 (`selector_plan`) のテスト
+"""
+from pathlib import Path
+
+from shpsg_parser.parser_base import make_soup
+from shpsg_parser.selector_plan import (
+    CATEGORY_ITEM_CONTAINERS,
+    collect_item_elements,
+    select_item_containers,
+)
+
+SAMPLES_DIR = Path(__file__).parent.parent / "data" / "samples"
+
+
+def test_collect_item_elements_matches_css_queries():
+    """1回の走査で収集した要素が、個別のCSSセレクタの結果と一致することを確認する"""
+    soup = make_soup((SAMPLES_DIR / "category_sample.html").read_bytes())
+    containers = select_item_containers(soup, CATEGORY_ITEM_CONTAINERS)
+    assert len(containers) == 60
+
+    for container in containers:
+        elements = collect_item_elements(container)
+        assert elements.name_div is container.select_one("div.line-clamp-2")
+        assert elements.link is container.find("a", href=True)
+        assert elements.img_with_alt is container.find("img", alt=True)
+        assert elements.img_with_src is container.select_one("img[src]")
+        assert elements.rating_star_full_img is container.select_one('img[alt="rating-star-full"]')
+        assert elements.rating_star_img is container.select_one('img[alt="rating-star"]')
+        assert elements.location_img is container.select_one('img[alt="location-icon"]')
+
+        spans = container.select("div.flex.items-baseline span")
+        expected_span = spans[1] if len(spans) > 1 else None
+        assert elements.price_span(1) is expected_span
+
+
+def test_collect_item_elements_minimal_container():
+    """文字列で探す要素 (通貨記号、販売数) が収集されることを確認する"""
+    html = """
+    <li class="shopee-search-item-result__item">
+      <a href="/item-i.1.2"><div class="line-clamp-2">Item</div></a>
+      <div class="_3_FVSo abc">$12.00</div>
+      <span>$</span><span>10.50</span>
+      <div>1.2k sold</div>
+    </li>
+    """
+    container = make_soup(html).li
+    elements = collect_item_elements(container)
+    assert elements.dollar_span.find_next_sibling("span").text == "10.50"
+    assert elements.fallback_price_div.text == "$12.00"
+    assert elements.sold_div.text == "1.2k sold"
+    assert elements.price_span(1) is None
@@ -0,0 +1,88 @@
+"""
+streamエンジン (`stream_engine`) のテスト
+
+`data/samples` のすべてのHTMLファイルについて、各パーサーの `engine="stream"` の結果が
+lxmlエンジンの結果と一致することを確認する。
+"""
+import gzip
+from pathlib import Path
+
+import pytest
+
+from shpsg_parser import parser_auto, parser_category, parser_search, parser_shop
+from shpsg_parser.instrumentation import collect
+from shpsg_parser.stream_engine import iter_category_items, iter_chunks, iter_search_items, iter_shop_items
+
+SAMPLES_DIR = Path(__file__).parent.parent / "data" / "samples"
+SAMPLE_FILES = sorted(SAMPLES_DIR.glob("*.html"))
+PARSERS = [parser_category, parser_search, parser_shop]
+
+
+@pytest.mark.parametrize("parser", PARSERS, ids=lambda m: m.__name__.split(".")[-1])
+@pytest.mark.parametrize("sample_path", SAMPLE_FILES, ids=lambda p: p.name)
+def test_stream_engine_parity(parser, sample_path):
+    """streamエンジンの結果がlxmlエンジンと一致することを確認する"""
+    html_bytes = sample_path.read_bytes()
+    expected = parser.parse_from_bytes(html_bytes, engine="lxml")
+    assert parser.parse_from_bytes(html_bytes, engine="stream") == expected
+    assert parser.parse_from_file(str(sample_path), engine="stream") == expected
+
+
+@pytest.mark.parametrize("iter_items, filename", [
+    (iter_category_items, "category_sample.html"),
+    (iter_search_items, "keyword_search_result_sample.html"),
+    (iter_shop_items, "shop_sample.html"),
+])
+def test_small_chunks_and_str_input(iter_items, filename):
+    """チャンクの区切り位置や、文字列の入力によって結果が変わらないことを確認する"""
+    html_bytes = (SAMPLES_DIR / filename).read_bytes()
+    expected = list(iter_items(iter_chunks(html_bytes)))
+    assert expected
+    assert list(iter_items(iter_chunks(html_bytes, chunk_size=997))) == expected
+    assert list(iter_items(iter_chunks(html_bytes.decode("utf-8"), chunk_size=4096))) == expected
+
+
+def test_yields_items_before_end_of_input():
+    """ページの末尾を読み込む前に、最初のアイテムが返されることを確認する"""
+    html_bytes = (SAMPLES_DIR / "keyword_search_result_sample.html").read_bytes()
+    chunks = list(iter_chunks(html_bytes, chunk_size=16 * 1024))
+    consumed = []
+
+    def feed():
+        for chunk in chunks:
+            consumed.append(chunk)
+            yield chunk
+
+    items = iter_search_items(feed())
+    first = next(items)
+    assert first.product_name
+    assert len(consumed) < len(chunks)
+    assert len(list(items)) == 59
+
+
+def test_category_parser_falls_back_to_item_page():
+    """`li` の商品コンテナがないページは、商品詳細ページとして解析されることを確認する"""
+    html_bytes = (SAMPLES_DIR / "product_detail_sample.html").read_bytes()
+    expected = parser_category.parse_from_bytes(html_bytes, engine="lxml")
+    assert len(expected) == 1
+    assert list(iter_category_items(iter_chunks(html_bytes))) == expected
+
+
+def test_gzip_file_and_counters(tmp_path):
+    """圧縮されたファイルを読み込め、ページ数とアイテム数が記録されることを確認する"""
+    path = tmp_path / "shop.html.gz"
+    path.write_bytes(gzip.compress((SAMPLES_DIR / "shop_sample.html").read_bytes()))
+    with collect() as stats:
+        items = parser_shop.parse_from_file(str(path), engine="stream")
+    assert len(items) == 30
+    assert items[0].location == "Japan"
+    assert stats.counters["pages.shop"] == 1
+    assert stats.counters["items.shop"] == 30
+    assert {"read", "tree", "extract"} <= set(stats.timings)
+
+
+def test_parse_any_with_stream_engine():
+    """ページタイプの自動判定でも、streamエンジンを選択できることを確認する"""
+    html_bytes = (SAMPLES_DIR / "category_sample.html").read_bytes()
+    expected = parser_auto.parse_any(html_bytes, engine="lxml")
+    assert parser_auto.parse_any(html_bytes, engine="stream") == expected
@@ -0,0 +1,243 @@
+"""
+逐次書き出しライター (`writers`) のテスト
+"""
+import csv
+import json
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from shpsg_parser.models import ProductBasicItem
+from shpsg_parser.models_product import ProductDetailItem
+from shpsg_parser.parser_base import build_item
+from shpsg_parser.parser_product import parse_from_file as parse_from_file_product
+from shpsg_parser.writers import CsvItemWriter, NdjsonItemWriter, SqliteItemWriter, arrow_schema, open_writer
+
+PRODUCT_HTML_PATH = Path(__file__).parent.parent / "data" / "samples" / "product_detail_sample.html"
+
+
+def _make_item(i: int) -> ProductBasicItem:
+    return ProductBasicItem(
+        product_name=f"Item {i}",
+        price=1.5 + i,
+        sold=i,
+        product_url=f"https://shopee.sg/item-i.1.{i}",
+        image_url=f"https://down-sg.img.susercontent.com/file/{i}",
+        currency="SGD",
+        page_type="category",
+    )
+
+
+def test_csv_writer_flushes_in_batches(tmp_path):
+    """バッチサイズに達するたびにファイルへ書き出されることを確認する"""
+    path = tmp_path / "out.csv"
+    writer = CsvItemWriter(path, ProductBasicItem, batch_size=2)
+    writer.write(_make_item(0))
+    assert not path.exists()  # 最初のバッチまではファイルを作成しない
+
+    writer.write(_make_item(1))
+    assert writer.count == 2
+    with open(path, encoding="utf-8-sig") as f:
+        assert len(f.read().splitlines()) == 3
+
+    writer.write(_make_item(2))
+    writer.close()
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.reader(f))
+    assert len(rows) == 4
+
+
+def test_csv_writer_column_order_follows_model(tmp_path):
+    """カラム順がモデルのフィールド定義順になることを確認する"""
+    path = tmp_path / "out.csv"
+    with CsvItemWriter(path, ProductBasicItem) as writer:
+        writer.write(_make_item(1))
+
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        header, row = list(csv.reader(f))
+    assert header == list(ProductBasicItem.model_fields)
+    record = dict(zip(header, row))
+    assert record["product_url"] == "https://shopee.sg/item-i.1.1"
+    assert record["location"] == ""
+
+
+def test_csv_writer_joins_image_urls(tmp_path):
+    """商品詳細の image_urls がカンマ区切りで出力されることを確認する"""
+    item = ProductDetailItem(
+        product_id="1",
+        product_name="Detail",
+        product_description="desc",
+        price=10.0,
+        product_url="https://shopee.sg/detail-i.1.1",
+        image_urls=["https://example.com/a", "https://example.com/b"],
+        shop_id="1",
+        shop_name="shop",
+        specifications={"Stock": "10"},
+    )
+    path = tmp_path / "detail.csv"
+    with CsvItemWriter(path, ProductDetailItem) as writer:
+        writer.write(item)
+
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        record = next(csv.DictReader(f))
+    assert record["image_urls"] == "https://example.com/a,https://example.com/b"
+    assert record["specifications"] == "{'Stock': '10'}"
+
+
+def test_ndjson_writer(tmp_path):
+    """NDJSON形式で1行1件ずつ出力されることを確認する"""
+    path = tmp_path / "out.ndjson"
+    with NdjsonItemWriter(path, ProductBasicItem, batch_size=2) as writer:
+        writer.write_many(_make_item(i) for i in range(3))
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 3
+    assert json.loads(lines[2])["product_name"] == "Item 2"
+    assert list(json.loads(lines[0])) == list(ProductBasicItem.model_fields)
+
+
+@pytest.mark.parametrize("writer_class", [CsvItemWriter, NdjsonItemWriter])
+def test_writer_outputs_records_like_models(tmp_path, writer_class):
+    """検証を省略したレコードが、検証済みのモデルと同じ内容で出力されることを確認する"""
+    items = [_make_item(i) for i in range(3)]
+    records = [build_item(ProductBasicItem, item.model_dump(mode="json"), validate=False) for item in items]
+    with writer_class(tmp_path / "models", ProductBasicItem) as writer:
+        writer.write_many(items)
+    with writer_class(tmp_path / "records", ProductBasicItem) as writer:
+        writer.write_many(records)
+    assert (tmp_path / "records").read_bytes() == (tmp_path / "models").read_bytes()
+
+
+def test_writer_calls_on_flush_after_each_batch(tmp_path):
+    """バッチを書き出すたびに、書き出した後で `on_flush` が呼び出されることを確認する"""
+    flushed = []
+    writer = open_writer(tmp_path / "out.csv", ProductBasicItem, batch_size=2, on_flush=lambda: flushed.append(writer.count))
+    writer.write_many(_make_item(i) for i in range(3))
+    assert flushed == [2]
+    assert writer.buffered == 1
+    writer.close()
+    assert flushed == [2, 3]
+    assert writer.buffered == 0
+
+
+@pytest.mark.parametrize("output_format", ["csv", "ndjson"])
+def test_writer_append(tmp_path, output_format):
+    """追記した結果が、1回で書き出した結果と同じになることを確認する"""
+    expected = tmp_path / "expected"
+    with open_writer(expected, ProductBasicItem, output_format) as writer:
+        writer.write_many(_make_item(i) for i in range(4))
+
+    path = tmp_path / "out"
+    with open_writer(path, ProductBasicItem, output_format, append=True) as writer:
+        writer.write_many(_make_item(i) for i in range(2))
+    with open_writer(path, ProductBasicItem, output_format, append=True) as writer:
+        writer.write_many(_make_item(i) for i in range(2, 4))
+    assert path.read_bytes() == expected.read_bytes()
+
+
+def test_sqlite_writer_upserts_products(tmp_path):
+    """一覧ページのアイテムが商品URLをキーとして登録・更新されることを確認する"""
+    path = tmp_path / "out.sqlite"
+    with SqliteItemWriter(path, ProductBasicItem, batch_size=2) as writer:
+        writer.write_many(_make_item(i) for i in range(3))
+    updated = _make_item(1).model_copy(update={"price": 99.0})
+    with SqliteItemWriter(path, ProductBasicItem) as writer:
+        writer.write(updated)
+        writer.write(build_item(ProductBasicItem, _make_item(3).model_dump(mode="json"), validate=False))
+
+    with sqlite3.connect(path) as conn:
+        rows = conn.execute("SELECT product_url, price FROM products ORDER BY sold").fetchall()
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert [price for _, price in rows] == [1.5, 99.0, 3.5, 4.5]
+    assert rows[0][0] == "https://shopee.sg/item-i.1.0"
+    assert {"products_price", "products_sold", "products_shop_type", "product_details_shop_id"} <= indexes
+
+
+def test_sqlite_writer_stores_detail_lists_in_child_tables(tmp_path):
+    """商品詳細のリストや辞書が子テーブルに格納され、再登録しても重複しないことを確認する"""
+    item = parse_from_file_product(str(PRODUCT_HTML_PATH))
+    path = tmp_path / "out.sqlite"
+    for _ in range(2):
+        with open_writer(path, ProductDetailItem, "sqlite") as writer:
+            writer.write(item)
+
+    with sqlite3.connect(path) as conn:
+        detail = conn.execute("SELECT product_id, shop_id, shipping_cost_text FROM product_details").fetchall()
+        specs = conn.execute("SELECT name, value FROM product_specifications ORDER BY position").fetchall()
+        variations = conn.execute("SELECT name, available FROM product_variations ORDER BY position").fetchall()
+        images = conn.execute("SELECT COUNT(*) FROM product_images").fetchone()[0]
+        ratings = conn.execute("SELECT COUNT(*) FROM product_ratings").fetchone()[0]
+    assert detail == [(item.product_id, item.shop_id, item.shipping_info.cost_text)]
+    assert specs == list(item.specifications.items())
+    assert variations == [(v["name"], int(v["available"])) for v in item.variations]
+    assert images == len(item.image_urls)
+    assert ratings == len(item.detailed_ratings)
+
+
+def test_parquet_writer_keeps_nested_types(tmp_path):
+    """Parquet出力で型と入れ子の構造が保たれ、必要なカラムのみ読み込めることを確認する"""
+    pq = pytest.importorskip("pyarrow.parquet")
+    detail = parse_from_file_product(str(PRODUCT_HTML_PATH))
+    path = tmp_path / "out.parquet"
+    with open_writer(path, (ProductBasicItem, ProductDetailItem), "parquet", batch_size=2, row_group_size=3) as writer:
+        writer.write_many(_make_item(i) for i in range(4))
+        writer.write(detail)
+
+    parquet_file = pq.ParquetFile(path)
+    assert parquet_file.schema_arrow == arrow_schema((ProductBasicItem, ProductDetailItem))
+    assert parquet_file.metadata.num_rows == 5
+    assert parquet_file.metadata.num_row_groups == 2
+
+    table = pq.read_table(path, columns=["price", "image_urls", "variations", "specifications"])
+    assert table.column_names == ["price", "image_urls", "variations", "specifications"]
+    rows = table.to_pylist()
+    assert [row["price"] for row in rows[:4]] == [1.5, 2.5, 3.5, 4.5]
+    assert rows[4]["image_urls"] == [str(url) for url in detail.image_urls]
+    assert rows[4]["variations"][0] == {"name": detail.variations[0]["name"], "price": None, "available": True}
+    assert dict(rows[4]["specifications"]) == detail.specifications
+
+
+def test_parquet_writer_types_variation_fields(tmp_path):
+    """バリエーションが、フィールドごとの型を持つstructのlistとして出力されることを確認する"""
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    detail = parse_from_file_product(str(PRODUCT_HTML_PATH))
+    detail.variations = [{"name": "M", "price": 10, "available": False}, {"name": "L", "price": "12.5", "extra": 1}]
+    path = tmp_path / "out.parquet"
+    with open_writer(path, ProductDetailItem, "parquet") as writer:
+        writer.write(detail)
+
+    table = pq.read_table(path, columns=["variations"])
+    element_type = table.schema.field("variations").type.value_type
+    assert element_type.field("price").type == pa.float64()
+    assert element_type.field("available").type == pa.bool_()
+    assert table.to_pylist()[0]["variations"] == [
+        {"name": "M", "price": 10.0, "available": False},
+        {"name": "L", "price": 12.5, "available": None},
+    ]
+
+
+def test_parquet_writer_rejects_append(tmp_path):
+    """既存のParquetファイルへの追記は ValueError になることを確認する"""
+    pytest.importorskip("pyarrow")
+    path = tmp_path / "out.parquet"
+    with open_writer(path, ProductBasicItem, "parquet") as writer:
+        writer.write(_make_item(0))
+    with pytest.raises(ValueError):
+        open_writer(path, ProductBasicItem, "parquet", append=True)
+
+
+def test_writer_without_items_creates_no_file(tmp_path):
+    """1件も書き出さなかった場合はファイルが作成されないことを確認する"""
+    path = tmp_path / "empty.csv"
+    with open_writer(path, ProductBasicItem) as writer:
+        pass
+    assert writer.count == 0
+    assert not path.exists()
+
+
+def test_open_writer_unsupported_format(tmp_path):
+    """未対応の出力形式を指定した場合に ValueError が発生することを確認する"""
+    with pytest.raises(ValueError):
+        open_writer(tmp_path / "out.xml", ProductBasicItem, "xml")